@@ -2,20 +2,62 @@
 
 import streamlit as st
 import pandas as pd
-import numpy as np
+import io
 import os
 import sys
-from PIL import Image
-from modules.evaluate_stock import evaluate_stock
-
-sys.path.append(os.path.abspath("modules"))
-from score_utils import finalize_scores, assess_reliability
-from fetch_news import fetch_google_news
-from chart_utils import plot_price_rsi_macd
-from calculate_indicators import add_tech_indicators
-from price_utils import calculate_recommended_sell
-from datetime import datetime
-from pykrx import stock
+import threading
+import time
+import uuid
+from modules.evaluate_stock import build_evaluation_context, evaluate_context, score_quantiles
+from modules.trading_calendar import get_calendar
+from modules.price_store import bar_path, load_price_history
+from modules.stock_table import get_stock_row, indexed_codes, read_stock_table, table_version
+from modules.search_index import StockSearchIndex
+from modules.signals import last_signal_index
+from modules.screener import RULE_NAMES, SCREENER_PATH, Screener, load_screener
+from modules.update_journal import BASE_DATE_COL
+from modules.watchlist import (
+    FAVORITES_PARAM, format_favorites, get_watchlist_warmer, load_favorites, parse_favorites, toggle_favorite,
+)
+from modules.tracing import finish_trace, flatten, registry, set_export, span, stage, start_trace
+from modules.score_utils import (
+    FACTORS, STYLE_DEFS, STYLES, custom_style, ensure_scores, formula_markdown, grade_reliability, numeric_frame,
+    score_matrix, select_style, zscore_matrix,
+)
+from modules.fetch_news import get_news_service
+from modules.calculate_indicators import add_tech_indicators
+from modules.price_utils import calculate_recommended_sell
+
+LOGO_PATH = "logo_tynex.png"
+LOGO_SMALL_PATH = "logo_tynex_small.png"  # 표시 크기의 2배(700px)로 미리 축소한 로고
+LOGO_WIDTH = 350
+
+
+@st.cache_resource(show_spinner=False)
+def load_logo(version=None):
+    # 축소본 바이트를 프로세스당 1회 읽어 공유, 없으면 원본을 1회 축소 (PIL은 이 경우에만 로드)
+    if os.path.exists(LOGO_SMALL_PATH):
+        with open(LOGO_SMALL_PATH, "rb") as f:
+            return f.read()
+    from PIL import Image
+    with Image.open(LOGO_PATH) as img:
+        img.thumbnail((LOGO_WIDTH * 2, LOGO_WIDTH * 2))
+        buf = io.BytesIO()
+        img.save(buf, format="PNG", optimize=True)
+    return buf.getvalue()
+
+
+def logo_version():
+    try:
+        return os.path.getmtime(LOGO_SMALL_PATH)
+    except OSError:
+        return None
+
+# 실행(rerun) 단위 트레이스: 단계별 소요 시간은 사이드바 디버그 패널에서 확인
+# 앱 서버는 재실행마다 파일이 쌓이므로 APP_TRACE_EXPORT=1일 때만 traces/에 기록
+set_export(os.environ.get("APP_TRACE_EXPORT", "0") == "1")
+start_trace("app_rerun")
+stage("layout")
 
 # 3등분 columns 사용해 중앙 열에 이미지 배치
 col1, col2, col3 = st.columns([1, 6, 1])
@@ -25,70 +67,219 @@ with col1:
 
 with col2:
     try:
-        logo_img = Image.open("logo_tynex.png")  # 로컬 파일
-        st.image(logo_img, width=350)  # 크기 조절
+        st.image(load_logo(version=logo_version()), width=LOGO_WIDTH)
     except Exception:
         st.write("로고 이미지 로드 실패")
 
 with col3:
     st.write("")
 
-# 점수 계산 설명
-def show_score_formula(style):
-    if style == "aggressive":
-        st.markdown("""
-        #### 공격적 투자 성향 점수 계산식
-        - score = -0.25 * z_PER - 0.2 * z_PBR + 0.2 * z_EPS + 0.1 * z_BPS + 0.1 * z_배당률 + 0.15 * z_거래대금
-        - EPS가 양수일 경우 0.1점 가산
-        - z_변수는 표준화 지표(Z-Score)입니다.
-        """)
-    elif style == "stable":
-        st.markdown("""
-        #### 안정적 투자 성향 점수 계산식
-        - score = -0.3 * z_PER - 0.35 * z_PBR + 0.2 * z_BPS + 0.1 * z_배당률 + 0.05 * z_거래대금
-        - BPS가 중간값 이상일 경우 0.1점 가산
-        """)
-    elif style == "dividend":
-        st.markdown("""
-        #### 배당형 투자 성향 점수 계산식
-        - score = 0.7 * z_배당률 - 0.15 * z_PBR - 0.1 * z_PER + 0.05 * z_거래대금
-        - 배당률 3% 이상일 경우 0.15점 가산
-        """)
-    else:
-        st.markdown("투자 성향에 맞는 점수 계산식이 없습니다.")
-        
-@st.cache_data(ttl=3600, show_spinner=False)
-def load_filtered_data():
-    try:
-        df = pd.read_csv("filtered_stocks.csv", dtype={'종목코드': str})
-        expected = ["종목명", "종목코드", "현재가", "PER", "PBR", "EPS", "BPS", "배당률"]
-        for col in expected:
-            if col not in df.columns:
-                df[col] = np.nan
-        return df
-    except Exception:
+def data_version():
+    return table_version()
+
+@st.cache_resource(show_spinner=False)
+def background_update():
+    # 종목 테이블이 없을 때 전체 갱신은 요청 스레드가 아닌 백그라운드에서 1회만 실행
+    def run():
         from update_stock_database import update_database
         try:
             update_database()
-            df = pd.read_csv("filtered_stocks.csv", dtype={'종목코드': str})
-            for col in expected:
-                if col not in df.columns:
-                    df[col] = np.nan
-            return df
-        except Exception:
-            return pd.DataFrame()
+        except Exception as e:
+            print(f"[app] 백그라운드 갱신 실패: {e}", file=sys.stderr)
+
+    thread = threading.Thread(target=run, name="update_database", daemon=True)
+    thread.start()
+    return thread
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def load_filtered_data(version=None):
+    # 테이블이 없으면 빈 프레임 (버전이 바뀌는 갱신 완료 시점에 다시 로드됨)
+    try:
+        return read_stock_table()
+    except Exception:
+        return pd.DataFrame()
+
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def load_scored_data(version=None):
+    # 데이터 버전당 1회만 점수 계산 (업데이터가 저장한 점수 컬럼이 있으면 그대로 사용)
+    df = load_filtered_data(version)
+    if not isinstance(df, pd.DataFrame) or df.empty:
+        return df
+    return ensure_scores(df)
 
 
-style = st.sidebar.radio("투자 성향", ["aggressive", "stable", "dividend"], horizontal=True)
+@st.cache_data(ttl=3600, show_spinner=False)
+def load_name_index(version=None):
+    # 종목명 -> 종목코드 (선택 시 전체 스캔 대신 해시 조회)
+    df = load_scored_data(version)
+    return dict(zip(df["종목명"], df["종목코드"]))
+
+@st.cache_resource(show_spinner=False)
+def load_style_view(version, style):
+    # 성향별 점수 프레임, 종목코드 조회 테이블, 점수 분위수 (읽기 전용으로 공유)
+    scored = select_style(load_scored_data(version), style)
+    return scored, scored.set_index("종목코드", drop=False), score_quantiles(scored)
+
+@st.cache_resource(show_spinner=False)
+def load_score_inputs(version=None):
+    # 사용자 정의 성향용: 팩터 값/z-score 행렬/신뢰등급을 데이터 버전당 1회만 계산
+    df = load_scored_data(version)
+    values = numeric_frame(df).to_numpy()
+    return values, zscore_matrix(values), grade_reliability(df)
+
+def custom_style_controls():
+    # 기준 성향의 가중치에서 출발해 슬라이더로 조정 (기준 성향을 바꾸면 슬라이더 초기화)
+    base = st.sidebar.selectbox("기준 성향", STYLES, format_func=lambda s: STYLE_DEFS[s]["label"], key="custom_base")
+    weights = {
+        factor: st.sidebar.slider(
+            f"{factor} 가중치", -1.0, 1.0, float(STYLE_DEFS[base]["weights"].get(factor, 0.0)), 0.05,
+            key=f"custom_w_{base}_{factor}",
+        )
+        for factor in FACTORS
+    }
+    use_bonus = st.sidebar.checkbox("기준 성향 가산 규칙 적용", value=True, key="custom_bonus")
+    return custom_style(weights, STYLE_DEFS[base]["bonus"] if use_bonus else [])
+
+@st.cache_data(ttl=3600, show_spinner=False, max_entries=256)
+def load_stock_row(version, code, style):
+    # sqlite 백엔드의 선택 종목 기본키 조회 (CSV 백엔드는 None -> 화면의 종목코드 인덱스 프레임 사용)
+    return get_stock_row(code, style)
+
+def custom_style_view(version, definition):
+    # 캐시된 z 행렬에 가중치 벡터만 곱해 재정렬 (z-score 재계산 없음)
+    values, z, grades = load_score_inputs(version)
+    scored = load_scored_data(version).assign(score=score_matrix(values, [definition], z)[:, 0], 신뢰등급=grades)
+    return scored, scored.set_index("종목코드", drop=False), score_quantiles(scored)
+
+@st.cache_resource(show_spinner=False)
+def load_search_index(version=None):
+    # 데이터 버전당 1회 구축: 종목명/코드/초성/시장구분
+    df = load_scored_data(version)
+    if "시장구분" not in df.columns and os.path.exists("initial_krx_list.csv"):
+        markets = pd.read_csv("initial_krx_list.csv", dtype={'종목코드': str})[["종목코드", "시장구분"]]
+        df = df.merge(markets.drop_duplicates("종목코드"), on="종목코드", how="left")
+    if "시장구분" in df.columns:
+        df = df.assign(시장구분=df["시장구분"].astype(object).fillna(""))
+    return StockSearchIndex.from_frame(df)
+
+def screener_version():
+    try:
+        return os.path.getmtime(SCREENER_PATH)
+    except OSError:
+        return None
+
+@st.cache_resource(show_spinner=False)
+def load_screener_view(version, screener_file_version=None):
+    # 야간 작업이 저장한 비트마스크 행렬 우선, 없으면 종목 테이블로 구성
+    screener = load_screener()
+    if screener is None:
+        screener = Screener.from_frame(load_scored_data(version))
+    # sqlite 백엔드면 인덱스 컬럼 범위 비교는 stocks 테이블 인덱스로 (CSV 백엔드는 배열 비교)
+    screener.indexed_lookup = indexed_codes
+    return screener
+
+def price_version(code):
+    try:
+        return os.path.getmtime(bar_path(code))
+    except OSError:
+        return None
 
-raw_df = load_filtered_data()
-if not isinstance(raw_df, pd.DataFrame) or raw_df.empty:
-    st.error("데이터를 불러올 수 없습니다.")
+@st.cache_data(ttl=3600, show_spinner=False)
+def load_price_frame(code, start, end, version=None):
+    # 종목별 가격 파일 버전으로 키잉: 개별 갱신 시 해당 종목 항목만 새로 로드
+    # 저장소만 읽음: 부족한 구간은 관심종목 워커가 백그라운드에서 보충하고, 보충되면 버전이 바뀌어 다시 로드
+    return load_price_history(code, start, end, refill=False)
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def load_base_date(version=None):
+    # 종목 테이블 기준일 (야간 갱신 기준 최신 거래일)
+    df = load_filtered_data(version)
+    if BASE_DATE_COL not in df.columns or df[BASE_DATE_COL].dropna().empty:
+        return None
+    return str(df[BASE_DATE_COL].dropna().max())
+
+def data_window(days):
+    # 조회 구간 끝은 테이블 기준일: 요청 중 거래일 캘린더(pykrx) 조회를 하지 않음
+    end = load_base_date(data_version())
+    if end is None:
+        return get_calendar().window(days=days)
+    return (pd.Timestamp(end) - pd.Timedelta(days=days)).strftime("%Y%m%d"), end
+
+
+CHART_PERIODS = {"6개월": 182, "1년": 365, "3년": 365 * 3, "5년": 365 * 5}
+
+@st.cache_resource(show_spinner=False, max_entries=64)
+def load_price_chart(code, start, end, version=None):
+    # 종목 × 구간 × 가격 파일 버전당 1회 생성하는 WebGL 차트 (읽기 전용으로 공유, plotly는 첫 차트 때 로드)
+    from modules.chart_utils import plot_price_panels
+    df = load_price_frame(code, start, end, version)
+    if df is None or df.empty:
+        return None
+    return plot_price_panels(add_tech_indicators(df))
+
+
+@st.cache_resource(show_spinner=False, max_entries=8)
+def load_comparison_chart(key, _frames):
+    # (종목, 준비 시각) 조합당 1회 생성 (프레임은 키에 포함하지 않음)
+    from modules.chart_utils import plot_comparison
+    return plot_comparison(_frames)
+
+def watchlist_rows(names, frames, lookup):
+    rows = []
+    for fav_code, frame in frames.items():
+        close = frame["종가"].dropna()
+        row = lookup.loc[fav_code]
+        rows.append({
+            "종목명": names[fav_code], "종목코드": fav_code, "종가": close.iloc[-1],
+            "1개월(%)": (close.iloc[-1] / close.iloc[-min(21, len(close))] - 1) * 100,
+            "3개월(%)": (close.iloc[-1] / close.iloc[-min(63, len(close))] - 1) * 100,
+            "RSI_14": frame["RSI_14"].iloc[-1], "MACD-Signal": frame["MACD"].iloc[-1] - frame["MACD_SIGNAL"].iloc[-1],
+            "score": row["score"], "PER": row["PER"], "배당률": row["배당률"],
+        })
+    return pd.DataFrame(rows).round(2)
+
+def show_watchlist(names, warmer, window):
+    # 백그라운드로 준비된 프레임만 사용 (외부 호출 없음), 아직 안 된 종목은 준비 중으로 표시
+    frames, pending = {}, []
+    for fav_code in names:
+        frame = warmer.get(fav_code, *window)
+        if frame is None or frame.empty:
+            pending.append(names[fav_code])
+        else:
+            frames[fav_code] = frame
+    if frames:
+        st.dataframe(watchlist_rows(names, frames, row_lookup), hide_index=True)
+        warmed = warmer.status()
+        key = tuple((c, warmed.get(c)) for c in frames)
+        st.plotly_chart(load_comparison_chart(key, {names[c]: f for c, f in frames.items()}),
+                        use_container_width=True, key="watchlist_chart")
+    if pending:
+        st.caption("데이터 준비 중: " + ", ".join(pending))
+
+
+style = st.sidebar.radio("투자 성향", STYLES + ["custom"], horizontal=True)
+
+stage("load_table", style=style)
+base_df = load_scored_data(data_version())
+if not isinstance(base_df, pd.DataFrame) or base_df.empty:
+    if background_update().is_alive():
+        st.info("종목 데이터를 준비 중입니다. 잠시 후 새로고침하세요.")
+    else:
+        st.error("데이터를 불러올 수 없습니다.")
     st.stop()
 
-scored_df = finalize_scores(raw_df, style=style)
-scored_df["신뢰등급"] = scored_df.apply(assess_reliability, axis=1)
+if style == "custom":
+    style_def = custom_style_controls()
+    scored_df, row_lookup, quantiles = custom_style_view(data_version(), style_def)
+else:
+    style_def = STYLE_DEFS[style]
+    scored_df, row_lookup, quantiles = load_style_view(data_version(), style)
 top10 = scored_df.sort_values("score", ascending=False).head(10)
+stage("top10")
+# TOP10 뉴스는 백그라운드로 미리 받아 두고 뉴스 영역은 캐시에서 렌더링
+news_service = get_news_service()
+news_service.prefetch(top10["종목명"].tolist())
 
 st.subheader("TOP10 종목 빠른 선택")
 quick_selected = st.selectbox("TOP10 종목명", top10["종목명"].tolist(), key="top10_selectbox")
@@ -96,27 +287,74 @@ quick_selected = st.selectbox("TOP10 종목명", top10["종목명"].tolist(), ke
 st.subheader(f"투자 성향({style}) 통합 점수 TOP 10")
 st.dataframe(top10[["종목명","종목코드","현재가","PER","PBR","EPS","BPS","배당률","score","신뢰등급"]])
 
-show_score_formula(style)
+st.markdown(formula_markdown(style_def))
 
+st.subheader("🔎 조건 검색 (스크리너)")
+screen_query = st.text_input(
+    "조건식 (예: PER < 10 & EPS > 0 & RSI_14 < 30 & MACD cross up)",
+    help="비교식(PER, PBR, EPS, BPS, 배당률, 거래대금, RSI_14, MACD, EMA_20, score_aggressive 등)과 "
+         "규칙명(" + ", ".join(RULE_NAMES) + ")을 &, |, ~, 괄호로 조합합니다.",
+)
+if screen_query:
+    stage("screener")
+    screener = load_screener_view(data_version(), screener_version())
+    try:
+        t0 = time.perf_counter()
+        hit_codes = screener.query_codes(screen_query)
+        elapsed_ms = (time.perf_counter() - t0) * 1e3
+    except ValueError as e:
+        st.error(f"조건식 오류: {e}")
+    else:
+        hits = base_df[base_df["종목코드"].isin(hit_codes)]
+        st.caption(f"{len(hits)}종목 일치 · {elapsed_ms:.1f} ms" + (f" · 기준일 {screener.base_date}" if screener.base_date else ""))
+        show_cols = [c for c in ["종목명", "종목코드", "현재가", "PER", "PBR", "EPS", "배당률", "RSI_14", "MACD", "EMA_20"]
+                     if c in hits.columns]
+        st.dataframe(hits[show_cols])
+
+stage("watchlist")
+# 관심종목은 사용자별로 URL 쿼리에 저장 (없으면 favorites.json 기본 목록), 백그라운드 워커가 모든 세션 목록의 합집합을 미리 준비
+if "favorites" not in st.session_state:
+    fav_param = st.query_params.get(FAVORITES_PARAM)
+    st.session_state.favorites = parse_favorites(fav_param) if fav_param is not None else load_favorites()
+    st.session_state.watch_owner = uuid.uuid4().hex
+watch_names = {c: row_lookup.at[c, "종목명"] for c in st.session_state.favorites if c in row_lookup.index}
+watch_window = data_window(365)
+watcher = get_watchlist_warmer()
+watcher.watch(watch_names, *watch_window, owner=st.session_state.watch_owner)
+st.subheader("⭐ 관심종목 비교")
+if watch_names:
+    show_watchlist(watch_names, watcher, watch_window)
+else:
+    st.caption("종목을 선택한 뒤 '관심종목 추가' 버튼으로 등록하세요.")
+
+stage("search")
 st.subheader("종목 검색")
-keyword = st.text_input("종목명을 입력하세요")
+keyword = st.text_input("종목명/종목코드/초성(예: ㅅㅅㅈㅈ)을 입력하세요")
 
 if keyword:
-    filtered = scored_df[scored_df["종목명"].str.contains(keyword, case=False, na=False)]
-    select_candidates = filtered["종목명"].tolist()
+    select_candidates = load_search_index(data_version()).search_names(keyword)
 else:
     select_candidates = [quick_selected] if quick_selected else scored_df["종목명"].tolist()
 
 if select_candidates:
     selected = st.selectbox("종목 선택", select_candidates, index=0, key="main_selectbox")
-    code = scored_df[scored_df["종목명"] == selected]["종목코드"].values[0]
+    code = load_name_index(data_version())[selected]
+    news_service.prefetch([selected])  # 차트/지표 계산 동안 뉴스 조회 진행
+    if st.button("★ 관심종목 해제" if code in watch_names else "☆ 관심종목 추가", key="favorite_toggle"):
+        st.session_state.favorites = toggle_favorite(st.session_state.favorites, code)
+        st.query_params[FAVORITES_PARAM] = format_favorites(st.session_state.favorites)
+        st.rerun()
+    # 선택 종목 평가 입력을 한 번만 구성해 화면 전체에서 공유
+    # 사용자 정의 성향 점수는 메모리에만 있으므로 화면 프레임에서
+    stock_row = load_stock_row(data_version(), code, style) if style in STYLES else None
+    ctx = build_evaluation_context(row_lookup, code, quantiles, row=stock_row)
 else:
     st.warning("해당 종목이 없습니다.")
     st.stop()
 
 st.subheader("📊 최신 재무 정보")
 try:
-    info_row = scored_df[scored_df["종목명"] == selected].iloc[0]
+    info_row = ctx.row
     cols = st.columns(6)
     cols[0].metric("PER", f"{info_row['PER']:.2f}" if pd.notna(info_row['PER']) else "-")
     cols[1].metric("PBR", f"{info_row['PBR']:.2f}" if pd.notna(info_row['PBR']) else "-")
@@ -127,21 +365,28 @@ try:
 except Exception:
     st.info("재무 데이터가 부족합니다.")
 
-start = (datetime.today() - pd.Timedelta(days=365)).strftime("%Y%m%d")
-end = datetime.today().strftime("%Y%m%d")
-df_price = stock.get_market_ohlcv_by_date(start, end, code)
+stage("price_history", code=code)
+start, end = data_window(365)
+# 관심종목은 워커가 준비한 지표 프레임 사용
+warm_frame = watcher.get(code, start, end) if code in watch_names else None
+refilling = watcher.refill(code, start, end)
+df_price = warm_frame if warm_frame is not None else load_price_frame(code, start, end, price_version(code))
 
 if df_price is None or df_price.empty:
-    st.warning("가격 데이터가 없습니다.")
+    st.warning("가격 데이터를 받는 중입니다. 잠시 후 새로고침하세요." if refilling else "가격 데이터가 없습니다.")
 else:
-    df_price = add_tech_indicators(df_price)
-    fig, fig_rsi, fig_macd = plot_price_rsi_macd(df_price)
-    fig.update_layout(height=400)
-    fig_rsi.update_layout(height=400)
-    fig_macd.update_layout(height=400)
-    st.plotly_chart(fig, use_container_width=True, key="main_chart")
-    st.plotly_chart(fig_rsi, use_container_width=True, key="rsi_chart")
-    st.plotly_chart(fig_macd, use_container_width=True, key="macd_chart")
+    stage("indicators")
+    if warm_frame is None:
+        df_price = add_tech_indicators(df_price)
+    ctx.set_price(df_price)
+    stage("chart")
+    chart_days = CHART_PERIODS[st.radio("차트 기간", list(CHART_PERIODS), index=1, horizontal=True)]
+    with span("build_chart", days=chart_days):
+        fig = load_price_chart(code, *data_window(chart_days), price_version(code))
+    if fig is not None:
+        st.plotly_chart(fig, use_container_width=True, key="main_chart")
+    if refilling or watcher.refill(code, *data_window(chart_days)):
+        st.caption("저장소에 없는 구간을 백그라운드에서 받는 중입니다. 잠시 후 새로고침하면 반영됩니다.")
 
 st.info(
     "- **종가/EMA(20):** 단기 추세 및 매매 타이밍 참고\n"
@@ -153,6 +398,7 @@ st.info(
     "- **MACD:** MACD가 Signal 하향 돌파 시 매도 신호"
 )
 
+stage("recommendation")
 st.subheader("📌 추천 매수가 / 매도가")
 required_cols = ["RSI_14", "MACD", "MACD_SIGNAL", "EMA_20"]
 st.write("추천가 관련 최근 값:", df_price[required_cols + ['종가']].tail())
@@ -162,23 +408,13 @@ if not all(col in df_price.columns for col in required_cols):
 elif df_price[required_cols].tail(3).isna().any().any():
     st.info("기술적 지표의 최근 값에 결측치가 있어 추천가 계산 불가")
 else:
-    recent = df_price.tail(5).reset_index()
-    buy_price = None
-    sell_price = None
-    buy_date = None
-    sell_date = None
-    for i in range(1, len(recent)):
-        if ((recent['RSI_14'].iloc[i] < 35 and recent['RSI_14'].iloc[i-1] < recent['RSI_14'].iloc[i]) or
-            (recent['종가'].iloc[i] < recent['EMA_20'].iloc[i])) and \
-            (recent['MACD'].iloc[i] > recent['MACD_SIGNAL'].iloc[i] and recent['MACD'].iloc[i-1] < recent['MACD_SIGNAL'].iloc[i-1]):
-            buy_price = recent['종가'].iloc[i]
-            buy_date = recent['날짜'].iloc[i] if '날짜' in recent.columns else recent.index[i]
-
-        if ((recent['RSI_14'].iloc[i] > 65 and recent['RSI_14'].iloc[i-1] > recent['RSI_14'].iloc[i]) or
-            (recent['종가'].iloc[i] > recent['EMA_20'].iloc[i])) and \
-            (recent['MACD'].iloc[i] < recent['MACD_SIGNAL'].iloc[i] and recent['MACD'].iloc[i-1] > recent['MACD_SIGNAL'].iloc[i-1]):
-            sell_price = recent['종가'].iloc[i]
-            sell_date = recent['날짜'].iloc[i] if '날짜' in recent.columns else recent.index[i]
+    # 최근 5개 봉 중 마지막 매수/매도 신호 (벡터 연산)
+    buy_idx = last_signal_index(ctx.signals["BUY_SIGNAL"])
+    sell_idx = last_signal_index(ctx.signals["SELL_SIGNAL"])
+    buy_price = df_price['종가'].iloc[buy_idx] if buy_idx is not None else None
+    sell_price = df_price['종가'].iloc[sell_idx] if sell_idx is not None else None
+    buy_date = df_price.index[buy_idx] if buy_idx is not None else None
+    sell_date = df_price.index[sell_idx] if sell_idx is not None else None
 
     c1, c2 = st.columns(2)
     with c1:
@@ -233,24 +469,24 @@ if recommended_sell:
     else:
         explanations.append(f"- 현재 매수가 대비 손실 구간입니다. 손절 또는 모니터링 전략이 필요합니다.")
 
-    if 'MACD' in df_price.columns and 'MACD_SIGNAL' in df_price.columns:
-        macd_latest = df_price['MACD'].iloc[-1]
-        signal_latest = df_price['MACD_SIGNAL'].iloc[-1]
+    if ctx.has("MACD", "MACD_SIGNAL"):
+        macd_latest = ctx.latest["MACD"]
+        signal_latest = ctx.latest["MACD_SIGNAL"]
         if macd_latest < signal_latest:
             explanations.append("- MACD가 Signal선 아래에 위치해 단기 하락 신호로 작용하고 있습니다.")
         else:
             explanations.append("- MACD가 Signal선을 상향 돌파해 단기 상승 모멘텀을 보여주고 있습니다.")
 
-    if 'RSI_14' in df_price.columns:
-        rsi_latest = df_price['RSI_14'].iloc[-1]
+    if ctx.has("RSI_14"):
+        rsi_latest = ctx.latest["RSI_14"]
         if rsi_latest > 70:
             explanations.append("- RSI가 70 이상으로 과매수 상태이며, 조정 가능성이 있습니다.")
         elif rsi_latest < 30:
             explanations.append("- RSI가 30 이하로 과매도 상태이지만, 매도 시점에서는 신중해야 합니다.")
 
-    if '거래량' in df_price.columns:
-        recent_volume = df_price['거래량'].iloc[-1]
-        avg_volume = df_price['거래량'].rolling(window=20).mean().iloc[-1]
+    if ctx.has("거래량"):
+        recent_volume = ctx.latest["거래량"]
+        avg_volume = ctx.avg_volume_20
         if recent_volume > avg_volume * 1.5:
             explanations.append("- 최근 거래량이 평균 대비 크게 증가하여 매도 압력이 강해지고 있음을 시사합니다.")
         elif recent_volume > avg_volume:
@@ -265,9 +501,10 @@ else:
     st.markdown("추천 매도가가 산출되지 않아 근거 설명을 제공할 수 없습니다.")
 
 # 종목 평가 및 투자 전략 (전문가 의견) - 상세 & 초보 친화적
+stage("evaluate")
 st.subheader("📋 종목 평가 및 투자 전략 (전문가 의견)")
 try:
-    eval_lines = evaluate_stock(scored_df, selected, df_price)
+    eval_lines = evaluate_context(ctx)
     for line in eval_lines:
         st.markdown(f"- {line}")
 except Exception:
@@ -275,28 +512,36 @@ except Exception:
     
 # 개별 갱신 버튼 및 처리
 if st.button(f"🔄 {selected} 데이터만 즉시 갱신"):
-    import sys
-    import os
-    if os.getcwd() not in sys.path:
-        sys.path.append(os.getcwd())
-
     from update_stock_database import update_single_stock
+    stage("update_single_stock", code=code)
     try:
-        update_single_stock(code)
+        if update_single_stock(code) is None:
+            raise RuntimeError(code)
         st.success(f"{selected} 데이터만 갱신 완료!")
-        st.cache_data.clear()
-        raw_df = load_filtered_data()
-        scored_df = finalize_scores(raw_df, style=style)
-        scored_df["신뢰등급"] = scored_df.apply(assess_reliability, axis=1)
+        # 전체 캐시를 지우지 않고, 바뀐 데이터 버전으로만 다시 로드
+        if style == "custom":
+            scored_df, row_lookup, quantiles = custom_style_view(data_version(), style_def)
+        else:
+            scored_df, row_lookup, quantiles = load_style_view(data_version(), style)
         top10 = scored_df.sort_values("score", ascending=False).head(10)
     except Exception:
         st.error("개별 종목 갱신 실패")
 
 # 최신 뉴스
+stage("news")
 st.subheader("최신 뉴스")
-news = fetch_google_news(selected)
+news = news_service.get(selected)
 if news:
     for n in news:
         st.markdown(f"- {n}")
 else:
     st.info("뉴스 정보 없음")
+
+trace = finish_trace()
+# 성능 디버그: 이번 실행의 단계별 소요 시간 + 누적 외부 호출 통계
+if st.sidebar.checkbox("⏱ 성능 디버그", key="trace_debug") and trace is not None:
+    st.sidebar.caption(f"전체 {trace.duration * 1e3:.1f} ms")
+    st.sidebar.dataframe(pd.DataFrame(flatten(trace)), hide_index=True)
+    calls = registry.call_summary()
+    if calls:
+        st.sidebar.dataframe(pd.DataFrame(calls).round({"avg_ms": 1}), hide_index=True)
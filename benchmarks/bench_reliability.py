@@ -0,0 +1,33 @@
+# benchmarks/bench_reliability.py
+# 실행: python -m benchmarks.bench_reliability
+
+import timeit
+
+import numpy as np
+import pandas as pd
+
+from modules.score_utils import DEFAULT_FIN, assess_reliability, grade_reliability
+
+
+def make_frame(n=2875, missing_ratio=0.2, seed=0):
+    rng = np.random.default_rng(seed)
+    data = rng.normal(size=(n, len(DEFAULT_FIN)))
+    data[rng.random(data.shape) < missing_ratio] = np.nan
+    return pd.DataFrame(data, columns=DEFAULT_FIN)
+
+
+def run(n=2875, repeat=5):
+    df = make_frame(n)
+    before = df.apply(assess_reliability, axis=1).to_numpy()
+    after = grade_reliability(df)
+    assert (before == after).all(), "row-wise / column-wise 결과 불일치"
+
+    t_apply = min(timeit.repeat(lambda: df.apply(assess_reliability, axis=1), number=1, repeat=repeat))
+    t_vector = min(timeit.repeat(lambda: grade_reliability(df), number=1, repeat=repeat))
+    return {"rows": n, "apply_ms": t_apply * 1e3, "vectorized_ms": t_vector * 1e3, "speedup": t_apply / t_vector}
+
+
+if __name__ == "__main__":
+    for n in (2875, 20000):
+        r = run(n)
+        print(f"rows={r['rows']:>6}  apply={r['apply_ms']:8.2f} ms  vectorized={r['vectorized_ms']:6.2f} ms  x{r['speedup']:.0f}")
@@ -0,0 +1,61 @@
+# benchmarks/bench_screener.py
+# 실행: python -m benchmarks.bench_screener
+
+import timeit
+
+import numpy as np
+import pandas as pd
+
+from modules.screener import Screener
+from modules.signals import SIGNAL_COLS
+
+QUERIES = [
+    "PER < 10 & EPS > 0 & RSI_14 < 30 & MACD cross up",
+    "LOW_PBR & HIGH_DIVIDEND",
+    "(golden cross | RSI_OVERSOLD) & ~LOW_LIQUIDITY",
+    "배당률 >= 3 & score_dividend > 0",
+]
+
+
+def synthetic_universe(n=2875, seed=0):
+    rng = np.random.default_rng(seed)
+    close = rng.lognormal(9, 1, n)
+    df = pd.DataFrame({
+        "종목코드": [f"{i:06d}" for i in range(n)],
+        "종목명": [f"종목{i}" for i in range(n)],
+        "현재가": close,
+        "거래량": rng.lognormal(11, 1, n),
+        "PER": rng.normal(15, 10, n),
+        "PBR": rng.lognormal(0, 0.5, n),
+        "EPS": rng.normal(500, 1000, n),
+        "BPS": rng.normal(8000, 5000, n),
+        "배당률": rng.exponential(2, n),
+        "EMA_20": close * rng.normal(1, 0.05, n),
+        "RSI_14": rng.uniform(0, 100, n),
+        "MACD": rng.normal(0, 1, n),
+        "MACD_SIGNAL": rng.normal(0, 1, n),
+        "score_dividend": rng.normal(0, 1, n),
+    })
+    df["거래대금"] = df["현재가"] * df["거래량"]
+    df["MACD_HIST"] = df["MACD"] - df["MACD_SIGNAL"]
+    for col in SIGNAL_COLS:
+        df[col] = rng.random(n) < 0.1
+    return df
+
+
+def run(n=2875, repeat=200):
+    df = synthetic_universe(n)
+    build_s = min(timeit.repeat(lambda: Screener.from_frame(df), number=1, repeat=3))
+    screener = Screener.from_frame(df)
+    results = []
+    for q in QUERIES:
+        t = min(timeit.repeat(lambda: screener.query(q), number=1, repeat=repeat))
+        results.append({"query": q, "query_ms": t * 1e3, "hits": len(screener.query(q))})
+    return {"rows": n, "build_ms": build_s * 1e3, "queries": results}
+
+
+if __name__ == "__main__":
+    r = run()
+    print(f"rows={r['rows']}  matrix build={r['build_ms']:.1f} ms")
+    for q in r["queries"]:
+        print(f"{q['query_ms']:7.3f} ms  {q['hits']:>5}  {q['query']}")
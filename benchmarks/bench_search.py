@@ -0,0 +1,36 @@
+# benchmarks/bench_search.py
+# 실행: python -m benchmarks.bench_search
+
+import timeit
+
+import pandas as pd
+
+from modules.search_index import StockSearchIndex
+
+QUERIES = ["삼성", "전자", "ㅅㅅㅈㅈ", "005930", "바이오", "sk", "카"]
+
+
+def run(path="initial_krx_list.csv", repeat=200):
+    df = pd.read_csv(path, dtype={'종목코드': str})
+    build_s = min(timeit.repeat(lambda: StockSearchIndex.from_frame(df), number=1, repeat=3))
+    index = StockSearchIndex.from_frame(df)
+    results = []
+    for q in QUERIES:
+        t_contains = min(timeit.repeat(
+            lambda: df[df["종목명"].str.contains(q, case=False, na=False)]["종목명"].tolist(),
+            number=1, repeat=repeat // 10))
+        t_index = min(timeit.repeat(lambda: index.search_names(q), number=1, repeat=repeat))
+        hits_contains = int(df["종목명"].str.contains(q, case=False, na=False).sum())
+        results.append({
+            "query": q, "contains_ms": t_contains * 1e3, "index_ms": t_index * 1e3,
+            "contains_hits": hits_contains, "index_hits": len(index.search(q, limit=len(df))),
+        })
+    return {"rows": len(df), "build_ms": build_s * 1e3, "queries": results}
+
+
+if __name__ == "__main__":
+    r = run()
+    print(f"rows={r['rows']}  index build={r['build_ms']:.1f} ms")
+    for q in r["queries"]:
+        print(f"{q['query']:>8}  str.contains={q['contains_ms']:6.3f} ms ({q['contains_hits']:>4})"
+              f"  index={q['index_ms']:6.3f} ms ({q['index_hits']:>4})")
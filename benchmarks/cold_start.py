@@ -0,0 +1,65 @@
+# benchmarks/cold_start.py
+# 새 인터프리터에서 app.py 첫 실행(콜드 스타트)과 재실행 시간을 측정
+# 실행: python -m benchmarks.cold_start --cwd <데이터가 있는 작업 디렉터리> [--repeat 3]
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 측정 대상 프로세스에서 실행할 코드 (streamlit 자체 import 시간은 따로 기록)
+PROBE = """
+import json, sys, time
+t0 = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+t1 = time.perf_counter()
+app = AppTest.from_file(sys.argv[1], default_timeout=600)
+app.run()
+t2 = time.perf_counter()
+reruns = []
+for _ in range(int(sys.argv[2])):
+    t = time.perf_counter()
+    app.run()
+    reruns.append(time.perf_counter() - t)
+# pykrx는 요청 스레드가 아니라 관심종목 워커의 저장소 보충에서 로드될 수 있음 (그 경우에도 목록에 나타남)
+heavy = [m for m in ("pykrx", "plotly", "PIL", "feedparser", "lxml") if m in sys.modules]
+print(json.dumps({
+    "streamlit_import_s": t1 - t0, "first_run_s": t2 - t1, "rerun_s": reruns,
+    "exceptions": [e.message for e in app.exception], "heavy_modules_loaded": heavy,
+}))
+"""
+
+
+def measure(cwd, repeat=3, app_path=None):
+    app_path = app_path or os.path.join(REPO_DIR, "app.py")
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [REPO_DIR, os.environ.get("PYTHONPATH")])))
+    out = subprocess.run(
+        [sys.executable, "-c", PROBE, app_path, str(repeat)],
+        cwd=cwd, env=env, capture_output=True, text=True, check=True,
+    ).stdout
+    result = json.loads(out.strip().splitlines()[-1])
+    result["rerun_median_s"] = statistics.median(result["rerun_s"]) if result["rerun_s"] else None
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="app.py 콜드 스타트/재실행 측정")
+    parser.add_argument("--cwd", default=os.getcwd(), help="filtered_stocks.csv 등이 있는 작업 디렉터리")
+    parser.add_argument("--app", default=None)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+    result = measure(args.cwd, args.repeat, args.app)
+    print(f"streamlit import  {result['streamlit_import_s'] * 1e3:10.1f} ms")
+    print(f"first run         {result['first_run_s'] * 1e3:10.1f} ms")
+    print(f"rerun (median)    {result['rerun_median_s'] * 1e3:10.1f} ms")
+    print(f"heavy modules     {', '.join(result['heavy_modules_loaded']) or '-'}")
+    for message in result["exceptions"]:
+        print(f"exception: {message}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+# benchmarks/fake_krx.py
+# pykrx.stock 대역: 합성 시장(종목 × 거래일)을 메모리에 만들고 지연/실패율을 설정해 주입
+
+import sys
+import threading
+import time
+import types
+
+import numpy as np
+import pandas as pd
+
+MARKETS = ["KOSPI", "KOSDAQ", "KOSDAQ GLOBAL"]
+
+
+class FakeMarket:
+    def __init__(self, n_tickers=2875, years=3, end=None, latency=0.0, failure_rate=0.0, seed=0):
+        rng = np.random.default_rng(seed)
+        end = pd.Timestamp(end or pd.Timestamp.today().normalize())
+        days = pd.bdate_range(end - pd.DateOffset(years=years), end)
+        # 임의 휴장일 (연 5일 정도)
+        holidays = rng.choice(len(days) - 1, size=max(1, len(days) // 50), replace=False)
+        self.days = days.delete(np.sort(holidays))
+        self.day_keys = self.days.strftime("%Y%m%d")
+        self.day_index = {d: i for i, d in enumerate(self.day_keys)}
+        # 첫 종목은 거래일 캘린더 기준 종목(005930)
+        self.codes = ["005930"] + [f"{100000 + i * 7:06d}" for i in range(1, n_tickers)]
+        self.code_index = {c: i for i, c in enumerate(self.codes)}
+        self.names = [f"합성종목{i:04d}" for i in range(n_tickers)]
+        self.markets = [MARKETS[i % len(MARKETS)] for i in range(n_tickers)]
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self._rng = np.random.default_rng(seed + 1)
+        self._lock = threading.Lock()
+        self.calls = {}
+
+        n, t = n_tickers, len(self.days)
+        start = rng.lognormal(9, 1, n)[:, None]
+        close = start * np.exp(np.cumsum(rng.normal(0, 0.02, (n, t)), axis=1))
+        self.close = np.maximum(close.round(), 1.0)
+        spread = np.abs(rng.normal(0, 0.01, (n, t)))
+        self.high = self.close * (1 + spread)
+        self.low = self.close * (1 - spread)
+        self.open = (self.high + self.low) / 2
+        self.volume = rng.lognormal(11, 1, (n, t)).round()
+        # 거래정지: 일부 종목은 일부 구간 봉 없음
+        self.halted = rng.random((n, t)) < 0.002
+        self.halted[0] = False
+        eps = rng.normal(500, 1500, n)
+        bps = np.abs(rng.normal(20000, 15000, n)) + 100
+        self.fundamental = pd.DataFrame({
+            "BPS": bps, "EPS": eps,
+            "DIV": np.where(rng.random(n) < 0.4, 0.0, rng.exponential(2.5, n)),
+            "DPS": np.abs(rng.normal(300, 200, n)),
+        }, index=pd.Index(self.codes, name="티커"))
+        # 일부 종목은 펀더멘털 결측
+        self.fundamental.loc[self.fundamental.sample(frac=0.05, random_state=seed).index, ["BPS", "EPS"]] = np.nan
+
+    def listing_frame(self):
+        return pd.DataFrame({"종목코드": self.codes, "종목명": self.names, "시장구분": self.markets})
+
+    def _tick(self, name):
+        with self._lock:
+            self.calls[name] = self.calls.get(name, 0) + 1
+            fail = self.failure_rate and self._rng.random() < self.failure_rate
+        if self.latency:
+            time.sleep(self.latency)
+        if fail:
+            raise ConnectionError(f"fake pykrx 장애: {name}")
+
+    def _range(self, fromdate, todate):
+        lo = np.searchsorted(self.day_keys, str(fromdate))
+        hi = np.searchsorted(self.day_keys, str(todate), side="right")
+        return lo, hi
+
+    def _fundamental_rows(self, rows, t):
+        f = self.fundamental.iloc[rows]
+        close = self.close[rows, t]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            per = np.where(f["EPS"] > 0, close / f["EPS"], 0.0)
+            pbr = close / f["BPS"]
+        return pd.DataFrame({
+            "BPS": f["BPS"].to_numpy(), "PER": per.round(2), "PBR": np.asarray(pbr).round(2),
+            "EPS": f["EPS"].to_numpy(), "DIV": f["DIV"].to_numpy().round(2), "DPS": f["DPS"].to_numpy(),
+        }, index=f.index)
+
+    # ---- pykrx.stock 호환 함수 ----
+
+    def get_market_ohlcv_by_date(self, fromdate, todate, ticker, *args, **kwargs):
+        self._tick("get_market_ohlcv_by_date")
+        i = self.code_index.get(str(ticker).zfill(6))
+        lo, hi = self._range(fromdate, todate)
+        if i is None or lo >= hi:
+            return pd.DataFrame()
+        keep = ~self.halted[i, lo:hi]
+        index = self.days[lo:hi][keep]
+        index.name = "날짜"
+        close = self.close[i, lo:hi][keep]
+        prev = np.concatenate([[close[0]], close[:-1]]) if len(close) else close
+        return pd.DataFrame({
+            "시가": self.open[i, lo:hi][keep], "고가": self.high[i, lo:hi][keep], "저가": self.low[i, lo:hi][keep],
+            "종가": close, "거래량": self.volume[i, lo:hi][keep], "등락률": (close / prev - 1) * 100,
+        }, index=index)
+
+    def get_market_fundamental_by_date(self, fromdate, todate, ticker, *args, **kwargs):
+        self._tick("get_market_fundamental_by_date")
+        i = self.code_index.get(str(ticker).zfill(6))
+        lo, hi = self._range(fromdate, todate)
+        if i is None or lo >= hi:
+            return pd.DataFrame()
+        frames = [self._fundamental_rows([i], t).assign(날짜=self.days[t]) for t in range(lo, hi)]
+        return pd.concat(frames).set_index("날짜")
+
+    def get_market_ohlcv_by_ticker(self, date, market="KOSPI", *args, **kwargs):
+        self._tick("get_market_ohlcv_by_ticker")
+        t = self.day_index.get(str(date))
+        if t is None:
+            return pd.DataFrame()
+        rows = np.flatnonzero(~self.halted[:, t])
+        close = self.close[rows, t]
+        prev = self.close[rows, max(t - 1, 0)]
+        return pd.DataFrame({
+            "시가": self.open[rows, t], "고가": self.high[rows, t], "저가": self.low[rows, t], "종가": close,
+            "거래량": self.volume[rows, t], "거래대금": close * self.volume[rows, t], "등락률": (close / prev - 1) * 100,
+        }, index=pd.Index([self.codes[r] for r in rows], name="티커"))
+
+    def get_market_fundamental_by_ticker(self, date, market="KOSPI", *args, **kwargs):
+        self._tick("get_market_fundamental_by_ticker")
+        t = self.day_index.get(str(date))
+        if t is None:
+            return pd.DataFrame()
+        return self._fundamental_rows(np.arange(len(self.codes)), t)
+
+    def get_market_ticker_list(self, date=None, market="KOSPI", *args, **kwargs):
+        self._tick("get_market_ticker_list")
+        return list(self.codes)
+
+    def get_market_ticker_name(self, ticker):
+        i = self.code_index.get(str(ticker).zfill(6))
+        return self.names[i] if i is not None else ""
+
+    def as_module(self):
+        module = types.ModuleType("pykrx.stock")
+        for name in dir(self):
+            if name.startswith("get_"):
+                setattr(module, name, getattr(self, name))
+        return module
+
+
+def install(market):
+    # sys.modules의 pykrx / pykrx.stock 교체 + 이미 import된 모듈의 stock 참조도 교체
+    stock_module = market.as_module()
+    package = types.ModuleType("pykrx")
+    package.stock = stock_module
+    package.__path__ = []
+    sys.modules["pykrx"] = package
+    sys.modules["pykrx.stock"] = stock_module
+    for module in list(sys.modules.values()):
+        if getattr(module, "stock", None) is not None and getattr(module.stock, "__name__", "") == "pykrx.stock":
+            module.stock = stock_module
+    return stock_module
@@ -0,0 +1,105 @@
+# benchmarks/news_stub.py
+# 뉴스 RSS 로컬 대역 서버 (ETag/Last-Modified 304 응답, 지연 설정 가능)
+# 실행: python -m benchmarks.news_stub --port 8765 --latency 0.2
+#       NEWS_BASE_URL=http://127.0.0.1:8765/rss streamlit run app.py
+
+import argparse
+import hashlib
+import threading
+import time
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+from xml.sax.saxutils import escape
+
+LAST_MODIFIED = formatdate(usegmt=True)
+
+
+def render_feed(query, items=5):
+    entries = "".join(
+        f"<item><title>{escape(query)} 관련 기사 {i + 1}</title><link>http://127.0.0.1/{i}</link></item>"
+        for i in range(items)
+    )
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?><rss version="2.0"><channel>'
+        f"<title>{escape(query)}</title>{entries}</channel></rss>"
+    ).encode("utf-8")
+
+
+def make_handler(latency=0.0, stats=None, items=10):
+    stats = stats if stats is not None else {}
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            time.sleep(latency)
+            query = parse_qs(urlparse(self.path).query).get("q", [""])[0]
+            body = render_feed(query, items)
+            etag = '"' + hashlib.md5(body).hexdigest() + '"'
+            not_modified = self.headers.get("If-None-Match") == etag or \
+                self.headers.get("If-Modified-Since") == LAST_MODIFIED
+            stats["304" if not_modified else "200"] = stats.get("304" if not_modified else "200", 0) + 1
+            self.send_response(304 if not_modified else 200)
+            self.send_header("ETag", etag)
+            self.send_header("Last-Modified", LAST_MODIFIED)
+            if not_modified:
+                self.end_headers()
+                return
+            self.send_header("Content-Type", "application/rss+xml; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+def start_server(port=0, latency=0.0, items=10):
+    # 백그라운드 스레드로 기동 -> (server, base_url, stats)
+    stats = {}
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(latency, stats, items))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/rss", stats
+
+
+def run(latency=0.2, queries=("삼성전자", "카카오", "NAVER")):
+    # 조회 지연/캐시 적중/조건부 GET 동작 확인
+    from modules.fetch_news import NewsService
+    server, base_url, stats = start_server(latency=latency)
+    try:
+        service = NewsService(base_url=base_url, ttl=0.5)
+        t0 = time.perf_counter()
+        service.prefetch(queries)
+        first = {q: service.get(q, wait=5) for q in queries}
+        cold_ms = (time.perf_counter() - t0) * 1e3
+        t0 = time.perf_counter()
+        cached = {q: service.get(q) for q in queries}
+        warm_ms = (time.perf_counter() - t0) * 1e3
+        time.sleep(0.6)
+        revalidated = {q: service.get(q, wait=5) for q in queries}
+        service.shutdown()
+        return {
+            "cold_ms": cold_ms, "warm_ms": warm_ms, "responses": dict(stats),
+            "consistent": first == cached == revalidated,
+        }
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--check", action="store_true", help="임시 포트에 서버를 띄워 캐시 동작을 확인한 뒤 종료 (--port 무시)")
+    args = parser.parse_args()
+    if args.check:
+        print(run(args.latency or 0.2))
+    else:
+        server, base_url, _ = start_server(args.port, args.latency)
+        print(f"serving {base_url}")
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            server.shutdown()
@@ -0,0 +1,205 @@
+# benchmarks/run_suite.py
+# 합성 시장 + 가짜 pykrx로 주요 경로 소요 시간을 측정해 JSON으로 기록
+# 실행: python -m benchmarks.run_suite --tickers 2875 --years 3 --out bench_results.json
+#       python -m benchmarks.run_suite --compare 이전결과.json
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.cold_start import measure as measure_cold_start
+from benchmarks.fake_krx import FakeMarket, install
+from benchmarks.news_stub import start_server
+from modules.tracing import registry
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=REPO_DIR, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+class Recorder:
+    def __init__(self, market):
+        self.market = market
+        self.results = {}
+
+    def time(self, name, fn, repeat=3, **extra):
+        runs, calls_before = [], dict(self.market.calls)
+        value = None
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            value = fn()
+            runs.append(time.perf_counter() - t0)
+        calls = {k: v - calls_before.get(k, 0) for k, v in self.market.calls.items() if v != calls_before.get(k, 0)}
+        self.results[name] = {
+            "runs_s": runs, "min_s": min(runs), "median_s": statistics.median(runs),
+            "upstream_calls": calls, **extra,
+        }
+        print(f"{name:<32} min={min(runs) * 1e3:10.1f} ms  median={statistics.median(runs) * 1e3:10.1f} ms",
+              file=sys.stderr)
+        return value
+
+
+def bench_update(rec, args):
+    from update_stock_database import update_database, update_single_stock
+
+    rec.time("update_database.cold", lambda: update_database(rate_per_sec=args.rate), repeat=1)
+    rec.time("update_database.warm", lambda: update_database(rate_per_sec=args.rate), repeat=args.repeat)
+    code = rec.market.codes[1]
+    rec.time("update_single_stock", lambda: update_single_stock(code), repeat=args.repeat)
+
+
+def bench_scoring(rec, args):
+    from modules.score_utils import (
+        DEFAULT_FIN, FACTORS, assess_reliability, custom_style, finalize_scores, grade_reliability, numeric_frame,
+        score_matrix, zscore_matrix,
+    )
+    from modules.stock_table import STOCK_TABLE_PATH, read_stock_table
+
+    rec.time("read_stock_table.csv", lambda: pd.read_csv(STOCK_TABLE_PATH, dtype={"종목코드": str, "기준일": str}),
+             repeat=args.repeat)
+    df = rec.time("read_stock_table.snapshot", read_stock_table, repeat=args.repeat)
+    for style in ["aggressive", "stable", "dividend"]:
+        rec.time(f"finalize_scores.{style}", lambda: finalize_scores(df, style), repeat=args.repeat, rows=len(df))
+    values = numeric_frame(df).to_numpy()
+    z = zscore_matrix(values)
+    custom = custom_style({f: 0.1 for f in FACTORS})
+    rec.time("score_matrix.custom_style", lambda: score_matrix(values, [custom], z), repeat=args.repeat * 10)
+    fin = df[DEFAULT_FIN].apply(lambda s: s.astype(float))
+    rec.time("assess_reliability.apply", lambda: fin.apply(assess_reliability, axis=1), repeat=args.repeat)
+    rec.time("assess_reliability.vectorized", lambda: grade_reliability(fin), repeat=args.repeat)
+    return df
+
+
+def bench_indicators(rec, args):
+    from modules.calculate_indicators import add_tech_indicators, compute_indicator_matrix
+    from modules.evaluate_stock import evaluate_stock
+    from modules.price_store import load_price_history
+    from modules.score_utils import finalize_scores
+    from modules.stock_table import read_stock_table
+
+    market = rec.market
+    start, end = market.day_keys[0], market.day_keys[-1]
+    code = market.codes[1]
+    df_price = load_price_history(code, start, end)
+    rec.time("add_tech_indicators.one_ticker", lambda: add_tech_indicators(df_price), repeat=args.repeat,
+             bars=len(df_price))
+    codes = market.codes
+    rec.time("compute_indicator_matrix.universe", lambda: compute_indicator_matrix(codes, market.close),
+             repeat=1, shape=list(market.close.shape))
+
+    scored = finalize_scores(read_stock_table(), "aggressive")
+    selected = scored["종목명"].iloc[1]
+    df_ind = add_tech_indicators(df_price)
+    rec.time("evaluate_stock", lambda: evaluate_stock(scored, selected, df_ind), repeat=args.repeat * 10)
+
+
+def bench_render(rec, args):
+    try:
+        from streamlit.testing.v1 import AppTest
+    except ImportError:
+        print("streamlit 없음: 렌더링 측정 생략", file=sys.stderr)
+        return
+    app = AppTest.from_file(os.path.join(REPO_DIR, "app.py"), default_timeout=600)
+    rec.time("app.render.cold", lambda: app.run(), repeat=1)
+    rec.time("app.render.rerun", lambda: app.run(), repeat=args.repeat)
+    if app.exception:
+        rec.results["app.render.cold"]["exceptions"] = [e.message for e in app.exception]
+    # 새 인터프리터에서의 첫 실행(모듈 import 포함)과 재실행
+    result = measure_cold_start(os.getcwd(), args.repeat)
+    rec.results["app.cold_start"] = {
+        "min_s": result["first_run_s"], "median_s": result["first_run_s"], "runs_s": [result["first_run_s"]],
+        **result,
+    }
+    print(f"{'app.cold_start':<32} first={result['first_run_s'] * 1e3:9.1f} ms  "
+          f"rerun={result['rerun_median_s'] * 1e3:9.1f} ms", file=sys.stderr)
+
+
+def compare(current, baseline_path):
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)["results"]
+    print(f"{'benchmark':<32} {'baseline':>12} {'current':>12} {'ratio':>8}")
+    for name, result in current.items():
+        if name in baseline:
+            before, after = baseline[name]["min_s"], result["min_s"]
+            ratio = after / before if before else float("nan")
+            print(f"{name:<32} {before * 1e3:10.1f}ms {after * 1e3:10.1f}ms {ratio:8.2f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="합성 시장 벤치마크")
+    parser.add_argument("--tickers", type=int, default=2875)
+    parser.add_argument("--years", type=int, default=3)
+    parser.add_argument("--latency", type=float, default=0.0, help="가짜 pykrx 호출당 지연(초)")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="가짜 pykrx 호출 실패 확률")
+    parser.add_argument("--rate", type=float, default=1000.0, help="update_database 초당 호출 한도")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--skip-app", action="store_true")
+    parser.add_argument("--out", default="bench_results.json")
+    parser.add_argument("--compare", help="비교할 이전 결과 JSON")
+    args = parser.parse_args(argv)
+    out_path = os.path.abspath(args.out)
+    compare_path = os.path.abspath(args.compare) if args.compare else None
+
+    t0 = time.perf_counter()
+    market = FakeMarket(args.tickers, args.years, latency=args.latency, failure_rate=args.failure_rate,
+                        seed=args.seed)
+    install(market)
+    setup_s = time.perf_counter() - t0
+    # 뉴스는 로컬 대역 서버로 (외부 네트워크 없이 측정)
+    news_server, news_url, _ = start_server(latency=args.latency)
+    os.environ["NEWS_BASE_URL"] = news_url
+
+    # 저장소/캐시 파일은 모두 임시 작업 디렉터리에 생성
+    workdir = tempfile.mkdtemp(prefix="bench_krx_")
+    os.chdir(workdir)
+    for path in [REPO_DIR, os.path.join(REPO_DIR, "modules")]:
+        if path not in sys.path:
+            sys.path.insert(0, path)
+    market.listing_frame().to_csv("initial_krx_list.csv", index=False, encoding="utf-8-sig")
+
+    rec = Recorder(market)
+    bench_update(rec, args)
+    bench_scoring(rec, args)
+    bench_indicators(rec, args)
+    if not args.skip_app:
+        bench_render(rec, args)
+
+    report = {
+        "meta": {
+            "commit": git_commit(), "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": sys.version.split()[0], "platform": platform.platform(), "cpu_count": os.cpu_count(),
+            "numpy": np.__version__, "workdir": workdir, "market_setup_s": setup_s,
+            "params": {k: v for k, v in vars(args).items() if k not in ("out", "compare")},
+            "sessions": len(market.days),
+        },
+        "results": rec.results,
+        "upstream_calls": registry.call_summary(),
+    }
+    with open(out_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    news_server.shutdown()
+    print(f"결과 저장: {out_path}", file=sys.stderr)
+    if compare_path:
+        compare(rec.results, compare_path)
+
+
+if __name__ == "__main__":
+    main()
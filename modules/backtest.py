@@ -0,0 +1,141 @@
+# modules/backtest.py
+# 실행: python -m modules.backtest --start 20230101 --end 20261016 --workers 8
+
+import argparse
+import glob
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from modules.calculate_indicators import add_tech_indicators
+from modules.price_store import PRICE_STORE_DIR, bars_to_frame, read_bars
+from modules.price_utils import recommended_sell_targets
+from modules.signals import signals_from_frame
+
+MAX_HOLD = 60  # 목표가/매도 신호가 없으면 60거래일 후 종가 청산
+MIN_BARS = 30
+TRADE_COLS = ["종목코드", "매수일", "매도일", "매수가", "목표가", "매도가", "청산사유", "수익률", "보유일"]
+
+
+def stored_codes(root=None):
+    return sorted(os.path.basename(p)[:-4] for p in glob.glob(os.path.join(root or PRICE_STORE_DIR, "*.bin")))
+
+
+def backtest_frame(df, max_hold=MAX_HOLD, start=None):
+    # 한 종목 일봉(종가/고가) -> 거래 목록. 진입: BUY_SIGNAL 당일 종가
+    # 청산: 고가가 추천 매도가 도달(목표가) > SELL_SIGNAL(종가) > max_hold 경과(종가), 포지션은 한 번에 하나
+    df = add_tech_indicators(df)
+    close = df["종가"].to_numpy(dtype=np.float64)
+    high = df["고가"].to_numpy(dtype=np.float64) if "고가" in df.columns else close
+    signals = signals_from_frame(df)
+    entries = np.flatnonzero(signals["BUY_SIGNAL"] & (close > 0))
+    if start is not None:
+        entries = entries[df.index[entries] >= pd.Timestamp(str(start))]
+    if not len(entries):
+        return []
+
+    targets = recommended_sell_targets(
+        close[entries], df["EMA_20"].to_numpy()[entries], df["종가"].rolling(20).max().to_numpy()[entries]
+    )
+    # 진입별 이후 max_hold개 봉을 (진입 × 보유일) 행렬로 펼쳐 첫 청산 이벤트를 찾음
+    n = len(close)
+    ahead = entries[:, None] + np.arange(1, max_hold + 1)[None, :]
+    in_range = ahead < n
+    ahead = np.minimum(ahead, n - 1)
+    hit = (high[ahead] >= targets[:, None]) & in_range
+    event = hit | (signals["SELL_SIGNAL"][ahead] & in_range)
+    has_event = event.any(axis=1)
+    first = event.argmax(axis=1)
+    rows = np.arange(len(entries))
+    timed_out = ~has_event & (entries + max_hold < n)
+    exit_idx = np.where(has_event, entries + first + 1, np.where(timed_out, entries + max_hold, n - 1))
+    reason = np.where(has_event, np.where(hit[rows, first], "목표가", "매도신호"), np.where(timed_out, "기간만료", "보유중"))
+    exit_price = np.where(has_event & hit[rows, first], targets, close[exit_idx])
+
+    trades, last_exit = [], -1
+    for k, i in enumerate(entries):
+        # 보유 중 발생한 매수 신호는 건너뜀
+        if i <= last_exit:
+            continue
+        last_exit = exit_idx[k]
+        trades.append((
+            df.index[i], df.index[exit_idx[k]], close[i], targets[k], exit_price[k], reason[k],
+            exit_price[k] / close[i] - 1, int(exit_idx[k] - i),
+        ))
+    return trades
+
+
+def _run_chunk(codes, start, end, max_hold, root):
+    # 프로세스 풀 작업 단위: 저장소에서 읽어 종목별 거래를 모아 반환
+    out = []
+    for code in codes:
+        bars = read_bars(code, None, end, root)
+        if len(bars) < MIN_BARS:
+            continue
+        for trade in backtest_frame(bars_to_frame(np.array(bars)), max_hold, start):
+            out.append((code,) + trade)
+    return out
+
+
+def run_backtest(codes=None, start=None, end=None, max_hold=MAX_HOLD, workers=None, chunk_size=64, root=None):
+    codes = stored_codes(root) if codes is None else [str(c).zfill(6) for c in codes]
+    chunks = [codes[i:i + chunk_size] for i in range(0, len(codes), chunk_size)]
+    workers = workers or os.cpu_count() or 1
+    records = []
+    if workers == 1:
+        for chunk in chunks:
+            records.extend(_run_chunk(chunk, start, end, max_hold, root))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for result in pool.map(_run_chunk, chunks, *([x] * len(chunks) for x in (start, end, max_hold, root))):
+                records.extend(result)
+    return pd.DataFrame.from_records(records, columns=TRADE_COLS)
+
+
+def summarize(trades):
+    closed = trades[trades["청산사유"] != "보유중"]
+    if closed.empty:
+        return {"거래수": 0, "종목수": int(trades["종목코드"].nunique()), "보유중": len(trades)}
+    returns = closed["수익률"]
+    return {
+        "거래수": len(closed),
+        "종목수": int(closed["종목코드"].nunique()),
+        "보유중": int((trades["청산사유"] == "보유중").sum()),
+        "목표가 도달률": float((closed["청산사유"] == "목표가").mean()),
+        "승률": float((returns > 0).mean()),
+        "평균수익률": float(returns.mean()),
+        "중앙수익률": float(returns.median()),
+        "수익률 표준편차": float(returns.std(ddof=0)),
+        "평균보유일": float(closed["보유일"].mean()),
+        "중앙보유일": float(closed["보유일"].median()),
+        "최대보유일": int(closed["보유일"].max()),
+        "청산사유": {str(k): int(v) for k, v in closed["청산사유"].value_counts().items()},
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="추천 매수/매도 규칙 백테스트 (로컬 가격 저장소)")
+    parser.add_argument("--start", help="진입 시작일 yyyymmdd")
+    parser.add_argument("--end", help="종료일 yyyymmdd")
+    parser.add_argument("--codes", nargs="*", help="종목코드 (기본: 저장소 전 종목)")
+    parser.add_argument("--max-hold", type=int, default=MAX_HOLD)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--out", help="거래 목록 CSV 경로")
+    args = parser.parse_args(argv)
+
+    t0 = time.perf_counter()
+    trades = run_backtest(args.codes, args.start, args.end, args.max_hold, args.workers)
+    elapsed = time.perf_counter() - t0
+    for key, value in summarize(trades).items():
+        print(f"{key}: {value:.4f}" if isinstance(value, float) else f"{key}: {value}")
+    print(f"소요 시간: {elapsed:.1f}초", file=sys.stderr)
+    if args.out:
+        trades.to_csv(args.out, index=False, encoding="utf-8-sig")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,21 @@
+import os
+
+import numpy as np
 import pandas as pd
 
+from modules.price_store import PRICE_STORE_DIR
+from modules.signals import SIGNAL_WINDOW, compute_signals, recent_signal_flags
+
+RSI_WINDOW = 14
+INDICATOR_COLS = ["EMA_20", "RSI_14", "MACD", "MACD_SIGNAL", "MACD_HIST"]
+INDICATOR_STATE_PATH = os.path.join(PRICE_STORE_DIR, "_indicator_state.npz")
+# 신호 판정용으로 종목별 최근 봉의 종가/지표를 함께 보관
+HISTORY_COLS = ["종가"] + INDICATOR_COLS
+HISTORY_LEN = SIGNAL_WINDOW
+
+
 def add_tech_indicators(df):
+    df = df.copy()
     df['EMA_20'] = df['종가'].ewm(span=20, adjust=False).mean()
     delta = df['종가'].diff()
     up = delta.clip(lower=0)
@@ -15,3 +30,136 @@ def add_tech_indicators(df):
     df['MACD_SIGNAL'] = df['MACD'].ewm(span=9, adjust=False).mean()
     df['MACD_HIST'] = df['MACD'] - df['MACD_SIGNAL']
     return df
+
+
+# ---- 재귀 상태 기반 엔진 (종목 × 지표 상태를 배열로 보관) ----
+
+def _alpha(span):
+    return 2.0 / (span + 1.0)
+
+
+def new_indicator_state(codes, last_date=None):
+    n = len(codes)
+    nan = lambda: np.full(n, np.nan)
+    return {
+        "codes": np.asarray(codes, dtype=str),
+        "last_date": last_date or "",
+        "last_close": nan(),
+        "ema12": nan(),
+        "ema20": nan(),
+        "ema26": nan(),
+        "signal": nan(),
+        # RSI 롤링 윈도우: 종목별 링버퍼와 누적합/개수
+        "ring_up": np.full((n, RSI_WINDOW), np.nan),
+        "ring_down": np.full((n, RSI_WINDOW), np.nan),
+        "pos": np.zeros(n, dtype=np.int64),
+        "sum_up": np.zeros(n),
+        "sum_down": np.zeros(n),
+        "cnt": np.zeros(n),
+        **{f"hist_{col}": np.full((n, HISTORY_LEN), np.nan) for col in HISTORY_COLS},
+    }
+
+
+def _ema_step(prev, x, valid, span):
+    updated = np.where(np.isnan(prev), x, prev + _alpha(span) * (x - prev))
+    return np.where(valid, updated, prev)
+
+
+def state_latest(state):
+    ma_up = np.where(state["cnt"] > 0, state["sum_up"] / np.maximum(state["cnt"], 1), np.nan)
+    ma_down = np.where(state["cnt"] > 0, state["sum_down"] / np.maximum(state["cnt"], 1), np.nan)
+    rsi = 100 - (100 / (1 + ma_up / (ma_down + 1e-6)))
+    macd = state["ema12"] - state["ema26"]
+    return {
+        "EMA_20": state["ema20"],
+        "RSI_14": rsi,
+        "MACD": macd,
+        "MACD_SIGNAL": state["signal"],
+        "MACD_HIST": macd - state["signal"],
+    }
+
+
+def step_indicator_state(state, close, date=None):
+    # 새 봉 하나(종목별 종가 배열, 결측=거래 없음)를 반영: 종목당 O(1)
+    close = np.asarray(close, dtype=np.float64)
+    valid = ~np.isnan(close)
+    rows = np.flatnonzero(valid)
+
+    delta = np.where(valid, close - state["last_close"], np.nan)
+    up = np.clip(delta, 0, None)
+    down = -np.clip(delta, None, 0)
+    pos = state["pos"][rows]
+    # pandas rolling(min_periods=1)과 같게 첫 봉의 결측 delta도 윈도우 한 칸을 차지
+    new_up, new_down = up[rows], down[rows]
+    old_up, old_down = state["ring_up"][rows, pos], state["ring_down"][rows, pos]
+    state["sum_up"][rows] += np.nan_to_num(new_up) - np.nan_to_num(old_up)
+    state["sum_down"][rows] += np.nan_to_num(new_down) - np.nan_to_num(old_down)
+    state["cnt"][rows] += (~np.isnan(new_up)).astype(float) - (~np.isnan(old_up)).astype(float)
+    state["ring_up"][rows, pos] = new_up
+    state["ring_down"][rows, pos] = new_down
+    state["pos"][rows] = (pos + 1) % RSI_WINDOW
+
+    state["ema12"] = _ema_step(state["ema12"], close, valid, 12)
+    state["ema20"] = _ema_step(state["ema20"], close, valid, 20)
+    state["ema26"] = _ema_step(state["ema26"], close, valid, 26)
+    state["signal"] = _ema_step(state["signal"], state["ema12"] - state["ema26"], valid, 9)
+    state["last_close"] = np.where(valid, close, state["last_close"])
+    if date is not None:
+        state["last_date"] = str(date)
+    latest = state_latest(state)
+    for col in HISTORY_COLS:
+        hist = state[f"hist_{col}"]
+        hist[rows, :-1] = hist[rows, 1:]
+        hist[rows, -1] = (close if col == "종가" else latest[col])[rows]
+    return latest
+
+
+def compute_indicator_matrix(codes, close_matrix, dates=None):
+    # 전 종목 일괄 계산: close_matrix (종목 × 일자), 결측은 해당 종목 거래 없음
+    close_matrix = np.asarray(close_matrix, dtype=np.float64)
+    n, t = close_matrix.shape
+    state = new_indicator_state(codes)
+    out = {col: np.full((n, t), np.nan) for col in INDICATOR_COLS}
+    for j in range(t):
+        latest = step_indicator_state(state, close_matrix[:, j], dates[j] if dates is not None else None)
+        valid = ~np.isnan(close_matrix[:, j])
+        for col in INDICATOR_COLS:
+            out[col][:, j] = np.where(valid, latest[col], np.nan)
+    return out, state
+
+
+def slice_indicator_state(state, idx):
+    return {k: (v[idx] if isinstance(v, np.ndarray) else v) for k, v in state.items()}
+
+
+def latest_indicator_frame(state):
+    latest = state_latest(state)
+    return pd.DataFrame(latest, index=pd.Index(state["codes"], name="종목코드"))
+
+
+def is_compatible_state(state):
+    # 이전 버전 상태 파일(키 누락)은 재계산 대상
+    return state is not None and set(new_indicator_state([])) <= set(state)
+
+
+def latest_signal_frame(state):
+    # 보관 중인 최근 봉으로 종목별 최근 신호 발생 여부
+    signals = compute_signals(*(state[f"hist_{col}"] for col in ["종가", "EMA_20", "RSI_14", "MACD", "MACD_SIGNAL"]))
+    return pd.DataFrame(recent_signal_flags(signals), index=pd.Index(state["codes"], name="종목코드"))
+
+
+def save_indicator_state(state, path=INDICATOR_STATE_PATH):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.tmp.npz"
+    np.savez(tmp_path, **{k: np.asarray(v) for k, v in state.items()})
+    os.replace(tmp_path, path)
+
+
+def load_indicator_state(path=INDICATOR_STATE_PATH):
+    try:
+        with np.load(path) as data:
+            state = {k: data[k] for k in data.files}
+        state["last_date"] = str(state["last_date"])
+        return state
+    except Exception:
+        return None
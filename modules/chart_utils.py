@@ -1,21 +1,73 @@
+import numpy as np
 import plotly.graph_objs as go
+from plotly.subplots import make_subplots
 
-def plot_price_rsi_macd(df):
-    fig = go.Figure()
-    fig.add_trace(go.Scatter(x=df.index, y=df['종가'], name='종가'))
-    fig.add_trace(go.Scatter(x=df.index, y=df['EMA_20'], name='EMA(20)', line=dict(dash='dash')))
-    fig.update_layout(title="가격 및 EMA(20)", yaxis_title="가격")
+MAX_CHART_POINTS = 800  # 패널별 트레이스당 최대 점 개수
+
+def lttb_indices(y, threshold):
+    # LTTB 방식 다운샘플링: 버킷마다 (이전 버킷 평균, 점, 다음 버킷 평균) 삼각형 넓이가 최대인 점 선택
+    # 이전 버킷의 선택점 대신 평균을 기준으로 삼아 버킷 간 의존 없이 한 번에 계산
+    y = np.asarray(y, dtype=np.float64)
+    n = len(y)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    m = threshold - 2
+    x = np.arange(n, dtype=np.float64)
+    inner = np.arange(1, n - 1)
+    bucket = (inner - 1) * m // (n - 2)
+    valid = ~np.isnan(y[inner])
+    counts = np.bincount(bucket[valid], minlength=m)
+    sum_x = np.bincount(bucket[valid], weights=x[inner][valid], minlength=m)
+    sum_y = np.bincount(bucket[valid], weights=y[inner][valid], minlength=m)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean_x, mean_y = sum_x / counts, sum_y / counts
+    prev_x = np.concatenate([[x[0]], mean_x[:-1]])
+    prev_y = np.concatenate([[y[0]], mean_y[:-1]])
+    next_x = np.concatenate([mean_x[1:], [x[-1]]])
+    next_y = np.concatenate([mean_y[1:], [y[-1]]])
+    ax, ay, cx, cy = prev_x[bucket], prev_y[bucket], next_x[bucket], next_y[bucket]
+    area = np.abs((ax - cx) * (y[inner] - ay) - (ax - x[inner]) * (cy - ay))
+    area = np.nan_to_num(area, nan=-1.0)
+    # 버킷별 넓이 최대 점 (버킷은 연속 구간)
+    order = np.lexsort((-area, bucket))
+    _, first = np.unique(bucket[order], return_index=True)
+    return np.concatenate([[0], inner[order[first]], [n - 1]])
 
-    fig_rsi = go.Figure()
-    fig_rsi.add_trace(go.Scatter(x=df.index, y=df['RSI_14'], name='RSI(14)'))
-    fig_rsi.add_hline(y=70, line_dash="dash", line_color="red")
-    fig_rsi.add_hline(y=30, line_dash="dash", line_color="blue")
-    fig_rsi.update_layout(title="RSI(14)", yaxis=dict(range=[0, 100]))
+def _gl_trace(df, col, name, max_points, **kwargs):
+    idx = lttb_indices(df[col].to_numpy(), max_points)
+    return go.Scattergl(x=df.index[idx], y=df[col].to_numpy()[idx], name=name, mode="lines", **kwargs)
 
-    fig_macd = go.Figure()
-    fig_macd.add_trace(go.Scatter(x=df.index, y=df['MACD'], name='MACD'))
-    fig_macd.add_trace(go.Scatter(x=df.index, y=df['MACD_SIGNAL'], name='Signal'))
-    fig_macd.add_hline(y=0, line_dash="dash", line_color="black")
-    fig_macd.update_layout(title="MACD & Signal")
+def plot_price_panels(df, start=None, end=None, max_points=MAX_CHART_POINTS):
+    # 가격/RSI/MACD를 x축 공유 3단 한 장으로, WebGL 트레이스 + 표시 구간 다운샘플링
+    # 다운샘플링은 생성 시 1회: 확대해도 다시 샘플링하지 않음 (MAX_CHART_POINTS를 넘는 5년 구간만 해당)
+    df = df.loc[start:end]
+    fig = make_subplots(
+        rows=3, cols=1, shared_xaxes=True, vertical_spacing=0.04, row_heights=[0.5, 0.25, 0.25],
+        subplot_titles=("가격 및 EMA(20)", "RSI(14)", "MACD & Signal"),
+    )
+    fig.add_trace(_gl_trace(df, '종가', '종가', max_points), row=1, col=1)
+    fig.add_trace(_gl_trace(df, 'EMA_20', 'EMA(20)', max_points, line=dict(dash='dash')), row=1, col=1)
+    fig.add_trace(_gl_trace(df, 'RSI_14', 'RSI(14)', max_points), row=2, col=1)
+    fig.add_trace(_gl_trace(df, 'MACD', 'MACD', max_points), row=3, col=1)
+    fig.add_trace(_gl_trace(df, 'MACD_SIGNAL', 'Signal', max_points), row=3, col=1)
+    fig.add_hline(y=70, line_dash="dash", line_color="red", row=2, col=1)
+    fig.add_hline(y=30, line_dash="dash", line_color="blue", row=2, col=1)
+    fig.add_hline(y=0, line_dash="dash", line_color="black", row=3, col=1)
+    fig.update_yaxes(title_text="가격", row=1, col=1)
+    fig.update_yaxes(range=[0, 100], row=2, col=1)
+    fig.update_layout(height=900, hovermode="x unified", margin=dict(t=40, b=20))
+    return fig
 
-    return fig, fig_rsi, fig_macd
+def plot_comparison(frames, max_points=MAX_CHART_POINTS):
+    # 관심종목 비교: 종목별 종가를 구간 첫 값 = 100으로 환산해 한 장에 겹쳐 그림
+    fig = go.Figure()
+    for label, df in frames.items():
+        close = df['종가'].dropna()
+        if close.empty:
+            continue
+        rebased = (close / close.iloc[0] * 100).to_frame('기준화')
+        fig.add_trace(_gl_trace(rebased, '기준화', label, max_points))
+    fig.add_hline(y=100, line_dash="dash", line_color="gray")
+    fig.update_yaxes(title_text="구간 시작 = 100")
+    fig.update_layout(height=450, hovermode="x unified", margin=dict(t=30, b=20))
+    return fig
@@ -1,11 +1,60 @@
 import numpy as np
-import streamlit as st
 
-def evaluate_stock_extended_1(scored_df, selected, df_price):
+from modules.signals import recent_signal_flags, signals_from_frame
+
+LATEST_COLS = ["종가", "거래량", "EMA_20", "RSI_14", "MACD", "MACD_SIGNAL", "MACD_HIST"]
+
+
+def score_quantiles(scored_df):
+    # 유니버스 점수 분위수: 데이터 버전/성향당 1회 계산
+    return scored_df["score"].quantile(0.2), scored_df["score"].quantile(0.8)
+
+
+class EvaluationContext:
+    # 선택 종목 1건에 대한 평가 입력을 한 번에 모아 둔 객체
+    def __init__(self, row, quantiles, df_price=None):
+        self.row = row
+        self.q20, self.q80 = quantiles
+        self.set_price(df_price)
+
+    def set_price(self, df_price):
+        self.df_price = df_price
+        self.latest = {}
+        self.prev_close = None
+        self.avg_volume_20 = np.nan
+        self.signals = {}
+        if df_price is None or df_price.empty:
+            return
+        last = df_price.iloc[-1]
+        self.latest = {col: last[col] for col in LATEST_COLS if col in df_price.columns}
+        if "종가" in df_price.columns and len(df_price) >= 2:
+            self.prev_close = df_price["종가"].iloc[-2]
+        if "거래량" in df_price.columns:
+            # rolling(20).mean().iloc[-1] 과 동일 (20개 미만이면 NaN)
+            tail = df_price["거래량"].iloc[-20:]
+            self.avg_volume_20 = tail.mean() if len(tail) == 20 and tail.notna().all() else np.nan
+        if all(col in df_price.columns for col in ["종가", "EMA_20", "RSI_14", "MACD", "MACD_SIGNAL"]):
+            # 일자별 신호 배열 (추천가 계산과 최근 신호 평가가 공유)
+            self.signals = signals_from_frame(df_price)
+
+    def value(self, col):
+        return self.row[col] if col in self.row.index else None
+
+    def has(self, *cols):
+        return all(col in self.latest for col in cols)
+
+
+def build_evaluation_context(row_lookup, code, quantiles, df_price=None, row=None):
+    # row_lookup: 종목코드 인덱스 프레임 (데이터 버전당 1회 생성), row를 주면(sqlite 기본키 조회) 그대로 사용
+    return EvaluationContext(row if row is not None else row_lookup.loc[code], quantiles, df_price)
+
+
+def evaluate_context(ctx):
     eval_lines = []
+    latest = ctx.latest
 
     # 1. PER 평가
-    per = scored_df.loc[scored_df["종목명"] == selected, "PER"].values[0]
+    per = ctx.value("PER")
     if per is not None and not np.isnan(per):
         if per < 7:
             eval_lines.append(
@@ -18,7 +67,7 @@ def evaluate_stock_extended_1(scored_df, selected, df_price):
             )
 
     # 2. PBR 평가
-    pbr = scored_df.loc[scored_df["종목명"] == selected, "PBR"].values[0]
+    pbr = ctx.value("PBR")
     if pbr is not None and not np.isnan(pbr):
         if pbr < 1:
             eval_lines.append(
@@ -31,7 +80,7 @@ def evaluate_stock_extended_1(scored_df, selected, df_price):
             )
 
     # 3. 배당률 평가
-    div = scored_df.loc[scored_df["종목명"] == selected, "배당률"].values[0]
+    div = ctx.value("배당률")
     if div is not None and not np.isnan(div):
         if div >= 3:
             eval_lines.append(
@@ -43,7 +92,7 @@ def evaluate_stock_extended_1(scored_df, selected, df_price):
             )
 
     # 4. EPS 상태 평가
-    eps = scored_df.loc[scored_df["종목명"] == selected, "EPS"].values[0]
+    eps = ctx.value("EPS")
     if eps is not None and not np.isnan(eps):
         if eps > 0:
             eval_lines.append(
@@ -55,7 +104,7 @@ def evaluate_stock_extended_1(scored_df, selected, df_price):
             )
 
     # 5. BPS 상태 평가
-    bps = scored_df.loc[scored_df["종목명"] == selected, "BPS"].values[0]
+    bps = ctx.value("BPS")
     if bps is not None and not np.isnan(bps):
         if bps > 0:
             eval_lines.append(
@@ -67,8 +116,8 @@ def evaluate_stock_extended_1(scored_df, selected, df_price):
             )
 
     # 6. RSI 상태 평가
-    if "RSI_14" in df_price.columns and not np.isnan(df_price['RSI_14'].iloc[-1]):
-        rsi_now = df_price['RSI_14'].iloc[-1]
+    if ctx.has("RSI_14") and not np.isnan(latest["RSI_14"]):
+        rsi_now = latest["RSI_14"]
         if rsi_now < 30:
             eval_lines.append(
                 "📉 [RSI] 30 이하 과매도 구간으로 기술적 반등 가능성 있으나 펀더멘털 확인 필요."
@@ -79,9 +128,9 @@ def evaluate_stock_extended_1(scored_df, selected, df_price):
             )
 
     # 7. MACD와 Signal선 위치 평가
-    if 'MACD' in df_price.columns and 'MACD_SIGNAL' in df_price.columns:
-        macd_latest = df_price['MACD'].iloc[-1]
-        signal_latest = df_price['MACD_SIGNAL'].iloc[-1]
+    if ctx.has("MACD", "MACD_SIGNAL"):
+        macd_latest = latest["MACD"]
+        signal_latest = latest["MACD_SIGNAL"]
         if macd_latest < signal_latest:
             eval_lines.append(
                 "📉 [MACD] MACD가 Signal선 아래로 단기 하락 신호입니다."
@@ -92,9 +141,9 @@ def evaluate_stock_extended_1(scored_df, selected, df_price):
             )
 
     # 8. EMA-20 대비 종가 상태
-    if "EMA_20" in df_price.columns and "종가" in df_price.columns:
-        ema_20 = df_price["EMA_20"].iloc[-1]
-        close = df_price["종가"].iloc[-1]
+    if ctx.has("EMA_20", "종가"):
+        ema_20 = latest["EMA_20"]
+        close = latest["종가"]
         if close > ema_20:
             eval_lines.append(
                 "📈 [EMA-20] 주가가 EMA-20 위에 있어 단기 상승추세입니다."
@@ -105,7 +154,7 @@ def evaluate_stock_extended_1(scored_df, selected, df_price):
             )
 
     # 9. 거래대금 및 유동성 평가
-    trading_value = scored_df.loc[scored_df["종목명"] == selected, "거래대금"].values[0]
+    trading_value = ctx.value("거래대금")
     if trading_value is not None and not np.isnan(trading_value):
         if trading_value < 1e7:
             eval_lines.append(
@@ -113,9 +162,9 @@ def evaluate_stock_extended_1(scored_df, selected, df_price):
             )
 
     # 10. 거래량 변화 관찰
-    if '거래량' in df_price.columns:
-        recent_volume = df_price['거래량'].iloc[-1]
-        avg_volume = df_price['거래량'].rolling(window=20).mean().iloc[-1]
+    if ctx.has("거래량"):
+        recent_volume = latest["거래량"]
+        avg_volume = ctx.avg_volume_20
         if recent_volume > avg_volume * 1.5:
             eval_lines.append(
                 "📊 [거래량] 거래량 급증으로 변동성 확대 가능성 있어 주의하세요."
@@ -126,9 +175,9 @@ def evaluate_stock_extended_1(scored_df, selected, df_price):
             )
 
     # 11. 복합 투자 매력도 평가
-    score = scored_df.loc[scored_df["종목명"] == selected, "score"].values[0]
-    q80 = scored_df["score"].quantile(0.8)
-    q20 = scored_df["score"].quantile(0.2)
+    score = ctx.value("score")
+    q80 = ctx.q80
+    q20 = ctx.q20
     if score > q80:
         eval_lines.append(
             "✅ [종합 진단] 투자 매력도가 매우 높아 분할 매수 및 장기투자 추천 종목입니다."
@@ -155,40 +204,52 @@ def evaluate_stock_extended_1(scored_df, selected, df_price):
             eval_lines.append("📌 [위험 신호] 고PER·적자 조합으로 투자 신중 권장.")
 
     # 14. 거래량 및 주가 상승률 복합 분석
-    if '거래량' in df_price.columns and "종가" in df_price.columns:
-        recent_volume = df_price['거래량'].iloc[-1]
-        avg_volume = df_price['거래량'].rolling(window=20).mean().iloc[-1]
-        price_now = df_price['종가'].iloc[-1]
-        price_prev = df_price['종가'].iloc[-2]
+    if ctx.has("거래량", "종가"):
+        recent_volume = latest["거래량"]
+        avg_volume = ctx.avg_volume_20
+        price_now = latest["종가"]
+        price_prev = ctx.prev_close
         if recent_volume > avg_volume * 1.5 and price_now > price_prev:
             eval_lines.append("📌 [모멘텀] 거래량 증가와 주가 상승 동반, 긍정 신호입니다.")
         elif recent_volume > avg_volume * 1.5 and price_now <= price_prev:
             eval_lines.append("📌 [주의] 거래량 급증에도 주가 하락, 변동성 위험 존재.")
 
     # 15. RSI + MACD 히스토그램 단기 모멘텀 판단
-    if "RSI_14" in df_price.columns and 'MACD_HIST' in df_price.columns:
-        rsi = df_price['RSI_14'].iloc[-1]
-        macd_hist = df_price['MACD_HIST'].iloc[-1]
+    if ctx.has("RSI_14", "MACD_HIST"):
+        rsi = latest["RSI_14"]
+        macd_hist = latest["MACD_HIST"]
         if rsi < 30 and macd_hist > 0:
             eval_lines.append("📌 [반등 가능성] RSI 과매도 + MACD 양호, 반등 기대.")
         elif rsi > 70 and macd_hist < 0:
             eval_lines.append("📌 [조정 가능성] RSI 과매수 + MACD 하락, 단기 조정 유의.")
 
     # 16. 고배당 + 안정적 재무구조 투자 조언
-    debt_ratio = scored_df.loc[scored_df["종목명"] == selected, "부채비율"].values[0] if "부채비율" in scored_df.columns else None
+    debt_ratio = ctx.value("부채비율")
     if div is not None and div >= 4 and debt_ratio is not None and debt_ratio < 40:
         eval_lines.append("📌 [고배당 안정] 배당률 높고 부채비율 낮아 안정적 배당 성장주입니다.")
 
     # 17. EMA-20 하락 + 거래량 감소 단기 조정 경계
-    if "EMA_20" in df_price.columns and '거래량' in df_price.columns:
-        ema20 = df_price["EMA_20"].iloc[-1]
-        close = df_price["종가"].iloc[-1]
-        avg_vol = df_price['거래량'].rolling(window=20).mean().iloc[-1]
-        recent_vol = df_price['거래량'].iloc[-1]
+    if ctx.has("EMA_20", "거래량"):
+        ema20 = latest["EMA_20"]
+        close = latest["종가"]
+        avg_vol = ctx.avg_volume_20
+        recent_vol = latest["거래량"]
         if close < ema20 and recent_vol < avg_vol * 0.5:
             eval_lines.append("📌 [조정 신호] 주가 EMA-20 아래 및 거래량 감소, 추가 하락 가능성 주의.")
 
+    # 18. 최근 5거래일 내 EMA-20 돌파/이탈 및 MACD 교차
+    if ctx.signals:
+        flags = recent_signal_flags(ctx.signals)
+        if flags["GOLDEN_CROSS"] and flags["MACD_CROSS_UP"]:
+            eval_lines.append("✔️ [교차 신호] 최근 EMA-20 상향 돌파와 MACD 골든크로스가 함께 발생해 추세 전환 가능성이 있습니다.")
+        elif flags["DEAD_CROSS"] and flags["MACD_CROSS_DOWN"]:
+            eval_lines.append("⚠️ [교차 신호] 최근 EMA-20 하향 이탈과 MACD 데드크로스가 함께 발생해 하락 전환에 유의하세요.")
+
     return eval_lines
 
+def evaluate_stock_extended_1(scored_df, selected, df_price):
+    row = scored_df.loc[scored_df["종목명"] == selected].iloc[0]
+    return evaluate_context(EvaluationContext(row, score_quantiles(scored_df), df_price))
+
 def evaluate_stock(scored_df, selected, df_price):
     return evaluate_stock_extended_1(scored_df, selected, df_price)
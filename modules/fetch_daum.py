@@ -1,65 +1,247 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
 import pandas as pd
 import requests
+from requests.adapters import HTTPAdapter
 
-def get_daum_price(code):
-    url = f"https://finance.daum.net/quotes/A{code}#chart"
-    headers = {"User-Agent": "Mozilla/5.0", "referer": url}
-    dfs = []
-    for page in range(1, 5):
-        api_url = f"https://finance.daum.net/api/quotes/A{code}/days?symbolCode=A{code}&page={page}&perPage=20&fieldName=closePrice&order=desc"
-        res = requests.get(api_url, headers=headers)
-        if res.status_code != 200:
-            continue
-        try:
-            data = res.json().get("data", [])
-        except Exception:
-            continue
-        if not data:
-            continue
-        df = pd.DataFrame(data)
-        if not df.empty and {"date", "closePrice", "openPrice", "highPrice", "lowPrice", "tradeVolume"} <= set(df.columns):
-            df = df.rename(columns={
-                "date": "Date", "closePrice": "Close", "openPrice": "Open",
-                "highPrice": "High", "lowPrice": "Low", "tradeVolume": "Volume"
-            })
-            dfs.append(df[["Date", "Close", "Open", "High", "Low", "Volume"]])
+from modules.tracing import observe_call
+
+DAUM_BASE_URL = "https://finance.daum.net"
+DAUM_TIMEOUT = (3.0, 5.0)  # (연결, 읽기) 초
+PRICE_PAGES = 4
+PER_PAGE = 20
+PRICE_COLS = {
+    "date": "Date", "closePrice": "Close", "openPrice": "Open",
+    "highPrice": "High", "lowPrice": "Low", "tradeVolume": "Volume",
+}
+FIN_LABELS = [("PER", "per"), ("PBR", "pbr"), ("ROE", "roe"), ("배당수익률", "dividend")]
+
+
+def pooled_session(pool_size=16):
+    # keep-alive 연결을 재사용하는 세션
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update({"User-Agent": "Mozilla/5.0"})
+    return session
+
+
+def parse_price_pages(pages):
+    dfs = [pd.DataFrame(data) for data in pages if data]
+    dfs = [df for df in dfs if not df.empty and set(PRICE_COLS) <= set(df.columns)]
     if not dfs:
         return pd.DataFrame()
-    df = pd.concat(dfs)
+    df = pd.concat(dfs).rename(columns=PRICE_COLS)[list(PRICE_COLS.values())]
     df["Date"] = pd.to_datetime(df["Date"], errors="coerce")
     for col in ["Close", "Open", "High", "Low", "Volume"]:
         df[col] = pd.to_numeric(df[col], errors="coerce")
-    df = df.sort_values("Date").reset_index(drop=True)
-    df = df.dropna()
-    return df
+    return df.sort_values("Date").reset_index(drop=True).dropna()
 
-def get_daum_financials(code):
-    try:
-        url = f"https://finance.daum.net/quotes/A{code}"
-        headers = {"User-Agent": "Mozilla/5.0", "referer": url}
-        res = requests.get(url, headers=headers)
-        if res.status_code != 200:
+
+def parse_financials(content):
+    # 종목 페이지의 .list_info 항목에서 PER/PBR/ROE/배당수익률만 추출
+    import lxml.html
+    root = lxml.html.fromstring(content, parser=lxml.html.HTMLParser(encoding="utf-8"))
+    values = dict.fromkeys(key for _, key in FIN_LABELS)
+    has_class = lambda name: f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+    for item in root.xpath(f"//*[{has_class('list_info')}]//li"):
+        label = item.xpath(f".//*[{has_class('label')}]")
+        value = item.xpath(f".//*[{has_class('emph')}]")
+        if not label or not value:
+            continue
+        txt = label[0].text_content().strip()
+        val = value[0].text_content().strip().replace(",", "").replace("%", "").replace("배", "")
+        for marker, key in FIN_LABELS:
+            if marker in txt and not values[key]:
+                values[key] = val
+                break
+    return tuple(values[key] for _, key in FIN_LABELS)
+
+
+def _is_empty(result):
+    if isinstance(result, pd.DataFrame):
+        return result.empty
+    return result is None or all(v is None for v in result)
+
+
+class DaumClient:
+    # 세션 재사용 + 페이지 동시 조회(빈 페이지에서 중단) + 종목/일자별 결과 캐시
+    def __init__(self, session=None, max_workers=4, timeout=DAUM_TIMEOUT, pages=PRICE_PAGES, per_page=PER_PAGE):
+        self.session = session or pooled_session(max_workers * 2)
+        self.timeout = timeout
+        self.pages = pages
+        self.per_page = per_page
+        self.max_workers = max_workers
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="daum")
+        self._cache = {}
+        self._lock = threading.Lock()
+
+    def _get(self, url, params=None, referer=None):
+        headers = {"referer": referer} if referer else None
+        start = time.perf_counter()
+        try:
+            res = self.session.get(url, params=params, headers=headers, timeout=self.timeout)
+        except Exception:
+            observe_call("daum", time.perf_counter() - start, False)
+            raise
+        observe_call("daum", time.perf_counter() - start, res.status_code < 400)
+        return res
+
+    def _cached(self, kind, code, loader):
+        key = (kind, code, datetime.now().strftime("%Y%m%d"))
+        with self._lock:
+            if key in self._cache:
+                return self._cache[key]
+        result = loader(code)
+        # 실패/빈 결과는 캐시하지 않아 다음 호출에서 다시 시도
+        if not _is_empty(result):
+            with self._lock:
+                self._cache[key] = result
+        return result
+
+    def _price_page(self, code, page):
+        referer = f"{DAUM_BASE_URL}/quotes/A{code}#chart"
+        params = {
+            "symbolCode": f"A{code}", "page": page, "perPage": self.per_page,
+            "fieldName": "closePrice", "order": "desc",
+        }
+        try:
+            res = self._get(f"{DAUM_BASE_URL}/api/quotes/A{code}/days", params, referer)
+            if res.status_code != 200:
+                return None
+            return res.json().get("data", [])
+        except Exception:
+            return None
+
+    def _load_price(self, code):
+        # 1페이지가 가득 차 있거나 실패했으면 나머지 페이지를 동시에 요청 (1페이지가 모자라면 마지막 페이지)
+        # 실패한 페이지는 건너뛰고, 비어 있는 페이지가 나오면 그 이후 결과는 버림
+        first = self._price_page(code, 1)
+        pages = [first]
+        if (first is None or len(first) >= self.per_page) and self.pages > 1:
+            futures = [self._pool.submit(self._price_page, code, p) for p in range(2, self.pages + 1)]
+            for i, future in enumerate(futures):
+                data = future.result()
+                if data is None:
+                    continue
+                if not data:
+                    for pending in futures[i + 1:]:
+                        pending.cancel()
+                    break
+                pages.append(data)
+        return parse_price_pages(pages)
+
+    def _load_financials(self, code):
+        url = f"{DAUM_BASE_URL}/quotes/A{code}"
+        try:
+            res = self._get(url, referer=url)
+            if res.status_code != 200:
+                return None, None, None, None
+            return parse_financials(res.content)
+        except Exception as e:
+            print(f"[DAUM FIN 실패] {code}: {e}")
             return None, None, None, None
-        from bs4 import BeautifulSoup
-        soup = BeautifulSoup(res.text, "html.parser")
-        per, pbr, roe, dividend = None, None, None, None
-
-        for item in soup.select(".list_info li"):
-            label = item.select_one(".label")
-            value = item.select_one(".emph")
-            if not label or not value:
-                continue
-            txt = label.text.strip()
-            val = value.text.strip().replace(",", "").replace("%", "").replace("배", "")
-            if "PER" in txt and not per:
-                per = val
-            elif "PBR" in txt and not pbr:
-                pbr = val
-            elif "ROE" in txt and not roe:
-                roe = val
-            elif "배당수익률" in txt and not dividend:
-                dividend = val
-        return per, pbr, roe, dividend
-    except Exception as e:
-        print(f"[DAUM FIN 실패] {code}: {e}")
-        return None, None, None, None
+
+    def get_price(self, code):
+        return self._cached("price", code, self._load_price).copy()
+
+    def get_financials(self, code):
+        return self._cached("fin", code, self._load_financials)
+
+    def _bulk(self, fn, codes):
+        # 종목 단위 작업은 별도 풀에서 실행해 페이지 요청 풀과 교착되지 않게 함
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            return dict(zip(codes, pool.map(fn, codes)))
+
+    def get_prices(self, codes):
+        return self._bulk(self.get_price, list(codes))
+
+    def get_financials_many(self, codes):
+        return self._bulk(self.get_financials, list(codes))
+
+    def close(self):
+        self._pool.shutdown(wait=False)
+        self.session.close()
+
+
+# ---- 녹화/재생 세션: 실제 응답을 파일로 저장해 두고 네트워크 없이 재현 ----
+
+def _fixture_name(url, params):
+    key = url + "?" + json.dumps(params or {}, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()
+
+
+class FixtureResponse:
+    def __init__(self, status_code, content):
+        self.status_code = status_code
+        self.content = content
+
+    @property
+    def text(self):
+        return self.content.decode("utf-8", errors="replace")
+
+    def json(self):
+        return json.loads(self.content)
+
+
+class FixtureSession:
+    # 녹화된 응답 디렉터리에서 재생, 없는 요청은 404
+    def __init__(self, directory):
+        self.directory = directory
+        self.requests = []
+
+    def get(self, url, params=None, headers=None, timeout=None):
+        self.requests.append((url, params))
+        path = os.path.join(self.directory, _fixture_name(url, params))
+        if not os.path.exists(path):
+            return FixtureResponse(404, b"")
+        with open(path, "rb") as f:
+            return FixtureResponse(200, f.read())
+
+    def close(self):
+        pass
+
+
+class RecordingSession:
+    # 실제 세션으로 요청하고 200 응답 본문을 fixture 디렉터리에 저장
+    def __init__(self, directory, session=None):
+        self.directory = directory
+        self.session = session or pooled_session()
+        os.makedirs(directory, exist_ok=True)
+
+    def get(self, url, params=None, headers=None, timeout=None):
+        res = self.session.get(url, params=params, headers=headers, timeout=timeout)
+        if res.status_code == 200:
+            with open(os.path.join(self.directory, _fixture_name(url, params)), "wb") as f:
+                f.write(res.content)
+        return res
+
+    def close(self):
+        self.session.close()
+
+
+_default_client = None
+_default_lock = threading.Lock()
+
+
+def get_daum_client():
+    global _default_client
+    with _default_lock:
+        if _default_client is None:
+            _default_client = DaumClient()
+        return _default_client
+
+
+def get_daum_price(code):
+    return get_daum_client().get_price(code)
+
+
+def get_daum_financials(code):
+    return get_daum_client().get_financials(code)
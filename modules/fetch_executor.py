@@ -0,0 +1,125 @@
+# modules/fetch_executor.py
+
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+from modules.tracing import observe_call, timed_call
+
+# 환경변수로 동시성/호출 한도 조정 (GitHub Actions 등에서 사용)
+DEFAULT_MAX_WORKERS = int(os.environ.get("KRX_MAX_WORKERS", 8))
+DEFAULT_RATE_PER_SEC = float(os.environ.get("KRX_RATE_PER_SEC", 10))
+DEFAULT_CALL_TIMEOUT = float(os.environ.get("KRX_CALL_TIMEOUT", 20))
+DEFAULT_MAX_RETRY = int(os.environ.get("KRX_MAX_RETRY", 3))
+
+
+class CallPoolExhausted(RuntimeError):
+    # 호출 슬롯이 모두 응답 없는(타임아웃 후에도 끝나지 않은) 호출에 묶여 있음
+    pass
+
+
+class TokenBucket:
+    def __init__(self, rate_per_sec, burst=None):
+        self.rate = float(rate_per_sec)
+        self.capacity = float(burst) if burst else max(1.0, self.rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        # rate <= 0 이면 제한 없음
+        if self.rate <= 0:
+            return
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class FetchExecutor:
+    def __init__(self, max_workers=None, rate_per_sec=None, timeout=None, max_retry=None,
+                 backoff_base=0.5, backoff_max=8.0):
+        self.max_workers = max_workers or DEFAULT_MAX_WORKERS
+        self.timeout = timeout if timeout is not None else DEFAULT_CALL_TIMEOUT
+        self.max_retry = max_retry if max_retry is not None else DEFAULT_MAX_RETRY
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.bucket = TokenBucket(rate_per_sec if rate_per_sec is not None else DEFAULT_RATE_PER_SEC)
+        # 작업(종목) 풀과 실제 외부 호출 풀을 분리해 호출 단위 타임아웃 적용
+        self._pool = ThreadPoolExecutor(self.max_workers, thread_name_prefix="krx-task")
+        self.call_slots = self.max_workers * 2
+        self._call_pool = ThreadPoolExecutor(self.call_slots, thread_name_prefix="krx-call")
+        # 타임아웃된 호출도 실제로 끝날 때까지 슬롯을 차지: 슬롯이 없으면 큐에 쌓지 않고 CallPoolExhausted
+        self._slots = threading.BoundedSemaphore(self.call_slots)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
+
+    def shutdown(self):
+        self._pool.shutdown(wait=True)
+        self._call_pool.shutdown(wait=False, cancel_futures=True)
+
+    def backoff(self, attempt):
+        # full jitter 지수 백오프
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def call(self, fn, *args, **kwargs):
+        last_error = None
+        name = getattr(fn, "__name__", str(fn))
+        for attempt in range(self.max_retry + 1):
+            self.bucket.acquire()
+            start = time.perf_counter()
+            if not self._slots.acquire(timeout=self.timeout):
+                observe_call(name, time.perf_counter() - start, False)
+                raise CallPoolExhausted(f"{name} 호출 슬롯 {self.call_slots}개가 모두 응답 없는 호출에 묶여 있음")
+            try:
+                future = self._call_pool.submit(fn, *args, **kwargs)
+            except Exception:
+                self._slots.release()
+                raise
+            future.add_done_callback(lambda _: self._slots.release())
+            try:
+                result = future.result(timeout=self.timeout)
+                observe_call(name, time.perf_counter() - start, True)
+                return result
+            except FutureTimeoutError:
+                # 이미 실행 중인 호출은 취소되지 않음 (호출이 실제로 끝나야 슬롯 반환)
+                future.cancel()
+                last_error = TimeoutError(f"{name} 호출 {self.timeout}초 초과")
+            except Exception as e:
+                last_error = e
+            observe_call(name, time.perf_counter() - start, False)
+            if attempt < self.max_retry:
+                time.sleep(self.backoff(attempt))
+        raise last_error
+
+    def submit(self, fn, *args, **kwargs):
+        return self._pool.submit(fn, *args, **kwargs)
+
+    def map_unordered(self, fn, items):
+        # 완료되는 순서대로 (item, 결과, 오류) 반환
+        futures = {self._pool.submit(fn, item): item for item in items}
+        for future in as_completed(futures):
+            item = futures[future]
+            try:
+                yield item, future.result(), None
+            except Exception as e:
+                yield item, None, e
+
+
+def krx_call(executor, fn, *args, **kwargs):
+    if executor is None:
+        return timed_call(getattr(fn, "__name__", str(fn)), fn, *args, **kwargs)
+    return executor.call(fn, *args, **kwargs)
@@ -1,9 +1,148 @@
-def fetch_google_news(query, max_items=5):
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from modules.tracing import observe_call
+
+# 로컬 대역 서버로 바꿔 끼울 수 있도록 환경변수로 설정
+NEWS_BASE_URL = os.environ.get("NEWS_BASE_URL", "https://news.google.com/rss/search")
+NEWS_TTL = float(os.environ.get("NEWS_TTL", 600))
+NEWS_TIMEOUT = (2.0, 4.0)  # (연결, 읽기) 초
+NEWS_WAIT = 1.0  # 화면 렌더링 시 진행 중 조회를 기다리는 최대 시간
+NEWS_RETRY = 60.0  # 조회 실패 후 재시도까지 기존 결과로 응답하는 시간
+
+
+class NewsEntry:
+    def __init__(self, titles, etag=None, last_modified=None, fetched_at=0.0, depth=0):
+        self.titles = titles
+        self.etag = etag
+        self.last_modified = last_modified
+        self.fetched_at = fetched_at
+        self.depth = depth  # 조회 당시 max_items (이보다 많이 요청되면 다시 조회)
+
+
+def parse_titles(content, max_items):
     import feedparser
-    try:
-        url = f"https://news.google.com/rss/search?q={query}+주식&hl=ko&gl=KR&ceid=KR:ko"
-        feed = feedparser.parse(url)
-        results = [entry.title for entry in feed.entries[:max_items]]
-        return results
-    except Exception:
-        return []
+    feed = feedparser.parse(content)
+    return [entry.title for entry in feed.entries[:max_items]]
+
+
+class NewsService:
+    # 질의별 TTL 캐시 + 조건부 GET(ETag/Last-Modified), 조회는 백그라운드 스레드에서
+    def __init__(self, base_url=None, ttl=NEWS_TTL, timeout=NEWS_TIMEOUT, max_workers=4, max_items=5, session=None,
+                 retry_after=NEWS_RETRY):
+        self.base_url = base_url or NEWS_BASE_URL
+        self.ttl = ttl
+        self.retry_after = retry_after
+        self.timeout = timeout
+        self.max_items = max_items
+        self.session = session or requests.Session()
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="news")
+        self._cache = {}
+        self._inflight = {}
+        self._lock = threading.Lock()
+
+    def _is_fresh(self, entry):
+        return entry is not None and time.monotonic() - entry.fetched_at < self.ttl and entry.depth >= self.max_items
+
+    def ensure_depth(self, max_items):
+        # 지금까지 요청된 가장 많은 개수까지 캐시 (얕게 받은 항목은 다음 조회 때 다시 받음)
+        with self._lock:
+            self.max_items = max(self.max_items, max_items)
+
+    def _fetch(self, query):
+        with self._lock:
+            cached = self._cache.get(query)
+            depth = self.max_items
+        headers = {}
+        # 더 깊게 받아야 하면 조건부 GET을 쓰지 않음 (304면 얕은 목록만 남음)
+        if cached is not None and cached.depth >= depth:
+            if cached.etag:
+                headers["If-None-Match"] = cached.etag
+            if cached.last_modified:
+                headers["If-Modified-Since"] = cached.last_modified
+        try:
+            params = {"q": f"{query} 주식", "hl": "ko", "gl": "KR", "ceid": "KR:ko"}
+            start = time.perf_counter()
+            try:
+                res = self.session.get(self.base_url, params=params, headers=headers, timeout=self.timeout)
+            except Exception:
+                observe_call("news_rss", time.perf_counter() - start, False)
+                raise
+            observe_call("news_rss", time.perf_counter() - start, res.status_code < 400)
+            if res.status_code == 304 and cached is not None:
+                entry = NewsEntry(cached.titles, cached.etag, cached.last_modified, time.monotonic(), cached.depth)
+            elif res.status_code == 200:
+                entry = NewsEntry(
+                    parse_titles(res.content, depth),
+                    res.headers.get("ETag"), res.headers.get("Last-Modified"), time.monotonic(), depth,
+                )
+            else:
+                raise RuntimeError(f"HTTP {res.status_code}")
+        except Exception as e:
+            print(f"[news][{query}] 조회 실패: {e}", file=sys.stderr)
+            # 실패 시 이전 결과 유지 (없으면 빈 목록), retry_after초 동안은 재조회/대기 없이 이 값으로 응답
+            titles = cached.titles if cached is not None else []
+            fetched_at = time.monotonic() - max(self.ttl - self.retry_after, 0.0)
+            with self._lock:
+                self._cache[query] = NewsEntry(
+                    titles, cached.etag if cached else None, cached.last_modified if cached else None, fetched_at,
+                    depth,
+                )
+            return titles
+        with self._lock:
+            self._cache[query] = entry
+        return entry.titles
+
+    def _submit(self, query):
+        with self._lock:
+            future = self._inflight.get(query)
+            if future is None or future.done():
+                future = self._pool.submit(self._fetch, query)
+                self._inflight[query] = future
+            return future
+
+    def prefetch(self, queries):
+        # 캐시가 만료된 질의만 백그라운드로 조회
+        for query in queries:
+            with self._lock:
+                fresh = self._is_fresh(self._cache.get(query))
+            if not fresh:
+                self._submit(query)
+
+    def get(self, query, wait=NEWS_WAIT):
+        # 신선한 캐시는 즉시 반환, 아니면 조회를 걸고 wait초까지만 기다린 뒤 있는 값으로 응답
+        with self._lock:
+            cached = self._cache.get(query)
+        if self._is_fresh(cached):
+            return cached.titles
+        future = self._submit(query)
+        try:
+            return future.result(timeout=wait)
+        except Exception:
+            return cached.titles if cached is not None else []
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False)
+
+
+_default_service = None
+_default_lock = threading.Lock()
+
+
+def get_news_service():
+    global _default_service
+    with _default_lock:
+        if _default_service is None:
+            _default_service = NewsService()
+        return _default_service
+
+
+def fetch_google_news(query, max_items=5):
+    service = get_news_service()
+    service.ensure_depth(max_items)
+    return service.get(query)[:max_items]
@@ -0,0 +1,187 @@
+# modules/price_store.py
+
+import json
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+# price_store/는 야간 작업(GitHub Actions 캐시) 전용이며 저장소에 커밋하지 않음
+# 배포된 앱은 자기 프로세스에서 조회한 종목만 pykrx로 채운 별도 저장소를 사용
+PRICE_STORE_DIR = os.environ.get("PRICE_STORE_DIR", "price_store")
+PRICE_COLS = ["시가", "고가", "저가", "종가", "거래량"]
+# 종목별 고정폭 레코드 파일: 날짜(yyyymmdd int32) + OHLCV(float64)
+BAR_DTYPE = np.dtype([("날짜", "<i4")] + [(col, "<f8") for col in PRICE_COLS])
+META_FILE = "_meta.json"
+
+# 프로세스 내에서 이미 보충 시도한 (종목, 시작일, 종료일)
+_refilled = set()
+# 구간 시작일 이후 이 일수 안에 첫 봉이 있으면 앞쪽은 채워진 것으로 봄 (주말/연휴)
+BACKFILL_GRACE_DAYS = 10
+
+
+def bar_path(code, root=None):
+    return os.path.join(root or PRICE_STORE_DIR, f"{str(code).zfill(6)}.bin")
+
+
+def read_bars(code, start=None, end=None, root=None):
+    # memmap 위 구간 슬라이스 (복사 없음)
+    path = bar_path(code, root)
+    if not os.path.exists(path) or os.path.getsize(path) < BAR_DTYPE.itemsize:
+        return np.empty(0, dtype=BAR_DTYPE)
+    bars = np.memmap(path, dtype=BAR_DTYPE, mode="r")
+    dates = bars["날짜"]
+    lo = np.searchsorted(dates, int(start)) if start else 0
+    hi = np.searchsorted(dates, int(end), side="right") if end else len(bars)
+    return bars[lo:hi]
+
+
+def last_bar_date(code, root=None):
+    bars = read_bars(code, root=root)
+    return str(int(bars["날짜"][-1])) if len(bars) else None
+
+
+def first_bar_date(code, root=None):
+    bars = read_bars(code, root=root)
+    return str(int(bars["날짜"][0])) if len(bars) else None
+
+
+def bars_to_frame(bars):
+    index = pd.DatetimeIndex(pd.to_datetime(bars["날짜"].astype(str), format="%Y%m%d"), name="날짜")
+    return pd.DataFrame({col: bars[col] for col in PRICE_COLS}, index=index)
+
+
+def frame_to_bars(df):
+    # pykrx 일별 시세(DatetimeIndex) -> 레코드 배열
+    bars = np.empty(len(df), dtype=BAR_DTYPE)
+    bars["날짜"] = pd.DatetimeIndex(df.index).strftime("%Y%m%d").astype(np.int32)
+    for col in PRICE_COLS:
+        bars[col] = pd.to_numeric(df[col], errors="coerce").to_numpy(dtype=np.float64)
+    return bars
+
+
+def append_bars(code, bars, root=None):
+    # 마지막 저장일 이후 레코드만 파일 끝에 추가
+    root = root or PRICE_STORE_DIR
+    os.makedirs(root, exist_ok=True)
+    last = last_bar_date(code, root)
+    if last is not None:
+        bars = bars[bars["날짜"] > int(last)]
+    if not len(bars):
+        return 0
+    with open(bar_path(code, root), "ab") as f:
+        np.sort(bars, order="날짜").tofile(f)
+    return len(bars)
+
+
+def write_bars(code, bars, root=None):
+    # 기존 레코드와 병합(같은 날짜는 새 값 우선) 후 원자적 교체
+    root = root or PRICE_STORE_DIR
+    os.makedirs(root, exist_ok=True)
+    existing = np.array(read_bars(code, root=root))
+    merged = np.concatenate([bars, existing])
+    _, first = np.unique(merged["날짜"], return_index=True)
+    merged = merged[first]
+    path = bar_path(code, root)
+    tmp_path = f"{path}.tmp"
+    merged.tofile(tmp_path)
+    os.replace(tmp_path, path)
+    return len(merged)
+
+
+def append_market_bars(frames, root=None):
+    # frames: {날짜: 전 종목 시세(index=종목코드)} -> 종목별 파일에 한 번씩 추가
+    # 마지막 저장일 이전 날짜(앞서 실패했다 늦게 받은 세션)가 섞인 종목은 병합 후 교체
+    if not frames:
+        return 0
+    long_df = pd.concat(
+        [f[PRICE_COLS].assign(날짜=int(date)) for date, f in sorted(frames.items()) if f is not None and not f.empty]
+    )
+    long_df.index = long_df.index.astype(str).str.zfill(6)
+    appended = 0
+    for code, group in long_df.groupby(level=0, sort=False):
+        bars = np.empty(len(group), dtype=BAR_DTYPE)
+        bars["날짜"] = group["날짜"].to_numpy(dtype=np.int32)
+        for col in PRICE_COLS:
+            bars[col] = group[col].to_numpy(dtype=np.float64)
+        stored = read_bars(code, root=root)["날짜"]
+        bars = bars[~np.isin(bars["날짜"], stored)]
+        if not len(bars):
+            continue
+        if len(stored) and bars["날짜"].min() < stored[-1]:
+            appended += write_bars(code, bars, root) - len(stored)
+        else:
+            appended += append_bars(code, bars, root)
+    return appended
+
+
+def read_meta(root=None):
+    try:
+        with open(os.path.join(root or PRICE_STORE_DIR, META_FILE), encoding="utf-8") as f:
+            return json.load(f)
+    except Exception:
+        return {}
+
+
+def write_meta(meta, root=None):
+    root = root or PRICE_STORE_DIR
+    os.makedirs(root, exist_ok=True)
+    path = os.path.join(root, META_FILE)
+    merged = {**read_meta(root), **meta}
+    with open(f"{path}.tmp", "w", encoding="utf-8") as f:
+        json.dump(merged, f)
+    os.replace(f"{path}.tmp", path)
+
+
+def read_field_matrix(codes, sessions, field="종가", root=None):
+    # 종목 × 세션 행렬, 해당 세션에 봉이 없으면 NaN
+    dates = np.asarray(sessions, dtype=np.int32)
+    out = np.full((len(codes), len(dates)), np.nan)
+    if not len(dates):
+        return out
+    for i, code in enumerate(codes):
+        bars = read_bars(code, sessions[0], sessions[-1], root)
+        if not len(bars):
+            continue
+        j = np.searchsorted(dates, bars["날짜"])
+        hit = dates[np.minimum(j, len(dates) - 1)] == bars["날짜"]
+        out[i, j[hit]] = bars[field][hit]
+    return out
+
+
+def _missing(code, start, end, root=None):
+    # (첫 봉, 마지막 봉, 앞쪽 부족, 뒤쪽 부족)
+    first, last = first_bar_date(code, root), last_bar_date(code, root)
+    grace_start = (pd.Timestamp(start) + pd.Timedelta(days=BACKFILL_GRACE_DAYS)).strftime("%Y%m%d")
+    return first, last, first is not None and first > grace_start, last is None or last < end
+
+
+def needs_refill(code, start, end, root=None):
+    # 저장소가 start~end를 덮지 못하고 이 프로세스에서 아직 보충하지 않은 구간이면 True
+    code = str(code).zfill(6)
+    _, _, need_back, need_forward = _missing(code, start, end, root)
+    return (need_back or need_forward) and (code, start, end) not in _refilled
+
+
+def load_price_history(code, start, end, root=None, refill=True):
+    # 저장소 우선, start~end 앞/뒤로 비어 있는 부분만 pykrx로 받아 저장 (refill=False면 저장소만 읽음)
+    code = str(code).zfill(6)
+    first, last, need_back, need_forward = _missing(code, start, end, root)
+    if refill and (need_back or need_forward) and (code, start, end) not in _refilled:
+        _refilled.add((code, start, end))
+        # 앞쪽 부족분은 [start, 첫 봉], 뒤쪽은 [마지막 봉, end], 둘 다면 한 번에 [start, end]
+        fetch_start = start if last is None or need_back else last
+        fetch_end = end if need_forward else first
+        try:
+            from pykrx import stock
+            from modules.tracing import timed_call
+            df = timed_call("get_market_ohlcv_by_date", stock.get_market_ohlcv_by_date, fetch_start, fetch_end, code)
+            if df is not None and not df.empty:
+                write_bars(code, frame_to_bars(df), root)
+        except Exception as e:
+            print(f"[price_store][{code}] 시세 보충 실패: {e}", file=sys.stderr)
+    bars = read_bars(code, start, end, root)
+    if not len(bars):
+        return None
+    return bars_to_frame(bars)
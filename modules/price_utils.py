@@ -1,5 +1,7 @@
 # modules/price_utils.py
 
+import numpy as np
+
 def calculate_recommended_sell(buy_price, df_price):
     if buy_price <= 0:
         return None
@@ -15,3 +17,10 @@ def calculate_recommended_sell(buy_price, df_price):
         target_price = recent_high
 
     return target_price
+
+
+def recommended_sell_targets(buy_prices, ema20, high20):
+    # calculate_recommended_sell의 배열 버전: 매수가 +10%, EMA_20·20일 최고가가 더 높으면 상향 (결측은 무시)
+    target = np.asarray(buy_prices, dtype=np.float64) * 1.1
+    target = np.fmax(target, np.asarray(ema20, dtype=np.float64))
+    return np.fmax(target, np.asarray(high20, dtype=np.float64))
@@ -1,9 +1,41 @@
 # modules/score_utils.py
 
+import warnings
+
 import numpy as np
 import pandas as pd
 
 DEFAULT_FIN = ['PER', 'PBR', 'EPS', 'BPS', '배당률', '거래대금']
+FACTORS = DEFAULT_FIN  # z-score 행렬 열 순서 (N × 6)
+
+# 성향 정의: 팩터 가중치 + 선언적 가산 규칙
+# 가산 규칙: 컬럼 op 기준값이면 then, 아니면 else (기준값 "median"은 해당 컬럼 중앙값)
+STYLE_DEFS = {
+    "aggressive": {
+        "label": "공격적",
+        "weights": {'PER': -0.25, 'PBR': -0.2, 'EPS': 0.2, 'BPS': 0.1, '배당률': 0.1, '거래대금': 0.15},
+        "bonus": [{"col": "EPS", "op": ">", "value": 0, "then": 0.1, "else": -0.1}],
+    },
+    "stable": {
+        "label": "안정적",
+        "weights": {'PER': -0.3, 'PBR': -0.35, 'BPS': 0.2, '배당률': 0.1, '거래대금': 0.05},
+        "bonus": [{"col": "BPS", "op": ">", "value": "median", "then": 0.1, "else": 0.0}],
+    },
+    "dividend": {
+        "label": "배당형",
+        "weights": {'배당률': 0.7, 'PBR': -0.15, 'PER': -0.1, '거래대금': 0.05},
+        "bonus": [{"col": "배당률", "op": ">=", "value": 3, "then": 0.15, "else": 0.0}],
+    },
+}
+STYLES = list(STYLE_DEFS)
+BONUS_OPS = {">": np.greater, ">=": np.greater_equal, "<": np.less, "<=": np.less_equal}
+# 성향별 신뢰등급 기준: (평가 컬럼, (A 최소 개수, B 최소 개수))
+RELIABILITY_RULES = {
+    "aggressive": (DEFAULT_FIN, (6, 4)),
+    "stable": (DEFAULT_FIN, (6, 4)),
+    "dividend": (DEFAULT_FIN, (6, 4)),
+}
+SCORE_COLS = [f"{prefix}_{style}" for style in STYLES for prefix in ("score", "rank", "신뢰등급")]
 
 def safe_float(val):
     try:
@@ -28,42 +60,114 @@ def assess_reliability(row):
     else:
         return 'C'
 
-def finalize_scores(df, style="aggressive"):
-    for col in DEFAULT_FIN:
-        df[col] = df[col].apply(safe_float)
-    for col in DEFAULT_FIN:
-        df[f'z_{col}'] = safe_zscore(df[col])
-
-    if style == "aggressive":
-        score = (
-            -df['z_PER'] * 0.25
-            -df['z_PBR'] * 0.2
-            +df['z_EPS'] * 0.2
-            +df['z_BPS'] * 0.1
-            +df['z_배당률'] * 0.1
-            +df['z_거래대금'] * 0.15
-        )
-        score += np.where(df['EPS'] > 0, 0.1, -0.1)
-    elif style == "stable":
-        score = (
-            -df['z_PER'] * 0.3
-            -df['z_PBR'] * 0.35
-            +df['z_BPS'] * 0.2
-            +df['z_배당률'] * 0.1
-            +df['z_거래대금'] * 0.05
-        )
-        score += np.where(df['BPS'] > df['BPS'].median(), 0.1, 0)
-    elif style == "dividend":
-        score = (
-            df['z_배당률'] * 0.7
-            -df['z_PBR'] * 0.15
-            -df['z_PER'] * 0.1
-            +df['z_거래대금'] * 0.05
-        )
-        score += np.where(df['배당률'] >= 3, 0.15, 0)
-    else:
-        score = np.zeros(len(df))
+def parse_numeric(series):
+    # 문자열("1,234", "3.5%")도 한 번에 숫자로 변환
+    if pd.api.types.is_numeric_dtype(series):
+        return series.astype(np.float64)
+    cleaned = series.astype(str).str.replace(",", "", regex=False).str.replace("%", "", regex=False)
+    return pd.to_numeric(cleaned, errors="coerce")
+
+def numeric_frame(df, factors=FACTORS):
+    return pd.DataFrame({col: parse_numeric(df[col]) if col in df.columns else np.nan for col in factors},
+                        index=df.index)
+
+def zscore_matrix(values):
+    # 열별 safe_zscore를 한 번에: (N × 팩터) 행렬, 표준편차 0/전부 결측인 열은 0
+    values = np.asarray(values, dtype=np.float64)
+    with np.errstate(invalid="ignore", divide="ignore"), warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)  # 전부 결측인 열의 nanmean 경고
+        mean = np.nanmean(values, axis=0)
+        std = np.nanstd(values, axis=0)
+        z = (values - mean) / std
+    z[:, (std == 0) | np.isnan(std)] = 0.0
+    return z
+
+def weight_matrix(defs, factors=FACTORS):
+    # 성향 정의 -> (팩터 × 성향) 가중치 행렬
+    return np.array([[d["weights"].get(f, 0.0) for d in defs] for f in factors], dtype=np.float64)
+
+def bonus_vector(values, rules, factors=FACTORS):
+    bonus = np.zeros(len(values))
+    for rule in rules:
+        column = values[:, factors.index(rule["col"])]
+        with np.errstate(invalid="ignore"), warnings.catch_warnings():
+            warnings.simplefilter("ignore", RuntimeWarning)  # 전부 결측인 열의 nanmedian 경고
+            threshold = np.nanmedian(column) if rule["value"] == "median" else rule["value"]
+            hit = BONUS_OPS[rule["op"]](column, threshold)
+        bonus += np.where(hit, rule["then"], rule.get("else", 0.0))
+    return bonus
 
-    score = np.where(np.isnan(score), 0, score)
-    df['score'] = score
+def score_matrix(values, defs, z=None, factors=FACTORS):
+    # 전 성향 점수 = z (N × 6) @ W (6 × K) + 가산 규칙
+    # 가중치가 0이 아닌 팩터가 결측인 종목은 해당 성향 점수 0 (기존 계산과 동일)
+    values = np.asarray(values, dtype=np.float64)
+    z = zscore_matrix(values) if z is None else z
+    weights = weight_matrix(defs, factors)
+    missing = np.isnan(z)
+    scores = np.where(missing, 0.0, z) @ weights
+    scores += np.column_stack([bonus_vector(values, d.get("bonus", []), factors) for d in defs])
+    invalid = (missing.astype(np.float64) @ (weights != 0)) > 0
+    return np.where(invalid, 0.0, scores)
+
+def custom_style(weights, bonus=(), label="사용자 정의"):
+    return {"label": label, "weights": {f: float(weights.get(f, 0.0)) for f in FACTORS}, "bonus": list(bonus)}
+
+def style_score(df, style):
+    if style not in STYLE_DEFS:
+        return np.zeros(len(df))
+    return score_matrix(numeric_frame(df).to_numpy(), [STYLE_DEFS[style]])[:, 0]
+
+def formula_markdown(definition):
+    # 성향 정의에서 점수 계산식 설명 생성 (화면 표시용)
+    terms = [(w, f) for f, w in definition["weights"].items() if w]
+    expr = " ".join(
+        (f"{'-' if w < 0 else ''}{abs(w):g} * z_{f}" if i == 0 else f"{'-' if w < 0 else '+'} {abs(w):g} * z_{f}")
+        for i, (w, f) in enumerate(terms)
+    ) or "0"
+    lines = [f"#### {definition['label']} 투자 성향 점수 계산식", f"- score = {expr}"]
+    for rule in definition.get("bonus", []):
+        threshold = "중앙값" if rule["value"] == "median" else f"{rule['value']:g}"
+        text = f"- {rule['col']} {rule['op']} {threshold} 이면 {rule['then']:+g}점"
+        if rule.get("else"):
+            text += f", 아니면 {rule['else']:+g}점"
+        lines.append(text)
+    lines.append("- z_변수는 표준화 지표(Z-Score)이며, 가중치가 있는 지표가 결측이면 점수는 0입니다.")
+    return "\n".join(lines)
+
+def compute_all_scores(df):
+    # 데이터 갱신 시 1회: 숫자 변환, z-score 행렬 1회 계산 후 전 성향 점수를 행렬 곱으로 일괄 계산
+    df = df.copy()
+    values = numeric_frame(df)
+    for col in DEFAULT_FIN:
+        df[col] = values[col]
+    z = zscore_matrix(values.to_numpy())
+    for i, col in enumerate(DEFAULT_FIN):
+        df[f'z_{col}'] = z[:, i]
+    scores = score_matrix(values.to_numpy(), [STYLE_DEFS[s] for s in STYLES], z)
+    for k, style in enumerate(STYLES):
+        df[f'score_{style}'] = scores[:, k]
+        df[f'rank_{style}'] = df[f'score_{style}'].rank(ascending=False, method="min").astype(int)
+        columns, thresholds = RELIABILITY_RULES[style]
+        df[f'신뢰등급_{style}'] = grade_reliability(df, columns, thresholds)
     return df
+
+def ensure_scores(df):
+    if all(col in df.columns for col in SCORE_COLS):
+        return df
+    return compute_all_scores(df)
+
+def select_style(scored_df, style):
+    # 성향 전환은 저장된 점수 컬럼 조회만 수행
+    if style not in STYLES:
+        return scored_df.assign(score=np.zeros(len(scored_df)), 신뢰등급=grade_reliability(scored_df))
+    return scored_df.assign(score=scored_df[f'score_{style}'], 신뢰등급=scored_df[f'신뢰등급_{style}'])
+
+def grade_reliability(df, columns=DEFAULT_FIN, thresholds=(6, 4)):
+    # assess_reliability의 컬럼 단위 버전: 결측 아닌 재무값 개수를 한 번에 집계
+    present = [c for c in columns if c in df.columns]
+    count = df[present].notna().sum(axis=1).to_numpy() if present else np.zeros(len(df))
+    a_min, b_min = thresholds
+    return np.select([count >= a_min, count >= b_min], ['A', 'B'], 'C')
+
+def finalize_scores(df, style="aggressive"):
+    return select_style(compute_all_scores(df), style)
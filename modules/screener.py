@@ -0,0 +1,293 @@
+# modules/screener.py
+
+import os
+import re
+
+import numpy as np
+import pandas as pd
+
+from modules.calculate_indicators import INDICATOR_COLS
+from modules.signals import SIGNAL_COLS
+
+SCREENER_PATH = os.environ.get("SCREENER_PATH", "screener_matrix.npz")
+# 질의에서 비교식으로 쓸 수 있는 수치 컬럼
+FIELD_COLS = (
+    ["현재가", "거래량", "거래대금", "PER", "PBR", "EPS", "BPS", "배당률", "평균거래량_20", "전일종가"]
+    + INDICATOR_COLS
+)
+SCORE_FIELD_PREFIXES = ("score_", "rank_")
+OPS = {
+    "<": np.less, "<=": np.less_equal, ">": np.greater, ">=": np.greater_equal,
+    "=": np.equal, "==": np.equal, "!=": np.not_equal,
+}
+
+
+def _col(df, name):
+    if name not in df.columns:
+        return np.full(len(df), np.nan)
+    return pd.to_numeric(df[name], errors="coerce").to_numpy(dtype=np.float64)
+
+
+def _known(*arrays):
+    return np.logical_and.reduce([~np.isnan(a) for a in arrays])
+
+
+def rule_hits(df):
+    # 종목 평가 규칙(evaluate_context)을 전 종목 불리언 배열로: 결측이면 False
+    per, pbr, div, eps, bps = (_col(df, c) for c in ["PER", "PBR", "배당률", "EPS", "BPS"])
+    close, volume, value = _col(df, "현재가"), _col(df, "거래량"), _col(df, "거래대금")
+    avg_vol, prev_close = _col(df, "평균거래량_20"), _col(df, "전일종가")
+    ema, rsi, macd, signal, hist = (_col(df, c) for c in INDICATOR_COLS)
+    surge = volume > avg_vol * 1.5
+    hits = {
+        "LOW_PER": per < 7,
+        "HIGH_PER": per > 20,
+        "LOW_PBR": pbr < 1,
+        "HIGH_PBR": pbr > 2,
+        "HIGH_DIVIDEND": div >= 3,
+        "LOW_DIVIDEND": div < 1,
+        "EPS_POSITIVE": eps > 0,
+        "EPS_NEGATIVE": eps <= 0,
+        "BPS_POSITIVE": bps > 0,
+        "BPS_NEGATIVE": bps <= 0,
+        "RSI_OVERSOLD": rsi < 30,
+        "RSI_OVERBOUGHT": rsi > 70,
+        "MACD_ABOVE_SIGNAL": _known(macd, signal) & (macd >= signal),
+        "MACD_BELOW_SIGNAL": macd < signal,
+        "ABOVE_EMA20": close > ema,
+        "BELOW_EMA20": _known(close, ema) & (close <= ema),
+        "LOW_LIQUIDITY": value < 1e7,
+        "VOLUME_SURGE": surge,
+        "VOLUME_DROP": volume < avg_vol * 0.5,
+        "VALUE_COMBO": (per < 10) & (eps > 0) & (div >= 2),
+        "RISK_COMBO": (per > 25) & (eps < 0),
+        "MOMENTUM": surge & (close > prev_close),
+        "SURGE_DOWN": surge & _known(close, prev_close) & (close <= prev_close),
+        "OVERSOLD_REBOUND": (rsi < 30) & (hist > 0),
+        "OVERBOUGHT_PULLBACK": (rsi > 70) & (hist < 0),
+        "EMA_VOLUME_PULLBACK": (close < ema) & (volume < avg_vol * 0.5),
+    }
+    # 야간 작업이 저장한 최근 신호 플래그
+    for col in SIGNAL_COLS:
+        flags = df[col] if col in df.columns else pd.Series(False, index=df.index)
+        hits[col] = flags.map(lambda v: str(v).lower() in ("true", "1", "1.0")).to_numpy(dtype=bool)
+    return hits
+
+
+RULE_NAMES = list(rule_hits(pd.DataFrame({"현재가": []})))
+
+
+def _key(text):
+    return re.sub(r"[\s_\-]+", "_", str(text).strip().lower())
+
+
+# 자연어 형태 별칭 -> 규칙명
+RULE_ALIASES = {
+    **{_key(name): name for name in RULE_NAMES},
+    "macd_cross_up": "MACD_CROSS_UP", "macd_golden_cross": "MACD_CROSS_UP",
+    "macd_cross_down": "MACD_CROSS_DOWN", "macd_dead_cross": "MACD_CROSS_DOWN",
+    "golden_cross": "GOLDEN_CROSS", "ema_cross_up": "GOLDEN_CROSS",
+    "dead_cross": "DEAD_CROSS", "ema_cross_down": "DEAD_CROSS",
+    "rsi_rebound": "RSI_REBOUND", "rsi_rollover": "RSI_ROLLOVER",
+    "buy": "BUY_SIGNAL", "sell": "SELL_SIGNAL",
+}
+
+
+class Screener:
+    # 종목 × 규칙 비트마스크 + 최신 수치 컬럼: 질의 시 외부 호출 없음
+    def __init__(self, codes, names, rule_bits, rule_names, fields, base_date=""):
+        self.codes = np.asarray(codes, dtype=str)
+        self.names = np.asarray(names, dtype=str)
+        self.n = len(self.codes)
+        self.rule_bits = rule_bits
+        self.rule_index = {name: i for i, name in enumerate(rule_names)}
+        self.fields = fields
+        self.field_keys = {_key(name): name for name in fields}
+        self.base_date = base_date
+        # (컬럼, 연산자, 값) -> 일치 종목코드 또는 None: 외부 인덱스(sqlite)로 범위 비교를 대신할 때 지정
+        self.indexed_lookup = None
+
+    @classmethod
+    def from_frame(cls, df, base_date=""):
+        hits = rule_hits(df)
+        rule_bits = np.stack([np.packbits(hits[name]) for name in RULE_NAMES]) if len(df) else \
+            np.zeros((len(RULE_NAMES), 0), dtype=np.uint8)
+        fields = {col: _col(df, col) for col in FIELD_COLS}
+        fields.update({col: _col(df, col) for col in df.columns if col.startswith(SCORE_FIELD_PREFIXES)})
+        return cls(df["종목코드"].astype(str).str.zfill(6), df["종목명"].astype(str), rule_bits, RULE_NAMES, fields,
+                   base_date)
+
+    def update_rows(self, df):
+        # 개별 갱신: df 종목의 규칙 비트/수치만 교체, 없는 종목은 끝에 추가
+        codes = df["종목코드"].astype(str).str.zfill(6).to_numpy()
+        known = set(self.codes.tolist())
+        new = [i for i, code in enumerate(codes) if code not in known]
+        bits = np.unpackbits(self.rule_bits, axis=1, count=self.n).astype(bool)
+        if new:
+            self.codes = np.concatenate([self.codes, codes[new]]).astype(str)
+            self.names = np.concatenate([self.names, df["종목명"].astype(str).to_numpy()[new]]).astype(str)
+            bits = np.hstack([bits, np.zeros((len(bits), len(new)), dtype=bool)])
+            self.fields = {col: np.concatenate([values, np.full(len(new), np.nan)]) for col, values in self.fields.items()}
+            self.n = len(self.codes)
+        position = {code: i for i, code in enumerate(self.codes.tolist())}
+        rows = np.array([position[code] for code in codes], dtype=np.intp)
+        hits = rule_hits(df)
+        for name, i in self.rule_index.items():
+            if name in hits:
+                bits[i, rows] = hits[name]
+        self.rule_bits = np.packbits(bits, axis=1)
+        cols = FIELD_COLS + [col for col in df.columns if col.startswith(SCORE_FIELD_PREFIXES)]
+        self.update_fields(df, [col for col in cols if col in df.columns or col in self.fields])
+
+    def update_fields(self, df, cols):
+        # 수치 컬럼만 종목코드 기준으로 교체 (스크리너에 없는 종목은 무시)
+        position = {code: i for i, code in enumerate(self.codes.tolist())}
+        codes = df["종목코드"].astype(str).str.zfill(6)
+        hit = codes.isin(position).to_numpy()
+        rows = np.array([position[code] for code in codes[hit]], dtype=np.intp)
+        for col in cols:
+            values = self.fields[col].copy() if col in self.fields else np.full(self.n, np.nan)
+            values[rows] = _col(df, col)[hit]
+            self.fields[col] = values
+
+    def save(self, path=SCREENER_PATH):
+        tmp_path = f"{path}.tmp.npz"
+        np.savez(
+            tmp_path, codes=self.codes, names=self.names, rule_bits=self.rule_bits,
+            rule_names=np.asarray(list(self.rule_index), dtype=str), field_names=np.asarray(list(self.fields), dtype=str),
+            field_values=np.stack(list(self.fields.values())) if self.fields else np.zeros((0, self.n)),
+            base_date=self.base_date,
+        )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path=SCREENER_PATH):
+        with np.load(path) as data:
+            fields = dict(zip(data["field_names"].tolist(), data["field_values"]))
+            return cls(data["codes"], data["names"], data["rule_bits"], data["rule_names"].tolist(), fields,
+                       str(data["base_date"]))
+
+    def rule_mask(self, name):
+        rule = RULE_ALIASES.get(_key(name))
+        if rule is None or rule not in self.rule_index:
+            raise ValueError(f"알 수 없는 조건: {name}")
+        return self.rule_bits[self.rule_index[rule]]
+
+    def field_mask(self, field, op, value):
+        col = self.field_keys.get(_key(field))
+        if col is None:
+            raise ValueError(f"알 수 없는 컬럼: {field}")
+        codes = self.indexed_lookup(col, op, value) if self.indexed_lookup is not None else None
+        if codes is not None:
+            return np.packbits(np.isin(self.codes, codes))
+        return np.packbits(OPS[op](self.fields[col], value))
+
+    def query(self, text):
+        # 예: "PER < 10 & EPS > 0 & RSI_14 < 30 & MACD cross up" -> 해당 종목 위치 배열
+        mask = _QueryParser(self, text).parse()
+        return np.flatnonzero(np.unpackbits(mask, count=self.n))
+
+    def query_codes(self, text):
+        return self.codes[self.query(text)].tolist()
+
+
+_TOKEN_RE = re.compile(r"\s*(&&?|\|\|?|\(|\)|~|!(?!=)|\band\b|\bor\b|\bnot\b)\s*", re.IGNORECASE)
+_COMPARE_RE = re.compile(r"^\s*(.+?)\s*(<=|>=|==|!=|<|>|=)\s*(-?\d+(?:\.\d+)?(?:e-?\d+)?)\s*$", re.IGNORECASE)
+
+
+def _tokenize(text):
+    tokens = []
+    for part in _TOKEN_RE.split(text):
+        part = part.strip()
+        if not part:
+            continue
+        lowered = part.lower()
+        if lowered in ("&", "&&", "and"):
+            tokens.append("&")
+        elif lowered in ("|", "||", "or"):
+            tokens.append("|")
+        elif lowered in ("~", "!", "not"):
+            tokens.append("~")
+        else:
+            tokens.append(part)
+    return tokens
+
+
+class _QueryParser:
+    # expr := and ('|' and)* ; and := unary ('&' unary)* ; unary := '~' unary | '(' expr ')' | atom
+    def __init__(self, screener, text):
+        self.screener = screener
+        self.tokens = _tokenize(text)
+        self.pos = 0
+
+    def _peek(self):
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else None
+
+    def _take(self):
+        token = self._peek()
+        self.pos += 1
+        return token
+
+    def parse(self):
+        if not self.tokens:
+            return np.packbits(np.ones(self.screener.n, dtype=bool))
+        mask = self._or()
+        if self._peek() is not None:
+            raise ValueError(f"질의 해석 실패: '{self._peek()}' 부근")
+        return mask
+
+    def _or(self):
+        mask = self._and()
+        while self._peek() == "|":
+            self._take()
+            mask = mask | self._and()
+        return mask
+
+    def _and(self):
+        mask = self._unary()
+        while self._peek() == "&":
+            self._take()
+            mask = mask & self._unary()
+        return mask
+
+    def _unary(self):
+        token = self._take()
+        if token == "~":
+            return ~self._unary()
+        if token == "(":
+            mask = self._or()
+            if self._take() != ")":
+                raise ValueError("괄호가 닫히지 않았습니다")
+            return mask
+        if token is None or token in ("&", "|", ")"):
+            raise ValueError("조건이 비어 있습니다")
+        match = _COMPARE_RE.match(token)
+        if match:
+            field, op, value = match.groups()
+            return self.screener.field_mask(field, op, float(value))
+        return self.screener.rule_mask(token)
+
+
+def load_screener(path=SCREENER_PATH):
+    try:
+        return Screener.load(path)
+    except Exception:
+        return None
+
+
+def write_screener(df, base_date="", path=SCREENER_PATH):
+    screener = Screener.from_frame(df, base_date)
+    screener.save(path)
+    return screener
+
+
+def update_screener(rows, table=None, path=SCREENER_PATH):
+    # 개별 갱신 후 저장된 스크리너에 반영: rows 종목은 규칙/수치 전체, table(전 종목)은 점수/순위만 (점수는 상대값)
+    screener = load_screener(path)
+    if screener is None:
+        return None
+    screener.update_rows(rows)
+    if table is not None:
+        screener.update_fields(table, [col for col in table.columns if col.startswith(SCORE_FIELD_PREFIXES)])
+    screener.save(path)
+    return screener
@@ -0,0 +1,115 @@
+# modules/search_index.py
+
+from collections import defaultdict
+
+CHOSUNG = ["ㄱ", "ㄲ", "ㄴ", "ㄷ", "ㄸ", "ㄹ", "ㅁ", "ㅂ", "ㅃ", "ㅅ", "ㅆ", "ㅇ", "ㅈ", "ㅉ", "ㅊ", "ㅋ", "ㅌ", "ㅍ", "ㅎ"]
+CHOSUNG_SET = set(CHOSUNG)
+HANGUL_BASE, HANGUL_LAST = 0xAC00, 0xD7A3
+MAX_PREFIX = 12
+
+# 순위: 낮을수록 우선
+RANK_EXACT, RANK_PREFIX, RANK_CODE, RANK_CHOSUNG, RANK_SUBSTRING, RANK_MARKET = range(6)
+
+
+def normalize(text):
+    return "".join(str(text).lower().split())
+
+
+def chosung_key(text):
+    # 완성형 한글은 초성으로, 그 외 문자는 그대로 (소문자)
+    out = []
+    for ch in normalize(text):
+        code = ord(ch)
+        if HANGUL_BASE <= code <= HANGUL_LAST:
+            out.append(CHOSUNG[(code - HANGUL_BASE) // 588])
+        else:
+            out.append(ch)
+    return "".join(out)
+
+
+def is_chosung_query(query):
+    return bool(query) and any(ch in CHOSUNG_SET for ch in query) and all(
+        ch in CHOSUNG_SET or not ("가" <= ch <= "힣") for ch in query
+    )
+
+
+def _grams(text):
+    # 1글자 질의도 처리하도록 unigram + bigram
+    return set(text) | {text[i:i + 2] for i in range(len(text) - 1)}
+
+
+def _query_grams(query):
+    return {query[i:i + 2] for i in range(len(query) - 1)} if len(query) > 1 else {query}
+
+
+class StockSearchIndex:
+    def __init__(self, names, codes, markets=None):
+        self.names = list(names)
+        self.codes = [str(c).zfill(6) for c in codes]
+        self.markets = list(markets) if markets is not None else [""] * len(self.names)
+        self.norm_names = [normalize(n) for n in self.names]
+        self.chosung = [chosung_key(n) for n in self.names]
+        self.name_prefix = defaultdict(list)
+        self.code_prefix = defaultdict(list)
+        self.chosung_prefix = defaultdict(list)
+        self.name_grams = defaultdict(set)
+        self.chosung_grams = defaultdict(set)
+        self.market_index = defaultdict(list)
+        for i, (name, code, key) in enumerate(zip(self.norm_names, self.codes, self.chosung)):
+            for n in range(1, min(len(name), MAX_PREFIX) + 1):
+                self.name_prefix[name[:n]].append(i)
+            for n in range(1, len(code) + 1):
+                self.code_prefix[code[:n]].append(i)
+            for n in range(1, min(len(key), MAX_PREFIX) + 1):
+                self.chosung_prefix[key[:n]].append(i)
+            for gram in _grams(name):
+                self.name_grams[gram].add(i)
+            for gram in _grams(key):
+                self.chosung_grams[gram].add(i)
+            self.market_index[normalize(self.markets[i])].append(i)
+
+    @classmethod
+    def from_frame(cls, df):
+        markets = df["시장구분"] if "시장구분" in df.columns else None
+        return cls(df["종목명"].astype(str), df["종목코드"].astype(str), markets)
+
+    def _substring(self, query, grams, texts):
+        # n-gram 교집합으로 후보를 좁힌 뒤 실제 포함 여부 확인
+        posting = [grams.get(g, set()) for g in _query_grams(query)]
+        if not posting:
+            return []
+        candidates = set.intersection(*sorted(posting, key=len))
+        return [i for i in candidates if query in texts[i]]
+
+    def _prefix(self, index, query):
+        if len(query) <= MAX_PREFIX:
+            return index.get(query, [])
+        return [i for i in index.get(query[:MAX_PREFIX], []) if self.norm_names[i].startswith(query)]
+
+    def search(self, query, limit=50):
+        q = normalize(query)
+        if not q:
+            return []
+        best = {}
+
+        def add(ids, rank):
+            for i in ids:
+                if rank < best.get(i, RANK_MARKET + 1):
+                    best[i] = rank
+
+        if is_chosung_query(q):
+            add(self.chosung_prefix.get(q, []), RANK_PREFIX)
+            add(self._substring(q, self.chosung_grams, self.chosung), RANK_CHOSUNG)
+        else:
+            add(self._prefix(self.name_prefix, q), RANK_PREFIX)
+            add([i for i in self._prefix(self.name_prefix, q) if self.norm_names[i] == q], RANK_EXACT)
+            if q.isdigit():
+                add(self.code_prefix.get(q, []), RANK_CODE)
+            add(self._substring(q, self.name_grams, self.norm_names), RANK_SUBSTRING)
+            add(self.market_index.get(q, []), RANK_MARKET)
+
+        ranked = sorted(best, key=lambda i: (best[i], len(self.names[i]), self.names[i]))
+        return ranked[:limit]
+
+    def search_names(self, query, limit=50):
+        return [self.names[i] for i in self.search(query, limit)]
@@ -0,0 +1,62 @@
+# modules/signals.py
+
+import numpy as np
+
+SIGNAL_WINDOW = 5  # 앱 추천가 계산과 같은 최근 5개 봉
+SIGNAL_COLS = [
+    "GOLDEN_CROSS", "DEAD_CROSS", "RSI_REBOUND", "RSI_ROLLOVER",
+    "MACD_CROSS_UP", "MACD_CROSS_DOWN", "BUY_SIGNAL", "SELL_SIGNAL",
+]
+
+
+def _prev(arr):
+    # 마지막 축(일자) 기준 한 칸 이전 값, 첫 칸은 NaN
+    arr = np.asarray(arr, dtype=np.float64)
+    out = np.full_like(arr, np.nan)
+    out[..., 1:] = arr[..., :-1]
+    return out
+
+
+def crossed_above(a, b):
+    a, b = np.asarray(a, dtype=np.float64), np.asarray(b, dtype=np.float64)
+    return (a > b) & (_prev(a) < _prev(b))
+
+
+def crossed_below(a, b):
+    a, b = np.asarray(a, dtype=np.float64), np.asarray(b, dtype=np.float64)
+    return (a < b) & (_prev(a) > _prev(b))
+
+
+def compute_signals(close, ema20, rsi, macd, macd_signal):
+    # 1-D(한 종목) 또는 2-D(종목 × 일자) 배열을 한 번에 처리, 결측 비교는 False
+    close, ema20, rsi = (np.asarray(x, dtype=np.float64) for x in (close, ema20, rsi))
+    rsi_prev = _prev(rsi)
+    sig = {
+        "GOLDEN_CROSS": crossed_above(close, ema20),
+        "DEAD_CROSS": crossed_below(close, ema20),
+        "RSI_REBOUND": (rsi < 35) & (rsi_prev < rsi),
+        "RSI_ROLLOVER": (rsi > 65) & (rsi_prev > rsi),
+        "MACD_CROSS_UP": crossed_above(macd, macd_signal),
+        "MACD_CROSS_DOWN": crossed_below(macd, macd_signal),
+    }
+    # 앱의 추천 매수/매도 조건
+    sig["BUY_SIGNAL"] = (sig["RSI_REBOUND"] | (close < ema20)) & sig["MACD_CROSS_UP"]
+    sig["SELL_SIGNAL"] = (sig["RSI_ROLLOVER"] | (close > ema20)) & sig["MACD_CROSS_DOWN"]
+    return sig
+
+
+def signals_from_frame(df):
+    return compute_signals(df["종가"], df["EMA_20"], df["RSI_14"], df["MACD"], df["MACD_SIGNAL"])
+
+
+def last_signal_index(mask, window=SIGNAL_WINDOW):
+    # 최근 window개 봉 중 마지막 발생 위치 (첫 봉은 비교 기준이라 제외), 없으면 None
+    mask = np.asarray(mask)
+    start = max(len(mask) - window + 1, 1)
+    hits = np.flatnonzero(mask[start:])
+    return int(start + hits[-1]) if len(hits) else None
+
+
+def recent_signal_flags(signals, window=SIGNAL_WINDOW):
+    # 종목별로 최근 window개 봉 안에 신호가 있었는지 (2-D 입력이면 종목 배열)
+    return {name: np.asarray(mask)[..., -(window - 1):].any(axis=-1) for name, mask in signals.items()}
@@ -0,0 +1,179 @@
+# modules/stock_db.py
+
+import os
+import sqlite3
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+STOCK_DB_PATH = os.environ.get("STOCK_DB_PATH", "stocks.db")
+TEXT_COLS = {"종목코드", "종목명", "시장구분", "기준일"}
+SCORE_PREFIXES = ("score_", "rank_", "신뢰등급_")
+# 범위 조회(PER < 7, 배당률 >= 3 등)에 쓰는 인덱스 컬럼
+INDEXED_COLS = ["PER", "PBR", "EPS", "배당률", "거래대금"]
+QUERY_OPS = {"<", "<=", ">", ">=", "=", "!="}
+
+
+def connect(path=None):
+    conn = sqlite3.connect(path or STOCK_DB_PATH)
+    conn.execute("PRAGMA journal_mode=WAL")
+    return conn
+
+
+@contextmanager
+def session(path=None):
+    # 성공 시 commit, 실패 시 rollback 후 항상 close
+    conn = connect(path)
+    try:
+        with conn:
+            yield conn
+    finally:
+        conn.close()
+
+
+def _q(name):
+    return '"' + str(name).replace('"', '""') + '"'
+
+
+def _col_type(col):
+    return "TEXT" if col in TEXT_COLS or col.startswith("신뢰등급") else "REAL"
+
+
+def _is_score_col(col):
+    return col.startswith(SCORE_PREFIXES)
+
+
+def _ensure_table(conn, table, columns):
+    conn.execute(f"CREATE TABLE IF NOT EXISTS {table} ({_q('종목코드')} TEXT PRIMARY KEY)")
+    existing = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+    for col in columns:
+        if col not in existing:
+            conn.execute(f"ALTER TABLE {table} ADD COLUMN {_q(col)} {_col_type(col)}")
+
+
+def _ensure_indexes(conn):
+    existing = {row[1] for row in conn.execute("PRAGMA table_info(stocks)")}
+    conn.execute(f"CREATE INDEX IF NOT EXISTS idx_stocks_name ON stocks ({_q('종목명')})")
+    for col in INDEXED_COLS:
+        if col in existing:
+            conn.execute(f"CREATE INDEX IF NOT EXISTS {_q('idx_stocks_' + col)} ON stocks ({_q(col)})")
+
+
+def _records(df, columns):
+    values = df[columns].astype(object).where(df[columns].notna(), None)
+    return [tuple(v.item() if isinstance(v, np.generic) else v for v in row) for row in values.itertuples(index=False)]
+
+
+def _split(df):
+    stock_cols = [c for c in df.columns if c != "종목코드" and not _is_score_col(c) and not c.startswith("z_")]
+    score_cols = [c for c in df.columns if _is_score_col(c)]
+    return stock_cols, score_cols
+
+
+def _upsert(conn, table, df, columns):
+    if not columns:
+        return
+    cols = ["종목코드"] + columns
+    updates = ", ".join(f"{_q(c)}=excluded.{_q(c)}" for c in columns)
+    conn.executemany(
+        f"INSERT INTO {table} ({', '.join(map(_q, cols))}) VALUES ({', '.join('?' * len(cols))}) "
+        f"ON CONFLICT({_q('종목코드')}) DO UPDATE SET {updates}",
+        _records(df, cols),
+    )
+
+
+def _bump_version(conn):
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    conn.execute(f"PRAGMA user_version = {int(version) + 1}")
+
+
+def data_version(path=None):
+    # 쓰기마다 증가하는 버전 (캐시 키)
+    if not os.path.exists(path or STOCK_DB_PATH):
+        return None
+    with session(path) as conn:
+        return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def write_stocks(df, path=None):
+    # 전체 교체: 종목 테이블 + 점수 테이블을 한 트랜잭션으로 기록
+    stock_cols, score_cols = _split(df)
+    with session(path) as conn:
+        _bump_version(conn)
+        _ensure_table(conn, "stocks", stock_cols)
+        _ensure_table(conn, "scores", score_cols)
+        _ensure_indexes(conn)
+        conn.execute("DELETE FROM stocks")
+        conn.execute("DELETE FROM scores")
+        _upsert(conn, "stocks", df, stock_cols)
+        _upsert(conn, "scores", df, score_cols)
+
+
+def upsert_stock(row, path=None):
+    df = pd.DataFrame([{**row, "종목코드": str(row["종목코드"]).zfill(6)}])
+    stock_cols, score_cols = _split(df)
+    with session(path) as conn:
+        _bump_version(conn)
+        _ensure_table(conn, "stocks", stock_cols)
+        _ensure_table(conn, "scores", score_cols)
+        _upsert(conn, "stocks", df, stock_cols)
+        _upsert(conn, "scores", df, score_cols)
+
+
+def write_scores(df, path=None):
+    _, score_cols = _split(df)
+    with session(path) as conn:
+        _bump_version(conn)
+        _ensure_table(conn, "scores", score_cols)
+        _upsert(conn, "scores", df, score_cols)
+
+
+def _select(where="", params=(), path=None, columns=None):
+    # columns: 읽을 컬럼만 (두 테이블 중 어디에도 없는 컬럼은 건너뜀), None이면 전체
+    with session(path) as conn:
+        select = "*"
+        if columns is not None:
+            existing = {row[1] for table in ("stocks", "scores") for row in conn.execute(f"PRAGMA table_info({table})")}
+            select = ", ".join(_q(c) for c in columns if c in existing)
+        return pd.read_sql_query(
+            f"SELECT {select} FROM stocks s LEFT JOIN scores sc USING ({_q('종목코드')}) {where}",
+            conn, params=params,
+        )
+
+
+def read_stocks(path=None, columns=None):
+    return _select(path=path, columns=columns)
+
+
+def get_stock(code, path=None):
+    df = _select(f"WHERE s.{_q('종목코드')} = ?", (str(code).zfill(6),), path)
+    return df.iloc[0] if len(df) else None
+
+
+def find_by_name(name, path=None):
+    df = _select(f"WHERE s.{_q('종목명')} = ?", (name,), path)
+    return df.iloc[0] if len(df) else None
+
+
+def _where(conditions):
+    clauses, params = [], []
+    for col, op, value in conditions:
+        if op not in QUERY_OPS:
+            raise ValueError(f"지원하지 않는 연산자: {op}")
+        clauses.append(f"{_q(col)} {op} ?")
+        params.append(value)
+    return (f"WHERE {' AND '.join(clauses)}" if clauses else ""), tuple(params)
+
+
+def query_stocks(conditions, path=None):
+    # conditions: [("PER", "<", 7), ("배당률", ">=", 3)] -> 인덱스 범위 조회
+    where, params = _where(conditions)
+    return _select(where, params, path)
+
+
+def query_codes(conditions, path=None):
+    # query_stocks와 같은 조건으로 종목코드만 (인덱스만 읽음)
+    where, params = _where(conditions)
+    with session(path) as conn:
+        return [row[0] for row in conn.execute(f"SELECT {_q('종목코드')} FROM stocks {where}", params)]
@@ -0,0 +1,121 @@
+# modules/stock_history.py
+
+import argparse
+import os
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+from modules.calculate_indicators import INDICATOR_COLS
+from modules.score_utils import SCORE_COLS
+from modules.stock_table import to_snapshot_table
+from modules.update_journal import BASE_DATE_COL
+
+# 일자별 파티션(Hive 방식): stock_history/date=YYYYMMDD/part-0.parquet
+# 지난 날짜 파티션은 다시 쓰지 않음 (같은 날 재실행 시 그날 파티션만 원자적으로 교체)
+HISTORY_DIR = os.environ.get("STOCK_HISTORY_DIR", "stock_history")
+PARTITION_KEY = "date"
+PART_FILE = "part-0.parquet"
+HISTORY_COLS = (
+    ["종목코드", "종목명", "현재가", "거래량", "거래대금", "PER", "PBR", "EPS", "BPS", "배당률"]
+    + INDICATOR_COLS + SCORE_COLS
+)
+
+
+def partition_dir(date, root=None):
+    return os.path.join(root or HISTORY_DIR, f"{PARTITION_KEY}={date}")
+
+
+def history_dates(root=None):
+    root = root or HISTORY_DIR
+    if not os.path.isdir(root):
+        return []
+    prefix = f"{PARTITION_KEY}="
+    return sorted(
+        name[len(prefix):] for name in os.listdir(root)
+        if name.startswith(prefix) and os.path.exists(os.path.join(root, name, PART_FILE))
+    )
+
+
+def append_history(df, date, root=None):
+    # 하루치 종목 테이블을 date 파티션으로 기록 (스냅샷과 같은 타입: float32 재무/지표/점수, 범주형 이름)
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    date = str(date)
+    cols = [c for c in HISTORY_COLS if c in df.columns]
+    frame = df[cols].dropna(subset=["종목코드"]).drop_duplicates("종목코드", keep="last")
+    table = to_snapshot_table(frame.reset_index(drop=True))
+    # 종목코드는 조회 필터/통계에 쓰이므로 고정폭 바이트 대신 문자열로
+    i = table.column_names.index("종목코드")
+    table = table.set_column(i, "종목코드", pa.array(frame["종목코드"].astype(str).tolist(), pa.string()))
+    table = table.sort_by("종목코드")
+
+    directory = partition_dir(date, root)
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, PART_FILE)
+    tmp_path = f"{path}.tmp"
+    pq.write_table(table, tmp_path, compression="zstd", row_group_size=len(frame) or None)
+    os.replace(tmp_path, path)
+    return len(frame)
+
+
+def read_history(codes=None, start=None, end=None, columns=None, root=None):
+    # 종목코드/기간 조건으로 열 단위 스캔: 기간 밖 파티션과 요청하지 않은 열은 읽지 않음
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+
+    root = root or HISTORY_DIR
+    dates = [d for d in history_dates(root) if (start is None or d >= str(start)) and (end is None or d <= str(end))]
+    if not dates:
+        return pd.DataFrame(columns=[BASE_DATE_COL, "종목코드"] + list(columns or []))
+    partitioning = ds.partitioning(pa.schema([(PARTITION_KEY, pa.string())]), flavor="hive")
+    dataset = ds.dataset([os.path.join(partition_dir(d, root), PART_FILE) for d in dates],
+                         format="parquet", partitioning=partitioning, partition_base_dir=root)
+    expr = None
+    if codes is not None:
+        codes = [str(c).zfill(6) for c in ([codes] if isinstance(codes, str) else codes)]
+        expr = ds.field("종목코드").isin(codes)
+    wanted = None
+    if columns is not None:
+        wanted = [PARTITION_KEY, "종목코드"] + [c for c in columns if c in dataset.schema.names and c != "종목코드"]
+    table = dataset.to_table(columns=wanted, filter=expr)
+    df = table.to_pandas().rename(columns={PARTITION_KEY: BASE_DATE_COL})
+    return df.sort_values([BASE_DATE_COL, "종목코드"]).reset_index(drop=True)
+
+
+def history_series(code, column, start=None, end=None, root=None):
+    # 한 종목의 일자별 값 (예: 90일 점수 추이)
+    df = read_history([code], start, end, [column], root)
+    return pd.Series(df[column].to_numpy(), index=pd.to_datetime(df[BASE_DATE_COL]), name=column)
+
+
+def own_percentile(column, codes=None, start=None, end=None, root=None):
+    # 종목별 최신 값이 자기 과거 분포에서 몇 %인지 (0~100), 이력이 없는 종목은 NaN
+    df = read_history(codes, start, end, [column], root).dropna(subset=[column])
+    if df.empty:
+        return pd.Series(dtype=float, name=f"{column}_pct")
+    latest = df.groupby("종목코드")[column].transform("last")
+    below = (df[column] < latest).groupby(df["종목코드"]).sum()
+    equal = (df[column] == latest).groupby(df["종목코드"]).sum()
+    count = df.groupby("종목코드")[column].count()
+    return ((below + 0.5 * equal) / count * 100).rename(f"{column}_pct")
+
+
+def main(argv=None):
+    # 예: python -m modules.stock_history 005930 --column score_aggressive --days 90
+    parser = argparse.ArgumentParser(description="일자별 이력 조회")
+    parser.add_argument("code")
+    parser.add_argument("--column", default="score_aggressive")
+    parser.add_argument("--days", type=int, default=90)
+    args = parser.parse_args(argv)
+    start = (datetime.today() - timedelta(days=args.days)).strftime("%Y%m%d")
+    series = history_series(args.code, args.column, start)
+    print(series.to_string())
+    pct = own_percentile(args.column, [args.code], start)
+    if not pct.empty:
+        print(f"최신 값의 기간 내 백분위: {pct.iloc[0]:.1f}")
+
+
+if __name__ == "__main__":
+    main()
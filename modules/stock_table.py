@@ -0,0 +1,245 @@
+# modules/stock_table.py
+
+import hashlib
+import os
+import sys
+import threading
+
+import numpy as np
+import pandas as pd
+
+from modules import stock_db
+from modules.calculate_indicators import INDICATOR_COLS
+from modules.score_utils import FACTORS, SCORE_COLS, STYLES, compute_all_scores
+from modules.signals import SIGNAL_COLS
+
+STOCK_TABLE_PATH = "filtered_stocks.csv"
+# "csv"(기본) 또는 "sqlite": sqlite 사용 시에도 CSV는 내보내기용으로 함께 기록
+STOCK_BACKEND = os.environ.get("STOCK_BACKEND", "csv")
+EXPECTED_COLS = ["종목명", "종목코드", "현재가", "PER", "PBR", "EPS", "BPS", "배당률"]
+
+# sqlite 개별 갱신 시 점수 재계산에 읽는 컬럼
+SCORE_INPUT_COLS = ["종목코드", "종목명"] + FACTORS
+# sqlite 인덱스로 처리하는 비교 (!=는 결측 처리가 배열 비교와 달라 제외)
+INDEXED_OPS = {"<": "<", "<=": "<=", ">": ">", ">=": ">=", "=": "=", "==": "="}
+
+# 타입 지정 바이너리 스냅샷 (Arrow IPC/Feather v2, 비압축이라 메모리 매핑 그대로 사용)
+# 스키마를 바꾸면 버전을 올림: 버전이 다른 스냅샷은 무시하고 CSV로 읽음
+SNAPSHOT_SCHEMA_VERSION = 2
+SNAPSHOT_EXT = ".feather"
+CATEGORY_COLS = ["종목명", "시장구분", "기준일"] + [f"신뢰등급_{style}" for style in STYLES]
+ORDERED_CATEGORY_COLS = ["기준일"]  # YYYYMMDD 문자열: 정렬 순서 = 날짜 순서 (max() 가능)
+FIXED_WIDTH_COLS = {"종목코드": 6}
+FLOAT32_COLS = (
+    ["PER", "PBR", "EPS", "BPS", "배당률"] + INDICATOR_COLS + [f"score_{style}" for style in STYLES]
+)
+FLOAT64_COLS = ["현재가", "거래량", "거래대금"]  # 거래대금은 float32 정밀도(7자리)를 넘음
+INT32_COLS = [f"rank_{style}" for style in STYLES]
+BOOL_COLS = SIGNAL_COLS
+
+# Streamlit 세션들이 한 프로세스에서 동시에 갱신하는 경우 대비
+_table_lock = threading.Lock()
+
+
+def snapshot_path(path=STOCK_TABLE_PATH):
+    return os.path.splitext(path)[0] + SNAPSHOT_EXT
+
+
+def _fixed_width_array(pa, values, width):
+    raw = np.asarray(pd.Series(values).fillna("").astype(str).str.encode("utf-8"), dtype=f"S{width}")
+    return pa.FixedSizeBinaryArray.from_buffers(pa.binary(width), len(raw), [None, pa.py_buffer(raw.tobytes())])
+
+
+def _decode_fixed_width(column, width):
+    # 고정폭 바이트 -> str (채움 바이트 제거), 빈 값은 None
+    chunks = []
+    for chunk in column.chunks:
+        raw = np.frombuffer(chunk.buffers()[1], dtype=f"S{width}", count=len(chunk) + chunk.offset)[chunk.offset:]
+        chunks.append(raw.astype(f"U{width}"))
+    values = np.concatenate(chunks).astype(object) if chunks else np.array([], dtype=object)
+    values[values == ""] = None
+    return values
+
+
+def to_snapshot_table(df, source_hash=None):
+    import pyarrow as pa
+
+    arrays, fields = [], []
+    for col in df.columns:
+        values = df[col]
+        if col in FIXED_WIDTH_COLS:
+            array = _fixed_width_array(pa, values, FIXED_WIDTH_COLS[col])
+        elif col in CATEGORY_COLS:
+            values = values.astype(object).where(values.notna(), None)
+            dtype = pd.CategoricalDtype(sorted(values.dropna().astype(str).unique()), ordered=True) \
+                if col in ORDERED_CATEGORY_COLS else "category"
+            array = pa.DictionaryArray.from_pandas(values.astype(dtype))
+        elif col in FLOAT32_COLS or col in FLOAT64_COLS:
+            # NaN은 null 대신 값으로 저장해 읽을 때 zero-copy 변환 유지
+            dtype = np.float32 if col in FLOAT32_COLS else np.float64
+            array = pa.array(pd.to_numeric(values, errors="coerce").to_numpy(dtype=dtype, na_value=np.nan))
+        elif col in INT32_COLS:
+            numeric = pd.to_numeric(values, errors="coerce")
+            array = pa.array(numeric.fillna(0).to_numpy(dtype=np.int32)) if numeric.notna().all() else \
+                pa.array(numeric.to_numpy(dtype=np.float32, na_value=np.nan))
+        elif col in BOOL_COLS:
+            array = pa.array(values.eq(True).to_numpy())
+        else:
+            array = pa.Array.from_pandas(values)
+        arrays.append(array)
+        fields.append(pa.field(col, array.type))
+    metadata = {"schema_version": str(SNAPSHOT_SCHEMA_VERSION)}
+    if source_hash is not None:
+        metadata["source_hash"] = source_hash
+    return pa.Table.from_arrays(arrays, schema=pa.schema(fields, metadata=metadata))
+
+
+def write_snapshot(df, path=None, source_hash=None):
+    import pyarrow.feather as feather
+
+    path = path or snapshot_path()
+    tmp_path = f"{path}.tmp"
+    feather.write_feather(to_snapshot_table(df, source_hash), tmp_path, compression="uncompressed")
+    os.replace(tmp_path, path)
+
+
+def read_snapshot(path=None, source_hash=None):
+    # 메모리 매핑으로 열어 숫자 열은 복사 없이 DataFrame으로 변환
+    # 스키마 버전이 다르거나 함께 기록한 CSV 내용 해시와 다르면(CSV만 바뀐 경우) None
+    import pyarrow.feather as feather
+
+    path = path or snapshot_path()
+    table = feather.read_table(path, memory_map=True)
+    metadata = table.schema.metadata or {}
+    if metadata.get(b"schema_version") != str(SNAPSHOT_SCHEMA_VERSION).encode():
+        return None
+    if source_hash is not None and metadata.get(b"source_hash") not in (None, source_hash.encode()):
+        return None
+    fixed = {col: _decode_fixed_width(table.column(col), width)
+             for col, width in FIXED_WIDTH_COLS.items() if col in table.column_names}
+    df = table.drop_columns(list(fixed)).to_pandas(split_blocks=True)
+    for col, values in fixed.items():
+        df[col] = values
+    return df[table.column_names]
+
+
+def _file_hash(path):
+    # CSV 내용 해시: 크기가 같은 수정이나 체크아웃으로 mtime만 바뀐 경우도 구분
+    digest = hashlib.blake2b(digest_size=16)
+    try:
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                digest.update(chunk)
+    except OSError:
+        return None
+    return digest.hexdigest()
+
+
+def read_stock_csv(path=STOCK_TABLE_PATH):
+    # 원본(내보내기 기준) CSV: 스냅샷의 float32 반올림 없이 전체 정밀도
+    df = pd.read_csv(path, dtype={'종목코드': str, '기준일': str})
+    for col in EXPECTED_COLS:
+        if col not in df.columns:
+            df[col] = np.nan
+    return df
+
+
+def read_stock_table(path=STOCK_TABLE_PATH, backend=None):
+    df = None
+    if (backend or STOCK_BACKEND) == "sqlite":
+        df = stock_db.read_stocks()
+    elif os.path.exists(snapshot_path(path)):
+        try:
+            df = read_snapshot(snapshot_path(path), _file_hash(path))
+        except Exception as e:
+            print(f"[stock_table] 스냅샷 읽기 실패, CSV 사용: {e}", file=sys.stderr)
+    if df is None:
+        return read_stock_csv(path)
+    for col in EXPECTED_COLS:
+        if col not in df.columns:
+            df[col] = np.nan
+    return df
+
+
+def get_stock_row(code, style=None, backend=None):
+    # sqlite 백엔드: 종목코드 기본키 조회 (style이면 해당 성향 점수를 score/신뢰등급으로), CSV 백엔드는 None
+    if (backend or STOCK_BACKEND) != "sqlite":
+        return None
+    row = stock_db.get_stock(code)
+    if row is not None and style in STYLES:
+        row = pd.concat([row, pd.Series({"score": row.get(f"score_{style}"), "신뢰등급": row.get(f"신뢰등급_{style}")})])
+    return row
+
+
+def indexed_codes(col, op, value, backend=None):
+    # sqlite 백엔드의 인덱스 컬럼 비교면 일치 종목코드 목록, 아니면 None (호출 측에서 배열 비교)
+    if (backend or STOCK_BACKEND) != "sqlite" or col not in stock_db.INDEXED_COLS or op not in INDEXED_OPS:
+        return None
+    return stock_db.query_codes([(col, INDEXED_OPS[op], value)])
+
+
+def export_csv(df, path=STOCK_TABLE_PATH):
+    # 임시 파일에 쓴 뒤 rename: 중간 실패 시에도 기존 파일 유지
+    tmp_path = f"{path}.tmp"
+    df.to_csv(tmp_path, index=False, encoding='utf-8-sig')
+    os.replace(tmp_path, path)
+
+
+def publish_snapshot(df, path=STOCK_TABLE_PATH):
+    # CSV를 쓴 뒤 호출: 스냅샷 실패는 CSV 경로로 대체되므로 기록만 남김
+    try:
+        write_snapshot(df, snapshot_path(path), _file_hash(path))
+    except Exception as e:
+        print(f"[stock_table] 스냅샷 저장 실패: {e}", file=sys.stderr)
+
+
+def write_stock_table(df, path=STOCK_TABLE_PATH, backend=None):
+    if (backend or STOCK_BACKEND) == "sqlite":
+        stock_db.write_stocks(df)
+    export_csv(df, path)
+    publish_snapshot(df, path)
+
+
+def table_version(path=STOCK_TABLE_PATH, backend=None):
+    if (backend or STOCK_BACKEND) == "sqlite":
+        return stock_db.data_version()
+    # CSV와 스냅샷 중 하나라도 바뀌면 새 버전
+    versions = []
+    for file_path in (path, snapshot_path(path)):
+        try:
+            versions.append(os.path.getmtime(file_path))
+        except OSError:
+            versions.append(None)
+    return None if versions == [None, None] else tuple(versions)
+
+
+def upsert_stock_row(row, path=STOCK_TABLE_PATH, backend=None):
+    # 한 종목 행만 교체(없으면 추가)하고 점수 재계산 후 원자적으로 저장
+    code = str(row["종목코드"]).zfill(6)
+    values = {k: v for k, v in row.items() if k != "종목코드"}
+    with _table_lock:
+        if (backend or STOCK_BACKEND) == "sqlite":
+            # 종목코드 기본키로 한 행만 UPSERT, 점수는 팩터 열만 읽어 재계산 후 값이 바뀐 종목의 점수 행만 기록
+            # (CSV/스냅샷은 야간 작업이 내보냄)
+            stock_db.upsert_stock({"종목코드": code, **values})
+            stored = stock_db.read_stocks(columns=SCORE_INPUT_COLS + SCORE_COLS)
+            df = compute_all_scores(stored.drop(columns=SCORE_COLS, errors="ignore"))
+            before = stored.reindex(columns=SCORE_COLS).astype(object)
+            after = df[SCORE_COLS].astype(object)
+            changed = ~((before == after) | (before.isna() & after.isna())).all(axis=1)
+            stock_db.write_scores(df.loc[changed, ["종목코드"] + SCORE_COLS])
+            return df[["종목코드", "종목명"] + FACTORS + SCORE_COLS]
+        # 스냅샷(float32)을 거쳐 다시 쓰면 CSV 전체가 반올림되므로 수정은 항상 CSV 원본에서
+        df = read_stock_csv(path)
+        columns = list(df.columns) + [c for c in list(values) + SCORE_COLS if c not in df.columns]
+        hit = df.index[df["종목코드"] == code]
+        if len(hit):
+            for col, val in values.items():
+                df.loc[hit[0], col] = val
+        else:
+            df = pd.concat([df, pd.DataFrame([{"종목코드": code, **values}])], ignore_index=True)
+        # z-score 통계는 열 전체에 걸리므로 점수는 전체 행 기준으로 재계산
+        df = compute_all_scores(df).reindex(columns=columns)
+        export_csv(df, path)
+        publish_snapshot(df, path)
+    return df
@@ -0,0 +1,243 @@
+# modules/tracing.py
+
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+TRACE_DIR = os.environ.get("TRACE_DIR", "traces")
+TRACE_ENABLED = os.environ.get("TRACE_ENABLED", "1") != "0"
+# spans.jsonl이 이 크기를 넘으면 spans.jsonl.1로 넘기고 새로 시작 (직전 파일 1개만 보관)
+TRACE_MAX_BYTES = int(os.environ.get("TRACE_MAX_BYTES", 5 * 1024 * 1024))
+SPANS_FILE = "spans.jsonl"
+METRICS_FILE = "metrics.prom"
+# 지연 히스토그램 버킷 (초)
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class Histogram:
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, seconds):
+        i = 0
+        while i < len(BUCKETS) and seconds > BUCKETS[i]:
+            i += 1
+        self.counts[i] += 1
+        self.total += seconds
+        self.count += 1
+
+
+class Registry:
+    # 외부 호출별 지연 히스토그램 + 성공/실패 카운터, 단계별 소요 시간 히스토그램
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.calls = {}
+        self.results = {}
+        self.stages = {}
+
+    def observe_call(self, name, seconds, ok):
+        with self.lock:
+            self.calls.setdefault(name, Histogram()).observe(seconds)
+            key = (name, "success" if ok else "failure")
+            self.results[key] = self.results.get(key, 0) + 1
+
+    def observe_stage(self, name, seconds):
+        with self.lock:
+            self.stages.setdefault(name, Histogram()).observe(seconds)
+
+    def call_summary(self):
+        with self.lock:
+            return [
+                {
+                    "call": name, "count": h.count, "avg_ms": h.total / h.count * 1e3 if h.count else 0.0,
+                    "success": self.results.get((name, "success"), 0),
+                    "failure": self.results.get((name, "failure"), 0),
+                }
+                for name, h in sorted(self.calls.items())
+            ]
+
+    def to_prometheus(self):
+        lines = []
+
+        def histogram(metric, label, items):
+            lines.append(f"# TYPE {metric} histogram")
+            for name, h in sorted(items):
+                cumulative = 0
+                for bound, n in zip(BUCKETS + ("+Inf",), h.counts):
+                    cumulative += n
+                    lines.append(f'{metric}_bucket{{{label}="{_escape(name)}",le="{bound}"}} {cumulative}')
+                lines.append(f'{metric}_sum{{{label}="{_escape(name)}"}} {h.total:.6f}')
+                lines.append(f'{metric}_count{{{label}="{_escape(name)}"}} {h.count}')
+
+        with self.lock:
+            histogram("upstream_call_seconds", "call", self.calls.items())
+            lines.append("# TYPE upstream_calls_total counter")
+            for (name, result), n in sorted(self.results.items()):
+                lines.append(f'upstream_calls_total{{call="{_escape(name)}",result="{result}"}} {n}')
+            histogram("stage_seconds", "stage", self.stages.items())
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+registry = Registry()
+_local = threading.local()
+_last_traces = {}
+_file_lock = threading.Lock()
+
+
+def _stack():
+    if not hasattr(_local, "stack"):
+        _local.stack = []
+    return _local.stack
+
+
+class Span:
+    def __init__(self, name, attrs=None):
+        self.name = name
+        self.attrs = attrs or {}
+        self.children = []
+        self.start = time.perf_counter()
+        self.started_at = time.time()
+        self.duration = None
+
+    def to_dict(self):
+        return {
+            "name": self.name, "ms": round((self.duration or 0.0) * 1e3, 3), **self.attrs,
+            "children": [child.to_dict() for child in self.children],
+        }
+
+
+def start_trace(name, **attrs):
+    # 스레드의 최상위 스팬 시작 (이전 실행이 중단돼 남은 스택은 버림)
+    stack = _stack()
+    stack.clear()
+    root = Span(name, attrs)
+    stack.append(root)
+    return root
+
+
+def finish_trace():
+    # 최상위 스팬 종료 -> 파일 기록, 마지막 트레이스로 보관
+    stack = _stack()
+    if not stack:
+        return None
+    root = stack[0]
+    while len(stack) > 1:
+        _close(stack.pop())
+    _close(stack.pop())
+    _last_traces[root.name] = root
+    if TRACE_ENABLED:
+        try:
+            export(root)
+        except Exception as e:
+            print(f"[tracing] 기록 실패: {e}", file=sys.stderr)
+    return root
+
+
+def _close(span):
+    if span.duration is None:
+        span.duration = time.perf_counter() - span.start
+        registry.observe_stage(span.name, span.duration)
+
+
+@contextmanager
+def span(name, **attrs):
+    # 중첩 스팬: 진행 중인 트레이스가 없으면 이 스팬이 최상위가 되어 종료 시 기록됨
+    stack = _stack()
+    is_root = not stack
+    current = start_trace(name, **attrs) if is_root else Span(name, attrs)
+    if not is_root:
+        stack[-1].children.append(current)
+        stack.append(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.attrs["error"] = type(e).__name__
+        raise
+    finally:
+        if is_root:
+            if stack and stack[0] is current:
+                finish_trace()
+        elif stack and stack[-1] is current:
+            _close(stack.pop())
+
+
+def stage(name, **attrs):
+    # 스크립트형 코드용: 최상위 스팬 아래 직전 단계를 닫고 다음 단계 시작 (트레이스가 없으면 무시)
+    stack = _stack()
+    if not stack:
+        return None
+    while len(stack) > 1:
+        _close(stack.pop())
+    current = Span(name, attrs)
+    stack[0].children.append(current)
+    stack.append(current)
+    return current
+
+
+def last_trace(name):
+    return _last_traces.get(name)
+
+
+def observe_call(name, seconds, ok):
+    registry.observe_call(name, seconds, ok)
+
+
+def timed_call(name, fn, *args, **kwargs):
+    # 외부 호출 1회를 측정해 히스토그램/카운터에 반영
+    start = time.perf_counter()
+    try:
+        result = fn(*args, **kwargs)
+    except BaseException:
+        observe_call(name, time.perf_counter() - start, False)
+        raise
+    observe_call(name, time.perf_counter() - start, True)
+    return result
+
+
+def flatten(root):
+    # 트리 -> (깊이, 이름, ms) 목록 (디버그 패널/로그 출력용)
+    rows = []
+
+    def walk(span, depth):
+        rows.append({"단계": "　" * depth + span.name, "ms": round((span.duration or 0.0) * 1e3, 1)})
+        for child in span.children:
+            walk(child, depth + 1)
+
+    walk(root, 0)
+    return rows
+
+
+def format_trace(root):
+    return "\n".join(f"{row['단계']:<40} {row['ms']:>10.1f} ms" for row in flatten(root))
+
+
+def set_export(enabled):
+    # 파일 기록 여부 (메모리의 마지막 트레이스/레지스트리는 항상 유지)
+    global TRACE_ENABLED
+    TRACE_ENABLED = bool(enabled)
+
+
+def export(root, directory=None):
+    directory = directory or TRACE_DIR
+    os.makedirs(directory, exist_ok=True)
+    record = {"ts": datetime.fromtimestamp(root.started_at).isoformat(timespec="milliseconds"), **root.to_dict()}
+    spans_path = os.path.join(directory, SPANS_FILE)
+    with _file_lock:
+        if os.path.exists(spans_path) and os.path.getsize(spans_path) >= TRACE_MAX_BYTES:
+            os.replace(spans_path, f"{spans_path}.1")
+        with open(spans_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        path = os.path.join(directory, METRICS_FILE)
+        with open(f"{path}.tmp", "w", encoding="utf-8") as f:
+            f.write(registry.to_prometheus())
+        os.replace(f"{path}.tmp", path)
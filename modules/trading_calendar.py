@@ -0,0 +1,121 @@
+# modules/trading_calendar.py
+
+import json
+import os
+import sys
+import threading
+from datetime import datetime, timedelta
+
+CALENDAR_PATH = "trading_calendar.json"
+REFERENCE_TICKER = "005930"  # 삼성전자: 모든 거래일에 시세가 존재
+BOOTSTRAP_DAYS = 400
+
+
+def fetch_sessions(start, end):
+    from pykrx import stock
+    from modules.tracing import timed_call
+    df = timed_call("get_market_ohlcv_by_date", stock.get_market_ohlcv_by_date, start, end, REFERENCE_TICKER)
+    if df is None or df.empty:
+        return []
+    return [d.strftime("%Y%m%d") for d in df.index]
+
+
+def _has_weekday(start, end):
+    day, last = datetime.strptime(start, "%Y%m%d"), datetime.strptime(end, "%Y%m%d")
+    while day <= last:
+        if day.weekday() < 5:
+            return True
+        day += timedelta(days=1)
+    return False
+
+
+class TradingCalendar:
+    def __init__(self, path=CALENDAR_PATH, fetch=fetch_sessions):
+        self.path = path
+        self.fetch = fetch
+        self.sessions = []
+        self.checked = None  # 이 날짜까지는 거래일 목록이 확정됨
+        self.refreshed_on = None
+        self.lock = threading.Lock()
+        self.load()
+
+    def load(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+            self.sessions = sorted(set(data.get("sessions", [])))
+            self.checked = data.get("checked")
+        except Exception:
+            self.sessions, self.checked = [], None
+
+    def save(self):
+        tmp_path = f"{self.path}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"checked": self.checked, "sessions": self.sessions}, f)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            print(f"[trading_calendar] 저장 실패: {e}", file=sys.stderr)
+
+    def refresh(self, today=None):
+        today = today or datetime.today().strftime("%Y%m%d")
+        with self.lock:
+            # 실행(프로세스)당 하루 한 번만 조회
+            if self.refreshed_on == today:
+                return
+            if self.checked:
+                start = (datetime.strptime(self.checked, "%Y%m%d") + timedelta(days=1)).strftime("%Y%m%d")
+            else:
+                start = (datetime.strptime(today, "%Y%m%d") - timedelta(days=BOOTSTRAP_DAYS)).strftime("%Y%m%d")
+            if start <= today:
+                try:
+                    new_sessions = self.fetch(start, today)
+                except Exception as e:
+                    print(f"[trading_calendar] 거래일 조회 실패: {e}", file=sys.stderr)
+                    return
+                self.sessions = sorted(set(self.sessions) | set(new_sessions))
+                # 당일 장 마감 전일 수 있으므로 확정 범위는 전날까지
+                # pykrx는 오류 시 빈 결과를 주기도 하므로, 평일이 낀 구간이 비어 있으면 확정하지 않고 다음에 다시 조회
+                yesterday = (datetime.strptime(today, "%Y%m%d") - timedelta(days=1)).strftime("%Y%m%d")
+                if new_sessions or not _has_weekday(start, yesterday):
+                    self.checked = max(self.checked or yesterday, yesterday)
+                    self.save()
+            self.refreshed_on = today
+
+    def latest_session(self, today=None):
+        today = today or datetime.today().strftime("%Y%m%d")
+        self.refresh(today)
+        past = [d for d in self.sessions if d <= today]
+        if past:
+            return past[-1]
+        # 캘린더를 못 구한 경우 주말만 건너뛰는 추정값
+        day = datetime.strptime(today, "%Y%m%d")
+        while day.weekday() >= 5:
+            day -= timedelta(days=1)
+        return day.strftime("%Y%m%d")
+
+    def recent_sessions(self, n, end=None):
+        end = self.latest_session(end)
+        past = [d for d in self.sessions if d <= end]
+        return past[-n:] if past else [end]
+
+    def is_session(self, date):
+        self.refresh()
+        return date in self.sessions
+
+    def window(self, days=365, end=None):
+        end = self.latest_session(end)
+        start = (datetime.strptime(end, "%Y%m%d") - timedelta(days=days)).strftime("%Y%m%d")
+        return start, end
+
+
+_calendar = None
+_calendar_lock = threading.Lock()
+
+
+def get_calendar():
+    global _calendar
+    with _calendar_lock:
+        if _calendar is None:
+            _calendar = TradingCalendar()
+        return _calendar
@@ -0,0 +1,99 @@
+# modules/update_journal.py
+
+import json
+import os
+from datetime import datetime
+
+import pandas as pd
+
+JOURNAL_PATH = "filtered_stocks.journal.jsonl"
+CHECKPOINT_PATH = "filtered_stocks.checkpoint.json"
+BASE_DATE_COL = "기준일"
+
+
+class UpdateJournal:
+    # 완료된 종목 행을 한 줄씩 추가 기록, 재시작 시 같은 기준일 행은 건너뜀
+    def __init__(self, target_date, path=JOURNAL_PATH, checkpoint_path=CHECKPOINT_PATH, checkpoint_every=200):
+        self.target_date = str(target_date)
+        self.path = path
+        self.checkpoint_path = checkpoint_path
+        self.checkpoint_every = checkpoint_every
+        self.done = set()
+        self.since_checkpoint = 0
+        self._recover()
+        self.file = open(self.path, "a", encoding="utf-8")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _read_rows(self):
+        rows = []
+        if not os.path.exists(self.path):
+            return rows
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    row = json.loads(line)
+                except ValueError:
+                    continue  # 기록 도중 중단된 마지막 줄
+                if row.get(BASE_DATE_COL) == self.target_date:
+                    rows.append(row)
+        return rows
+
+    def _recover(self):
+        rows = self._read_rows()
+        if not rows and os.path.exists(self.path):
+            # 다른 기준일의 저널은 폐기
+            os.remove(self.path)
+        # 시세 없이 기록된 행은 완료로 보지 않고 다시 조회
+        self.done = {row["종목코드"] for row in rows if row.get("현재가") is not None}
+
+    def append(self, row):
+        row = {**row, BASE_DATE_COL: self.target_date}
+        self.file.write(json.dumps(row, ensure_ascii=False, default=float) + "\n")
+        self.file.flush()
+        self.done.add(row["종목코드"])
+        self.since_checkpoint += 1
+        if self.since_checkpoint >= self.checkpoint_every:
+            self.checkpoint()
+
+    def append_frame(self, df):
+        for row in df.to_dict(orient="records"):
+            row = {**row, BASE_DATE_COL: self.target_date}
+            self.file.write(json.dumps(row, ensure_ascii=False, default=float) + "\n")
+            self.done.add(row["종목코드"])
+        self.checkpoint()
+
+    def checkpoint(self):
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        tmp_path = f"{self.checkpoint_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({
+                BASE_DATE_COL: self.target_date,
+                "rows": len(self.done),
+                "updated_at": datetime.now().isoformat(timespec="seconds"),
+            }, f, ensure_ascii=False)
+        os.replace(tmp_path, self.checkpoint_path)
+        self.since_checkpoint = 0
+
+    def read_frame(self):
+        rows = self._read_rows()
+        if not rows:
+            return pd.DataFrame(columns=["종목코드", BASE_DATE_COL])
+        return pd.DataFrame(rows).drop_duplicates(subset="종목코드", keep="last")
+
+    def close(self):
+        if not self.file.closed:
+            self.checkpoint()
+            self.file.close()
+
+    def clear(self):
+        # 최종 파일 교체 후 호출
+        self.close()
+        for path in (self.path, self.checkpoint_path):
+            if os.path.exists(path):
+                os.remove(path)
@@ -0,0 +1,184 @@
+# modules/watchlist.py
+
+import json
+import os
+import sys
+import threading
+import time
+
+from modules.calculate_indicators import add_tech_indicators
+from modules.fetch_news import get_news_service
+from modules.price_store import bar_path, load_price_history, needs_refill
+from modules.tracing import span
+
+# favorites.json은 배포 체크아웃에 있는 공용 기본 목록(URL에 목록이 없는 새 세션의 초깃값)으로만 읽음
+# 사용자별 추가/해제는 URL 쿼리(?fav=005930,000660)에 저장해 새로고침/북마크 후에도 유지하고 이 파일은 바꾸지 않음
+FAVORITES_PARAM = "fav"
+FAVORITES_PATH = os.environ.get("FAVORITES_PATH", "favorites.json")
+WATCH_INTERVAL = float(os.environ.get("WATCH_INTERVAL", 300))  # 관심종목 재확인 주기 (초)
+WATCH_IDLE = float(os.environ.get("WATCH_IDLE", 3600))  # 이 시간 동안 재실행이 없는 세션의 목록은 제외 (초)
+MAX_WATCH = 30
+
+
+def load_favorites(path=FAVORITES_PATH):
+    # ["005930", ...] (이전 형식 [{"종목코드": ...}]도 허용), 파일이 없거나 깨졌으면 빈 목록
+    try:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return []
+    codes = []
+    for item in data if isinstance(data, list) else []:
+        code = item.get("종목코드") if isinstance(item, dict) else item
+        if code is not None and str(code).zfill(6) not in codes:
+            codes.append(str(code).zfill(6))
+    return codes
+
+
+def parse_favorites(text):
+    # 쿼리 값 "005930,000660" -> 코드 목록 (빈 문자열이면 빈 목록: 모두 해제한 상태)
+    codes = []
+    for code in str(text).split(","):
+        code = code.strip()
+        if code.isdigit() and code.zfill(6) not in codes:
+            codes.append(code.zfill(6))
+    return codes[:MAX_WATCH]
+
+
+def format_favorites(codes):
+    return ",".join(codes)
+
+
+def toggle_favorite(codes, code):
+    # 있으면 해제, 없으면 추가 (최대 MAX_WATCH개), 새 목록 반환 (저장하지 않음)
+    code = str(code).zfill(6)
+    if code in codes:
+        return [c for c in codes if c != code]
+    return list(codes) + [code] if len(codes) < MAX_WATCH else list(codes)
+
+
+def _price_version(code):
+    try:
+        return os.path.getmtime(bar_path(code))
+    except OSError:
+        return None
+
+
+class WarmEntry:
+    def __init__(self, window, version, frame, warmed_at):
+        self.window = window
+        self.version = version
+        self.frame = frame
+        self.warmed_at = warmed_at
+
+
+class WatchlistWarmer:
+    # 관심종목의 가격 이력(+지표)과 뉴스를 백그라운드 스레드에서 미리 받아 프로세스 공유 캐시에 유지
+    # 세션별 목록의 합집합을 준비하고, 화면에서는 get()으로 캐시만 조회하고 외부 호출은 하지 않음
+    # 관심종목이 아닌 종목의 저장소 부족분도 refill()로 받아 이 스레드에서 pykrx로 보충
+    def __init__(self, interval=WATCH_INTERVAL, news_service=None, idle=WATCH_IDLE):
+        self.interval = interval
+        self.idle = idle
+        self.news_service = news_service
+        self._owners = {}  # 세션 id -> (종목명 목록, 마지막 watch 시각)
+        self._targets = {}
+        self._window = None
+        self._cache = {}
+        self._refills = []
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+
+    def watch(self, names_by_code, start, end, owner=None):
+        # owner(세션)의 목록을 갱신하고 전체 대상/구간이 바뀌었을 때만 워커를 깨움 (재실행마다 호출해도 부담 없음)
+        now = time.monotonic()
+        window = (str(start), str(end))
+        with self._lock:
+            self._owners[owner] = ({str(c).zfill(6): name for c, name in names_by_code.items()}, now)
+            self._owners = {o: v for o, v in self._owners.items() if now - v[1] < self.idle}
+            targets = {}
+            for names, _ in self._owners.values():
+                targets.update(names)
+            changed = targets != self._targets or window != self._window
+            self._targets, self._window = targets, window
+            self._ensure_thread()
+        if changed:
+            self._wake.set()
+
+    def refill(self, code, start, end):
+        # 저장소가 구간을 덮지 못하면 백그라운드 보충 예약, 예약했으면 True (보충 후 가격 파일 버전이 바뀜)
+        code, job = str(code).zfill(6), (str(code).zfill(6), str(start), str(end))
+        if not needs_refill(code, str(start), str(end)):
+            return False
+        with self._lock:
+            if job not in self._refills:
+                self._refills.append(job)
+            self._ensure_thread()
+        self._wake.set()
+        return True
+
+    def _ensure_thread(self):
+        # self._lock 안에서 호출
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="watchlist", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            # 처리 중 watch()가 다시 깨우면 대기 없이 한 번 더 처리
+            self._wake.clear()
+            with self._lock:
+                targets, window = dict(self._targets), self._window
+                refills, self._refills = self._refills, []
+            for code, start, end in refills:
+                with span("refill", code=code):
+                    load_price_history(code, start, end)
+            if targets and window:
+                with span("watchlist_warm", tickers=len(targets)):
+                    for code, name in targets.items():
+                        try:
+                            self.warm(code, name, window)
+                        except Exception as e:
+                            print(f"[watchlist][{code}] 준비 실패: {e}", file=sys.stderr)
+                with self._lock:
+                    self._cache = {c: entry for c, entry in self._cache.items() if c in self._targets}
+            self._wake.wait(self.interval)
+
+    def warm(self, code, name, window):
+        with span("warm", code=code):
+            with self._lock:
+                entry = self._cache.get(code)
+            if entry is None or entry.window != window or entry.version != _price_version(code):
+                # 저장소에 없거나 부족한 구간은 여기(백그라운드)에서만 pykrx로 보충
+                df = load_price_history(code, *window)
+                frame = add_tech_indicators(df) if df is not None and not df.empty else None
+                with self._lock:
+                    self._cache[code] = WarmEntry(window, _price_version(code), frame, time.time())
+            if name:
+                (self.news_service or get_news_service()).prefetch([name])
+
+    def get(self, code, start=None, end=None):
+        # 준비된 지표 프레임 사본, 아직 없거나 구간이 다르면 None
+        with self._lock:
+            entry = self._cache.get(str(code).zfill(6))
+        if entry is None or entry.frame is None:
+            return None
+        if start is not None and entry.window != (str(start), str(end)):
+            return None
+        return entry.frame.copy()
+
+    def status(self):
+        with self._lock:
+            return {code: entry.warmed_at for code, entry in self._cache.items() if code in self._targets}
+
+
+_default_warmer = None
+_default_lock = threading.Lock()
+
+
+def get_watchlist_warmer():
+    global _default_warmer
+    with _default_lock:
+        if _default_warmer is None:
+            _default_warmer = WatchlistWarmer()
+        return _default_warmer
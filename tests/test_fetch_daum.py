@@ -0,0 +1,71 @@
+# tests/test_fetch_daum.py
+# 녹화 형식 응답(tests/fixtures/daum)을 FixtureSession으로 재생해 DaumClient 파싱/페이지 처리 확인
+# 실행: python -m pytest -q tests
+
+import os
+
+import pytest
+
+from modules.fetch_daum import DaumClient, FixtureSession, parse_financials, parse_price_pages
+
+FIXTURE_DIR = os.path.join(os.path.dirname(__file__), "fixtures", "daum")
+
+
+@pytest.fixture
+def session():
+    return FixtureSession(FIXTURE_DIR)
+
+
+@pytest.fixture
+def client(session):
+    client = DaumClient(session=session, max_workers=2, pages=4, per_page=20)
+    yield client
+    client.close()
+
+
+def _pages(requests):
+    return sorted(params["page"] for url, params in requests if params)
+
+
+def test_parse_financials_reads_list_info(session):
+    res = session.get("https://finance.daum.net/quotes/A005930")
+    assert parse_financials(res.content) == ("13.45", "1.12", "8.57", "2.07")
+
+
+def test_parse_financials_missing_fields():
+    assert parse_financials(b"<html><body><ul class='list_info'></ul></body></html>") == (None, None, None, None)
+
+
+def test_parse_price_pages_sorts_ascending():
+    pages = [
+        [{"date": "2026-10-16 00:00:00", "openPrice": 10, "highPrice": 12, "lowPrice": 9,
+          "closePrice": 11, "tradeVolume": 100}],
+        [],
+        [{"date": "2026-10-15 00:00:00", "openPrice": 9, "highPrice": 10, "lowPrice": 8,
+          "closePrice": 10, "tradeVolume": 50}],
+    ]
+    df = parse_price_pages(pages)
+    assert list(df.columns) == ["Date", "Close", "Open", "High", "Low", "Volume"]
+    assert df["Date"].is_monotonic_increasing
+    assert df["Close"].tolist() == [10, 11]
+
+
+def test_empty_page_stops_later_pages(client, session):
+    df = client.get_price("005930")
+    # 3페이지가 비어 있으므로 4페이지 응답은 쓰지 않음
+    assert len(df) == 40
+    assert df["Date"].is_monotonic_increasing
+    assert df["Date"].is_unique
+
+
+def test_short_first_page_makes_single_request(client, session):
+    df = client.get_price("035420")
+    assert len(df) == 7
+    assert _pages(session.requests) == [1]
+
+
+def test_failed_first_page_still_reads_later_pages(client, session):
+    # 1페이지 404: 나머지 페이지는 그대로 조회 (기존 동작 유지)
+    df = client.get_price("000660")
+    assert len(df) == 45
+    assert _pages(session.requests) == [1, 2, 3, 4]
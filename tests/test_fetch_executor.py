@@ -0,0 +1,139 @@
+# tests/test_fetch_executor.py
+# 지연/장애를 주입한 가짜 pykrx.stock(benchmarks.fake_krx)으로 FetchExecutor 동작 확인
+# 실행: python -m pytest -q tests
+
+import time
+
+import pytest
+
+from benchmarks.fake_krx import FakeMarket
+from modules.fetch_executor import CallPoolExhausted, FetchExecutor, TokenBucket, krx_call
+
+
+@pytest.fixture
+def market():
+    return FakeMarket(n_tickers=5, years=1, seed=1)
+
+
+@pytest.fixture
+def date(market):
+    return market.day_keys[-1]
+
+
+def test_token_bucket_limits_rate():
+    bucket = TokenBucket(50, burst=1)
+    start = time.monotonic()
+    for _ in range(26):
+        bucket.acquire()
+    # 첫 토큰 이후 25개는 초당 50개 속도로만 발급
+    assert time.monotonic() - start >= 25 / 50 * 0.9
+
+
+def test_token_bucket_unlimited():
+    bucket = TokenBucket(0)
+    start = time.monotonic()
+    for _ in range(1000):
+        bucket.acquire()
+    assert time.monotonic() - start < 0.1
+
+
+def test_executor_rate_limits_calls(market, date):
+    # burst(=rate) 20개는 즉시, 나머지 20개는 약 1초에 걸쳐 호출
+    with FetchExecutor(max_workers=8, rate_per_sec=20, timeout=5) as executor:
+        start = time.monotonic()
+        results = list(executor.map_unordered(
+            lambda code: krx_call(executor, market.get_market_ohlcv_by_date, date, date, code), market.codes * 8,
+        ))
+        elapsed = time.monotonic() - start
+    assert all(error is None for _, _, error in results)
+    assert market.calls["get_market_ohlcv_by_date"] == 40
+    assert elapsed >= 0.9
+
+
+def test_executor_runs_calls_concurrently(market, date):
+    market.latency = 0.1
+    with FetchExecutor(max_workers=8, rate_per_sec=0, timeout=5) as executor:
+        start = time.monotonic()
+        results = list(executor.map_unordered(
+            lambda code: executor.call(market.get_market_ohlcv_by_date, date, date, code), market.codes * 3,
+        ))
+        elapsed = time.monotonic() - start
+    assert len(results) == 15 and all(error is None for _, _, error in results)
+    # 순차 실행이면 1.5초
+    assert elapsed < 0.8
+
+
+def test_executor_times_out_slow_calls(market, date):
+    market.latency = 0.5
+    with FetchExecutor(max_workers=2, rate_per_sec=0, timeout=0.05, max_retry=1, backoff_base=0) as executor:
+        start = time.monotonic()
+        with pytest.raises(TimeoutError):
+            executor.call(market.get_market_ohlcv_by_date, date, date, "005930")
+        elapsed = time.monotonic() - start
+    # 시도마다 timeout초만 기다리고 다음 시도로 넘어감 (응답 지연 0.5초를 기다리지 않음)
+    assert elapsed < 0.4
+    assert market.calls["get_market_ohlcv_by_date"] == 2
+
+
+def test_executor_retries_until_success(market, date):
+    failures = []
+
+    def flaky(*args):
+        if len(failures) < 2:
+            failures.append(args)
+            raise ConnectionError("일시 장애")
+        return market.get_market_ohlcv_by_date(*args)
+
+    with FetchExecutor(max_workers=2, rate_per_sec=0, timeout=5, max_retry=3, backoff_base=0.01) as executor:
+        df = executor.call(flaky, date, date, "005930")
+    assert len(failures) == 2
+    assert not df.empty
+
+
+def test_executor_gives_up_after_max_retry(market, date):
+    market.failure_rate = 1.0
+    with FetchExecutor(max_workers=2, rate_per_sec=0, timeout=5, max_retry=2, backoff_base=0.01) as executor:
+        with pytest.raises(ConnectionError):
+            executor.call(market.get_market_ohlcv_by_date, date, date, "005930")
+    assert market.calls["get_market_ohlcv_by_date"] == 3
+
+
+def test_map_unordered_reports_errors(market, date):
+    market.failure_rate = 1.0
+    with FetchExecutor(max_workers=4, rate_per_sec=0, timeout=5, max_retry=0) as executor:
+        results = list(executor.map_unordered(
+            lambda code: executor.call(market.get_market_ohlcv_by_date, date, date, code), market.codes,
+        ))
+    assert sorted(code for code, _, _ in results) == sorted(market.codes)
+    assert all(isinstance(error, ConnectionError) for _, _, error in results)
+
+
+def test_backoff_is_bounded_full_jitter():
+    executor = FetchExecutor(max_workers=1, backoff_base=0.5, backoff_max=2.0)
+    try:
+        for attempt in range(6):
+            waits = [executor.backoff(attempt) for _ in range(200)]
+            cap = min(2.0, 0.5 * 2 ** attempt)
+            assert all(0 <= w <= cap for w in waits)
+            # full jitter: 상한 근처까지 고르게 분포
+            assert max(waits) > cap * 0.5
+    finally:
+        executor.shutdown()
+
+
+def test_hung_calls_exhaust_pool_and_fail_fast(market, date):
+    # 타임아웃된 호출도 끝날 때까지 슬롯을 차지: 슬롯(max_workers*2)이 다 차면 큐에 쌓지 않고 바로 오류
+    market.latency = 0.6
+    with FetchExecutor(max_workers=1, rate_per_sec=0, timeout=0.05, max_retry=0) as executor:
+        for _ in range(executor.call_slots):
+            with pytest.raises(TimeoutError):
+                executor.call(market.get_market_ohlcv_by_date, date, date, "005930")
+        start = time.monotonic()
+        with pytest.raises(CallPoolExhausted):
+            executor.call(market.get_market_ohlcv_by_date, date, date, "005930")
+        assert time.monotonic() - start < 0.3
+        assert market.calls["get_market_ohlcv_by_date"] == executor.call_slots
+        # 묶여 있던 호출이 끝나면 슬롯이 돌아옴
+        time.sleep(0.7)
+        market.latency = 0
+        assert not executor.call(market.get_market_ohlcv_by_date, date, date, "005930").empty
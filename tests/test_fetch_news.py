@@ -0,0 +1,79 @@
+# tests/test_fetch_news.py
+# 로컬 RSS 대역 서버(benchmarks.news_stub)로 NewsService 캐시/재검증/실패 대체 동작 확인
+# 실행: python -m pytest -q tests
+
+import time
+
+import pytest
+
+from benchmarks.news_stub import start_server
+from modules.fetch_news import NewsService
+
+
+@pytest.fixture
+def stub():
+    server, base_url, stats = start_server(items=10)
+    yield base_url, stats
+    server.shutdown()
+
+
+@pytest.fixture
+def service_factory():
+    services = []
+
+    def make(base_url, **kwargs):
+        service = NewsService(base_url=base_url, **kwargs)
+        services.append(service)
+        return service
+
+    yield make
+    for service in services:
+        service.shutdown()
+
+
+def test_ttl_hit_does_not_refetch(stub, service_factory):
+    base_url, stats = stub
+    service = service_factory(base_url, ttl=60)
+    first = service.get("삼성전자", wait=5)
+    assert first == [f"삼성전자 주식 관련 기사 {i}" for i in range(1, 6)]
+    assert service.get("삼성전자") == first
+    assert stats == {"200": 1}
+
+
+def test_expired_entry_is_revalidated_with_304(stub, service_factory):
+    base_url, stats = stub
+    service = service_factory(base_url, ttl=0.2)
+    first = service.get("카카오", wait=5)
+    time.sleep(0.3)
+    assert service.get("카카오", wait=5) == first
+    assert stats == {"200": 1, "304": 1}
+
+
+def test_failure_falls_back_to_last_titles(stub, service_factory):
+    base_url, stats = stub
+    service = service_factory(base_url, ttl=0.2, retry_after=60, timeout=(0.5, 0.5))
+    first = service.get("NAVER", wait=5)
+    service.base_url = "http://127.0.0.1:9/rss"  # 연결 거부
+    time.sleep(0.3)
+    assert service.get("NAVER", wait=5) == first
+    # 실패 후 retry_after 동안은 재조회 없이 같은 값
+    start = time.monotonic()
+    assert service.get("NAVER", wait=5) == first
+    assert time.monotonic() - start < 0.1
+
+
+def test_failure_without_cache_returns_empty(service_factory):
+    service = service_factory("http://127.0.0.1:9/rss", timeout=(0.5, 0.5))
+    assert service.get("없는종목", wait=5) == []
+
+
+def test_deeper_request_refetches_full_list(stub, service_factory):
+    base_url, stats = stub
+    service = service_factory(base_url, ttl=60)
+    assert len(service.get("LG", wait=5)) == 5
+    service.ensure_depth(8)
+    titles = service.get("LG", wait=5)
+    assert len(titles) == 8
+    # 얕은 캐시로 304를 받으면 5개만 남으므로 조건부 GET 없이 다시 받음
+    assert stats == {"200": 2}
+    assert service.get("LG") == titles
@@ -0,0 +1,38 @@
+# tests/test_stock_table.py
+# CSV 원본과 Feather 스냅샷의 일치 확인(내용 해시)
+# 실행: python -m pytest -q tests
+
+import pandas as pd
+
+from modules.stock_table import export_csv, publish_snapshot, read_stock_table
+
+
+def _table():
+    return pd.DataFrame({
+        "종목명": ["삼성전자", "SK하이닉스"], "종목코드": ["005930", "000660"],
+        "현재가": [70000.0, 180000.0], "PER": [13.5, 7.2], "PBR": [1.1, 1.6],
+        "EPS": [5166.0, 25000.0], "BPS": [60000.0, 110000.0], "배당률": [2.1, 0.7],
+    })
+
+
+def test_snapshot_used_when_csv_unchanged(tmp_path):
+    path = str(tmp_path / "stocks.csv")
+    export_csv(_table(), path)
+    publish_snapshot(_table(), path)
+    df = read_stock_table(path, backend="csv")
+    # 스냅샷 경로는 float32로 읽음
+    assert df["PER"].dtype == "float32"
+
+
+def test_same_size_csv_edit_skips_snapshot(tmp_path):
+    path = str(tmp_path / "stocks.csv")
+    export_csv(_table(), path)
+    publish_snapshot(_table(), path)
+    size = len(open(path, "rb").read())
+    edited = _table()
+    edited.loc[0, "PER"] = 31.5  # 자릿수가 같아 파일 크기도 같음
+    export_csv(edited, path)
+    assert len(open(path, "rb").read()) == size
+    df = read_stock_table(path, backend="csv")
+    assert df.loc[df["종목코드"] == "005930", "PER"].item() == 31.5
+    assert df["PER"].dtype == "float64"
@@ -1,105 +1,105 @@
 # update_stock_database.py
 
+import numpy as np
 import pandas as pd
-import os
 from pykrx import stock
-from datetime import datetime, timedelta
-from modules.calculate_indicators import add_tech_indicators
+from modules.calculate_indicators import (
+    INDICATOR_COLS, add_tech_indicators, compute_indicator_matrix, is_compatible_state, latest_indicator_frame,
+    latest_signal_frame, load_indicator_state, save_indicator_state, slice_indicator_state, step_indicator_state,
+)
+from modules.fetch_executor import FetchExecutor, krx_call
+from modules.trading_calendar import get_calendar
+from modules.signals import SIGNAL_COLS, recent_signal_flags, signals_from_frame
+from modules.score_utils import SCORE_COLS, compute_all_scores
+from modules.screener import RULE_NAMES, update_screener, write_screener
+from modules.stock_history import append_history
+from modules.stock_table import STOCK_TABLE_PATH, get_stock_row, upsert_stock_row, write_stock_table
+from modules.tracing import format_trace, span
+from modules.update_journal import BASE_DATE_COL, UpdateJournal
+from modules.price_store import (
+    append_bars, append_market_bars, frame_to_bars, last_bar_date, load_price_history, read_field_matrix, read_meta,
+    write_meta,
+)
 import sys
 
-def update_single_stock(code):
+STOCK_COLS = ["종목명", "종목코드", "현재가", "거래량", "거래대금", "PER", "PBR", "EPS", "BPS", "배당률"]
+SNAPSHOT_FUND_COLS = ["PER", "PBR", "EPS", "BPS", "배당률"]
+PRICE_STORE_BOOTSTRAP_SESSIONS = 250
+
+def update_single_stock(code, executor=None):
     import streamlit as st
-    from datetime import datetime
-    from modules.calculate_indicators import add_tech_indicators
-    from pykrx import stock
 
     st.write("===== [개별 갱신 시작] =====")
     st.write("입력 code:", code)
 
     code = str(code).zfill(6)
 
-    try:
-        today = datetime.today()
-        max_retry = 10
-        price_info = None
-        fund_info = None
-
-        for i in range(max_retry):
-            day = today - timedelta(days=i)
-            if day.weekday() >= 5:
-                continue
-            date = day.strftime("%Y%m%d")
-            try:
-                df_price = stock.get_market_ohlcv_by_date(date, date, code)
-                if df_price is not None and not df_price.empty:
-                    price_info = {
-                        "현재가": int(df_price['종가'].iloc[-1]),
-                        "거래량": int(df_price['거래량'].iloc[-1]),
-                        "거래대금": int(df_price['종가'].iloc[-1]) * int(df_price['거래량'].iloc[-1]),
-                        "가격데이터": df_price
-                    }
-                    break
-            except Exception:
-                continue
-
-        for i in range(max_retry):
-            day = today - timedelta(days=i)
-            if day.weekday() >= 5:
-                continue
-            date = day.strftime("%Y%m%d")
+    with span("update_single_stock", code=code):
+        try:
+            # 시세/펀더멘털 조회를 동시에 실행
+            own_executor = executor is None
+            if own_executor:
+                executor = FetchExecutor(max_workers=2)
             try:
-                df_fund = stock.get_market_fundamental_by_date(date, date, code)
-                if df_fund is not None and not df_fund.empty:
-                    fund_info = {
-                        'PER': float(df_fund['PER'].iloc[-1]) if not pd.isna(df_fund['PER'].iloc[-1]) else None,
-                        'PBR': float(df_fund['PBR'].iloc[-1]) if not pd.isna(df_fund['PBR'].iloc[-1]) else None,
-                        'EPS': float(df_fund['EPS'].iloc[-1]) if not pd.isna(df_fund['EPS'].iloc[-1]) else None,
-                        'BPS': float(df_fund['BPS'].iloc[-1]) if not pd.isna(df_fund['BPS'].iloc[-1]) else None,
-                        '배당률': float(df_fund['DIV'].iloc[-1]) if not pd.isna(df_fund['DIV'].iloc[-1]) else None
-                    }
-                    break
-            except Exception:
-                continue
-
-        if price_info is None or fund_info is None or price_info.get("가격데이터") is None:
-            st.error(f"[개별 갱신][{code}] 데이터 없음")
-            return None
+                with span("fetch"):
+                    price_future = executor.submit(fetch_price, code, executor=executor)
+                    fund_future = executor.submit(fetch_fundamental, code, executor=executor)
+                    price_info = price_future.result()
+                    fund_info = fund_future.result()
+            finally:
+                if own_executor:
+                    executor.shutdown()
 
-        df_price = price_info["가격데이터"]
-        df_price = add_tech_indicators(df_price)
-
-        df_update = pd.DataFrame({
-            "현재가": [price_info["현재가"]],
-            "거래량": [price_info["거래량"]],
-            "거래대금": [price_info["거래대금"]],
-            "PER": [fund_info['PER']],
-            "PBR": [fund_info['PBR']],
-            "EPS": [fund_info['EPS']],
-            "BPS": [fund_info['BPS']],
-            "배당률": [fund_info['배당률']],
-            "RSI_14": [df_price['RSI_14'].iloc[-1] if 'RSI_14' in df_price.columns else None],
-            "MACD": [df_price['MACD'].iloc[-1] if 'MACD' in df_price.columns else None],
-            "MACD_SIGNAL": [df_price['MACD_SIGNAL'].iloc[-1] if 'MACD_SIGNAL' in df_price.columns else None],
-            "EMA_20": [df_price['EMA_20'].iloc[-1] if 'EMA_20' in df_price.columns else None],
-        })
-
-        st.success(f"[개별 갱신][{code}] 최신 데이터 반영 완료")
-        return df_update
+            if price_info.get("가격데이터") is None or all(v is None for v in fund_info.values()):
+                st.error(f"[개별 갱신][{code}] 데이터 없음")
+                return None
 
-    except Exception as e:
-        st.error(f"[개별 갱신][{code}] 오류 발생: {e}")
-        return None
+            with span("indicators"):
+                indicators = single_stock_indicators(code, price_info["가격데이터"])
 
+            df_update = pd.DataFrame({
+                "현재가": [price_info["현재가"]],
+                "거래량": [price_info["거래량"]],
+                "거래대금": [price_info["거래대금"]],
+                "PER": [fund_info['PER']],
+                "PBR": [fund_info['PBR']],
+                "EPS": [fund_info['EPS']],
+                "BPS": [fund_info['BPS']],
+                "배당률": [fund_info['배당률']],
+                "RSI_14": [indicators['RSI_14'] if indicators is not None else None],
+                "MACD": [indicators['MACD'] if indicators is not None else None],
+                "MACD_SIGNAL": [indicators['MACD_SIGNAL'] if indicators is not None else None],
+                "EMA_20": [indicators['EMA_20'] if indicators is not None else None],
+            })
 
-def fetch_price(code, max_retry=10):
-    today = datetime.today()
-    for i in range(max_retry):
-        day = today - timedelta(days=i)
-        if day.weekday() >= 5:
-            continue
-        date = day.strftime("%Y%m%d")
+            # 가격 저장소와 종목 테이블에 해당 종목 한 행만 반영
+            df_price = price_info["가격데이터"]
+            with span("write"):
+                append_bars(code, frame_to_bars(df_price))
+                base_date = pd.Timestamp(df_price.index[-1]).strftime("%Y%m%d")
+                signals = {col: indicators[col] for col in SIGNAL_COLS} if indicators is not None else {}
+                table = upsert_stock_row({"종목코드": code, BASE_DATE_COL: base_date, **df_update.iloc[0].to_dict(), **signals})
+                # 스크리너 행렬도 해당 종목 규칙 비트와 전 종목 점수/순위만 교체
+                stored = get_stock_row(code)  # sqlite 백엔드면 기본키 조회 (반환 테이블은 점수 열만)
+                row = pd.DataFrame([stored]) if stored is not None else table[table["종목코드"] == code]
+                row = row.merge(
+                    price_window_stats([code], base_date), left_on="종목코드", right_index=True, how="left",
+                )
+                update_screener(row, table)
+
+            st.success(f"[개별 갱신][{code}] 최신 데이터 반영 완료")
+            return df_update
+
+        except Exception as e:
+            st.error(f"[개별 갱신][{code}] 오류 발생: {e}")
+            return None
+
+
+def fetch_price(code, max_retry=3, executor=None):
+    # 캘린더의 최근 거래일부터 조회 (거래정지 종목 대비 최대 max_retry 거래일)
+    for date in reversed(get_calendar().recent_sessions(max_retry)):
         try:
-            df = stock.get_market_ohlcv_by_date(date, date, code)
+            df = krx_call(executor, stock.get_market_ohlcv_by_date, date, date, code)
             if df is not None and not df.empty:
                 price = int(df['종가'].iloc[-1])
                 volume = int(df['거래량'].iloc[-1])
@@ -114,15 +114,11 @@ def fetch_price(code, max_retry=10):
             continue
     return {"현재가": None, "거래량": None, "거래대금": None, "가격데이터": None}
 
-def fetch_fundamental(code, max_retry=10):
-    today = datetime.today()
-    for i in range(max_retry):
-        day = today - timedelta(days=i)
-        if day.weekday() >= 5:
-            continue
-        date = day.strftime("%Y%m%d")
+def fetch_fundamental(code, max_retry=3, executor=None):
+    # 캘린더의 최근 거래일부터 조회 (거래정지 종목 대비 최대 max_retry 거래일)
+    for date in reversed(get_calendar().recent_sessions(max_retry)):
         try:
-            df = stock.get_market_fundamental_by_date(date, date, code)
+            df = krx_call(executor, stock.get_market_fundamental_by_date, date, date, code)
             if df is not None and not df.empty:
                 return {
                     'PER': float(df['PER'].iloc[-1]) if not pd.isna(df['PER'].iloc[-1]) else None,
@@ -135,36 +131,231 @@ def fetch_fundamental(code, max_retry=10):
             continue
     return {'PER': None, 'PBR': None, 'EPS': None, 'BPS': None, '배당률': None}
 
-def update_database():
-    df_list = pd.read_csv("initial_krx_list.csv", dtype={'종목코드': str})
-    codes = dict(zip(df_list['종목명'], df_list['종목코드']))
-    data = []
-    for name, code in codes.items():
-        price_info = fetch_price(code)
-        fund_info = fetch_fundamental(code)
-        data.append({
-            "종목명": name,
-            "종목코드": code,
-            "현재가": price_info["현재가"],
-            "거래량": price_info["거래량"],
-            "거래대금": price_info["거래대금"],
-            "PER": fund_info["PER"],
-            "PBR": fund_info["PBR"],
-            "EPS": fund_info.get("EPS"),
-            "BPS": fund_info.get("BPS"),
-            "배당률": fund_info["배당률"]
-        })
-    df = pd.DataFrame(data)
-    print(f"[update_database] 수집 데이터 건수: {len(df)}", file=sys.stderr)
-    print(df.head(), file=sys.stderr)
-    print(df.info(), file=sys.stderr)
-
-    csv_path = "filtered_stocks.csv"
+def fetch_market_snapshot(date, executor=None):
+    # 하루치 전 종목 시세/펀더멘털을 날짜 단위 호출 2회로 수집
+    df_ohlcv = krx_call(executor, stock.get_market_ohlcv_by_ticker, date, market="ALL")
+    if df_ohlcv is None or df_ohlcv.empty or not (df_ohlcv['종가'] > 0).any():
+        return None
+    snapshot = pd.DataFrame({
+        "시가": df_ohlcv['시가'],
+        "고가": df_ohlcv['고가'],
+        "저가": df_ohlcv['저가'],
+        "현재가": df_ohlcv['종가'],
+        "거래량": df_ohlcv['거래량'],
+        "거래대금": df_ohlcv['종가'] * df_ohlcv['거래량'],
+    })
+    try:
+        df_fund = krx_call(executor, stock.get_market_fundamental_by_ticker, date, market="ALL")
+    except Exception:
+        df_fund = None
+    if df_fund is not None and not df_fund.empty:
+        df_fund = df_fund.rename(columns={'DIV': '배당률'})
+        snapshot = snapshot.join(df_fund.reindex(columns=SNAPSHOT_FUND_COLS), how="left")
+    else:
+        for col in SNAPSHOT_FUND_COLS:
+            snapshot[col] = None
+    snapshot.index = snapshot.index.astype(str).str.zfill(6)
+    snapshot.index.name = "종목코드"
+    return snapshot.reset_index()
+
+def resolve_market_snapshot(max_retry=3, executor=None):
+    # 당일 데이터 미공개 시 직전 거래일로 후퇴
+    for date in reversed(get_calendar().recent_sessions(max_retry)):
+        try:
+            snapshot = fetch_market_snapshot(date, executor=executor)
+        except Exception as e:
+            print(f"[snapshot][{date}] 조회 실패: {e}", file=sys.stderr)
+            continue
+        if snapshot is not None:
+            return date, snapshot
+    return None, None
+
+def sync_price_store(snapshot_date, snapshot, executor=None):
+    # 저장소 마지막 거래일 이후의 누락 세션을 날짜 단위로 받아 종목별 파일에 추가, 새로 받은 과거 세션 목록 반환
+    last = read_meta().get("last_session")
+    sessions = get_calendar().recent_sessions(PRICE_STORE_BOOTSTRAP_SESSIONS, snapshot_date)
+    missing = [d for d in sessions if d < snapshot_date and (last is None or d > last)]
+    frames = {snapshot_date: snapshot.set_index("종목코드").rename(columns={"현재가": "종가"})}
+    fetch_day = lambda d: krx_call(executor, stock.get_market_ohlcv_by_ticker, d, market="ALL")
+    if executor is not None:
+        results = executor.map_unordered(fetch_day, missing)
+    else:
+        results = ((d, fetch_day(d), None) for d in missing)
+    for date, df_day, error in results:
+        if error is not None or df_day is None or df_day.empty:
+            print(f"[price_store][{date}] 시세 조회 실패: {error}", file=sys.stderr)
+            continue
+        frames[date] = df_day
+    # 실패한 세션이 있으면 그 직전까지만 완료로 기록해 다음 실행에서 다시 받음 (늦게 받은 날짜는 병합)
+    done = last
+    for date in missing + [snapshot_date]:
+        if date not in frames:
+            break
+        done = date
     try:
-        df.to_csv(csv_path, index=False, encoding='utf-8-sig')
-        print(f"{csv_path} 파일 생성/갱신 완료!", file=sys.stderr)
+        appended = append_market_bars(frames)
+        write_meta({"last_session": done})
+        print(f"[price_store] {len(frames)}개 세션, {appended}건 추가", file=sys.stderr)
     except Exception as e:
-        print(f"{csv_path} 저장 실패: {e}", file=sys.stderr)
+        print(f"[price_store] 저장 실패: {e}", file=sys.stderr)
+        return []
+    return [d for d in missing if d in frames]
+
+def update_indicators(df, snapshot_date, synced=()):
+    # 직전 세션까지의 지표 상태가 있으면 새 봉만 반영, 아니면 저장소 이력으로 일괄 재계산
+    # synced: 이번에 늦게 채운 과거 세션 (상태가 이미 지난 날짜면 결측으로 반영됐으므로 재계산)
+    codes = df["종목코드"].tolist()
+    sessions = get_calendar().recent_sessions(PRICE_STORE_BOOTSTRAP_SESSIONS, snapshot_date)
+    state = load_indicator_state()
+    same_codes = is_compatible_state(state) and state["codes"].tolist() == codes
+    late = same_codes and any(d <= state["last_date"] for d in synced)
+    if same_codes and not late and len(sessions) > 1 and state["last_date"] == sessions[-2]:
+        step_indicator_state(state, read_field_matrix(codes, [snapshot_date])[:, 0], snapshot_date)
+        print(f"[indicators] {snapshot_date} 증분 반영", file=sys.stderr)
+    elif not same_codes or late or state["last_date"] != snapshot_date:
+        _, state = compute_indicator_matrix(codes, read_field_matrix(codes, sessions), sessions)
+        print(f"[indicators] {len(sessions)}개 세션 일괄 계산", file=sys.stderr)
+    try:
+        save_indicator_state(state)
+    except Exception as e:
+        print(f"[indicators] 상태 저장 실패: {e}", file=sys.stderr)
+    latest = latest_indicator_frame(state).join(latest_signal_frame(state))
+    return df.merge(latest, left_on="종목코드", right_index=True, how="left")
+
+def single_stock_indicators(code, df_price):
+    # 야간 지표 상태에서 해당 종목만 꺼내 새 봉 반영, 상태가 없으면 저장소 이력으로 계산
+    date = pd.Timestamp(df_price.index[-1]).strftime("%Y%m%d")
+    state = load_indicator_state()
+    if is_compatible_state(state) and code in state["codes"]:
+        sub = slice_indicator_state(state, np.flatnonzero(state["codes"] == code))
+        if sub["last_date"] >= date:
+            return latest_indicator_frame(sub).join(latest_signal_frame(sub)).iloc[0]
+        # 상태 이후 빠진 세션은 저장소 봉으로 하루씩 반영(결측=거래정지), 저장소도 비어 있으면 아래 전체 재계산
+        sessions = get_calendar().recent_sessions(PRICE_STORE_BOOTSTRAP_SESSIONS, date)
+        gap = [d for d in sessions if sub["last_date"] < d < date]
+        if sessions[0] <= sub["last_date"] and (not gap or (last_bar_date(code) or "") >= gap[-1]):
+            for session, close in zip(gap, read_field_matrix([code], gap)[0]):
+                step_indicator_state(sub, [close], session)
+            step_indicator_state(sub, [float(df_price['종가'].iloc[-1])], date)
+            return latest_indicator_frame(sub).join(latest_signal_frame(sub)).iloc[0]
+    start, end = get_calendar().window(365, date)
+    df_hist = load_price_history(code, start, end)
+    if df_hist is None or df_hist.empty:
+        return None
+    df_hist = add_tech_indicators(df_hist)
+    flags = recent_signal_flags(signals_from_frame(df_hist))
+    return pd.concat([df_hist.iloc[-1], pd.Series({k: bool(v) for k, v in flags.items()})])
+
+def price_window_stats(codes, snapshot_date, window=20):
+    # 저장소 최근 window 세션으로 평균 거래량(결측 있으면 NaN)과 전일 종가
+    sessions = get_calendar().recent_sessions(window, snapshot_date)
+    volume = read_field_matrix(codes, sessions, "거래량")
+    close = read_field_matrix(codes, sessions, "종가")
+    avg_volume = volume.mean(axis=1) if len(sessions) == window else np.full(len(codes), np.nan)
+    prev_close = close[:, -2] if len(sessions) > 1 else np.full(len(codes), np.nan)
+    return pd.DataFrame({"평균거래량_20": avg_volume, "전일종가": prev_close}, index=pd.Index(codes, name="종목코드"))
+
+def fetch_stock_row(code, executor=None):
+    # 시세를 못 받은 종목은 예외로 알려 저널에 완료로 남지 않게 함 (재시작 시 다시 조회)
+    price_info = fetch_price(code, executor=executor)
+    if price_info["현재가"] is None:
+        raise RuntimeError("최근 거래일 시세 없음")
+    fund_info = fetch_fundamental(code, executor=executor)
+    return {
+        "현재가": price_info["현재가"],
+        "거래량": price_info["거래량"],
+        "거래대금": price_info["거래대금"],
+        "PER": fund_info["PER"],
+        "PBR": fund_info["PBR"],
+        "EPS": fund_info.get("EPS"),
+        "BPS": fund_info.get("BPS"),
+        "배당률": fund_info["배당률"]
+    }
+
+def update_database(bulk=True, max_workers=None, rate_per_sec=None):
+    # 단계별 소요 시간을 스팬으로 기록 (traces/spans.jsonl, traces/metrics.prom)
+    with span("update_database", bulk=bulk) as root:
+        df_list = pd.read_csv("initial_krx_list.csv", dtype={'종목코드': str})
+        df = df_list.drop_duplicates(subset="종목명", keep="last")[["종목명", "종목코드"]]
+        df = df.reset_index(drop=True)
+
+        with FetchExecutor(max_workers=max_workers, rate_per_sec=rate_per_sec) as executor:
+            with span("resolve_snapshot"):
+                snapshot_date, snapshot = resolve_market_snapshot(executor=executor) if bulk else (None, None)
+                target_date = snapshot_date or get_calendar().latest_session()
+
+            # 완료 행은 저널에 즉시 기록, 재시작 시 같은 기준일로 끝난 종목은 건너뜀
+            with UpdateJournal(target_date) as journal:
+                pending = df[~df["종목코드"].isin(journal.done)]
+                if journal.done:
+                    print(f"[update_database] {target_date} 저널에서 {len(journal.done)}건 이어받음", file=sys.stderr)
+                synced = []
+                if snapshot is not None:
+                    matched = pending.merge(snapshot[["종목코드"] + STOCK_COLS[2:]], on="종목코드", how="inner")
+                    journal.append_frame(matched)
+                    pending = pending[~pending["종목코드"].isin(matched["종목코드"])]
+                    print(f"[update_database] {snapshot_date} 스냅샷 매칭: {len(matched)}건, "
+                          f"개별 조회 대상: {len(pending)}건", file=sys.stderr)
+                    with span("sync_price_store"):
+                        synced = sync_price_store(snapshot_date, snapshot, executor=executor)
+
+                # 스냅샷에 없는 종목만 종목별로 동시 조회, 완료 순서대로 저널에 기록
+                names = dict(zip(pending["종목코드"], pending["종목명"]))
+                fetch_row = lambda c: fetch_stock_row(c, executor=executor)
+                with span("per_ticker_fetch", tickers=len(names)):
+                    for code, row, error in executor.map_unordered(fetch_row, list(names)):
+                        if error is not None:
+                            print(f"[update_database][{code}] 조회 실패: {error}", file=sys.stderr)
+                            continue
+                        journal.append({"종목명": names[code], "종목코드": code, **row})
+                collected = journal.read_frame()
+
+        df = df.merge(collected.drop(columns=["종목명"], errors="ignore"), on="종목코드", how="left")
+        for col in STOCK_COLS[2:] + [BASE_DATE_COL]:
+            if col not in df.columns:
+                df[col] = None
+        with span("update_indicators"):
+            if snapshot_date is not None:
+                df = update_indicators(df, snapshot_date, synced)
+            else:
+                for col in INDICATOR_COLS + SIGNAL_COLS:
+                    df[col] = None
+
+        # 성향별 점수/순위를 갱신 시 1회 계산해 함께 저장
+        with span("compute_scores"):
+            df = compute_all_scores(df)[STOCK_COLS + [BASE_DATE_COL] + INDICATOR_COLS + SIGNAL_COLS + SCORE_COLS]
+        print(f"[update_database] 수집 데이터 건수: {len(df)}", file=sys.stderr)
+        print(df.head(), file=sys.stderr)
+        df.info(buf=sys.stderr)
+
+        csv_path = STOCK_TABLE_PATH
+        try:
+            with span("write_stock_table"):
+                write_stock_table(df, csv_path)
+            journal.clear()
+            print(f"{csv_path} 파일 생성/갱신 완료!", file=sys.stderr)
+        except Exception as e:
+            print(f"{csv_path} 저장 실패: {e}", file=sys.stderr)
+
+        # 일자별 이력: 기준일 파티션에 재무/지표/점수 추가 (지난 날짜는 유지)
+        try:
+            with span("write_history"):
+                rows = append_history(df, target_date)
+            print(f"[history] {target_date} {rows}건 기록", file=sys.stderr)
+        except Exception as e:
+            print(f"[history] 저장 실패: {e}", file=sys.stderr)
+
+        # 스크리너: 종목 × 규칙 비트마스크와 최신 지표를 함께 저장
+        try:
+            with span("write_screener"):
+                stats = price_window_stats(df["종목코드"].tolist(), snapshot_date) if snapshot_date is not None else None
+                screen_df = df.merge(stats, left_on="종목코드", right_index=True, how="left") if stats is not None else df
+                write_screener(screen_df, target_date)
+            print(f"[screener] {len(df)}종목 × {len(RULE_NAMES)}규칙 저장", file=sys.stderr)
+        except Exception as e:
+            print(f"[screener] 저장 실패: {e}", file=sys.stderr)
+    print(format_trace(root), file=sys.stderr)
 
 if __name__ == "__main__":
-    update_database()
+    # --per-ticker: 스냅샷 없이 기존 종목별 조회 방식으로 실행
+    update_database(bulk="--per-ticker" not in sys.argv)